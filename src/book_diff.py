@@ -0,0 +1,54 @@
+"""
+Comparison of two contact books in linear time.
+
+Each contact is reduced once to a fingerprint of its canonical content (see contact_index.fingerprint), read from the
+records of the book (ContactBook._iter_records), so any two books can be compared whatever their storage.
+diff_books matches the contacts by ID, content_counts ignores the IDs and is used by ContactBook.__eq__.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from src.contact_index import record_fingerprint
+
+
+@dataclass
+class BookDiff:
+    """
+    The changes that turn a book into another one, as sorted IDs:
+    added are only in the other book, removed only in this one, changed are in both with a different content.
+    """
+    added: list[int] = field(default_factory=list)
+    removed: list[int] = field(default_factory=list)
+    changed: list[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+def diff_books(book, other) -> BookDiff:
+    """
+    Return the differences between book and other, contacts being matched by ID. Reads each book once.
+    """
+    fingerprints = {record["id"]: record_fingerprint(record) for record in book._iter_records()}
+    diff = BookDiff()
+    for record in other._iter_records():
+        id = record["id"]
+        old = fingerprints.pop(id, None)
+        if old is None:
+            diff.added.append(id)
+        elif old != record_fingerprint(record):
+            diff.changed.append(id)
+    diff.removed.extend(fingerprints)
+    for ids in (diff.added, diff.removed, diff.changed):
+        ids.sort()
+    return diff
+
+
+def content_counts(book) -> Counter:
+    """
+    Return the multiset of the contents of the contacts of a book: the number of contacts with each fingerprint.
+    """
+    return Counter(record_fingerprint(record) for record in book._iter_records())
@@ -0,0 +1,326 @@
+import sys
+from array import array
+from bisect import bisect_right
+from src.contact import Contact, CompactContact
+from src.contact_book import ContactBook
+from src.contact_index import fingerprint, trigrams
+from src.query import Query, Term
+
+class _LabelledColumn:
+    """
+    Flat storage of the labelled values of a dict field (phone or email) for all the rows of a ColumnarContactBook.
+    The entries of a row are contiguous: each row points to them with a start and a count.
+    Replaced entries are left orphaned, and dropped by compact once they outnumber the live ones.
+    """
+
+    def __init__(self):
+        self.labels: list[str] = []
+        self.values: list[str] = []
+        self.owners = array('q')  # row of each entry, -1 once the row is removed or updated
+        self.starts = array('q')
+        self.counts = array('q')
+        self.live = 0  # entries still owned by a row
+
+    def append_row(self, values: dict[str, list[str]]):
+        self.starts.append(len(self.values))
+        self.counts.append(0)
+        self._write(len(self.starts) - 1, values)
+
+    def set_row(self, row: int, values: dict[str, list[str]]):
+        """
+        Replace the entries of a row, if they changed. The old entries are left orphaned at their place.
+        """
+        if self.get(row) == {label: items for label, items in values.items() if items}:
+            return
+        self.clear_row(row)
+        self.starts[row] = len(self.values)
+        self._write(row, values)
+
+    def _write(self, row: int, values: dict[str, list[str]]):
+        count = 0
+        for label, items in values.items():
+            label = sys.intern(label)
+            for item in items:
+                self.labels.append(label)
+                self.values.append(item)
+                self.owners.append(row)
+                count += 1
+        self.counts[row] = count
+        self.live += count
+
+    def clear_row(self, row: int):
+        start = self.starts[row]
+        for i in range(start, start + self.counts[row]):
+            self.owners[i] = -1
+        self.live -= self.counts[row]
+        self.counts[row] = 0
+        if len(self.values) > 2 * self.live:
+            self.compact()
+
+    def compact(self):
+        """
+        Drop the orphaned entries, moving the entries of each row down to keep them contiguous.
+        """
+        labels, values, owners = [], [], array('q')
+        for row, count in enumerate(self.counts):
+            start = self.starts[row]
+            self.starts[row] = len(values)
+            if count:
+                labels += self.labels[start:start + count]
+                values += self.values[start:start + count]
+                owners += self.owners[start:start + count]
+        self.labels, self.values, self.owners = labels, values, owners
+
+    def get(self, row: int) -> dict[str, list[str]]:
+        values = {}
+        start = self.starts[row]
+        for i in range(start, start + self.counts[row]):
+            values.setdefault(self.labels[i], []).append(self.values[i])
+        return values
+
+    def rows_where(self, test, label: str = None) -> set[int]:
+        """
+        Return the rows with an entry satisfying test, optionally under the given label.
+        """
+        labels, owners = self.labels, self.owners
+        return {owners[i] for i, value in enumerate(self.values)
+                if owners[i] >= 0 and (not label or labels[i] == label) and test(value)}
+
+
+class ColumnarContactBook(ContactBook):
+    """
+    A ContactBook keeping its data in columns (struct of arrays) instead of a list of Contact objects:
+    parallel lists of names, surnames and addresses, and flat label/value arrays for phone numbers and emails.
+
+    Searches, counts and exports run over the columns. Contact objects are only materialized when asked for
+    (get_contact_by_id, search results, contacts): they are copies, modify them through the book (update_contact).
+    Removed rows stay in the columns, marked in _alive, until they outnumber the others: see _compact_rows.
+    """
+    LAZY_LOAD = False # values are stored in the columns as they are loaded
+
+    def __init__(self):
+        super().__init__()
+        self._rows: dict[int, int] = {}  # id -> row
+        self._ids = array('q')
+        self._alive = bytearray()
+        self._names: list[str] = []
+        self._surnames: list[str] = []
+        self._addresses: list[str] = []
+        self._phones = _LabelledColumn()
+        self._emails = _LabelledColumn()
+
+    @property
+    def contacts(self) -> list[Contact]:
+        return [self._materialize(row) for row in self._rows.values()]
+
+    @contacts.setter
+    def contacts(self, contacts: list[Contact]):
+        generation = self.generation
+        self.__init__()
+        self.generation = generation + 1
+        for contact in contacts:
+            if contact.id is None:
+                contact.id = self.next_id
+            self._put(contact)
+
+    def _put(self, contact: Contact):
+        self.generation += 1
+        row = self._rows.get(contact.id)
+        if row is None:
+            self._rows[contact.id] = len(self._ids)
+            self._ids.append(contact.id)
+            self._alive.append(1)
+            self._names.append(contact.name)
+            self._surnames.append(contact.surname)
+            self._addresses.append(contact.address)
+            self._phones.append_row(contact.phone)
+            self._emails.append_row(contact.email)
+        else:
+            self._write_row(row, contact)
+        self.next_id = max(self.next_id, contact.id + 1)
+
+    def _put_many(self, contacts: list[Contact]):
+        for contact in contacts:
+            self._put(contact)
+
+    def _write_row(self, row: int, contact: Contact):
+        """
+        Write a contact over a row. Phone numbers and emails are only rewritten if they changed, see _LabelledColumn.set_row.
+        """
+        self._names[row] = contact.name
+        self._surnames[row] = contact.surname
+        self._addresses[row] = contact.address
+        self._phones.set_row(row, contact.phone)
+        self._emails.set_row(row, contact.email)
+
+    def _discard(self, id: int) -> Contact | None:
+        row = self._rows.pop(id, None)
+        if row is None:
+            return None
+        self.generation += 1
+        contact = self._materialize(row)
+        self._alive[row] = 0
+        self._phones.clear_row(row)
+        self._emails.clear_row(row)
+        if len(self._ids) > 2 * len(self._rows):
+            self._compact_rows()
+        return contact
+
+    def _compact_rows(self):
+        """
+        Rebuild the columns without the removed rows, keeping the others in the same (ID) order.
+        """
+        rows = sorted(self._rows.values())
+        phones, emails = _LabelledColumn(), _LabelledColumn()
+        for row in rows:
+            phones.append_row(self._phones.get(row))
+            emails.append_row(self._emails.get(row))
+        self._phones, self._emails = phones, emails
+        self._ids = array('q', [self._ids[row] for row in rows])
+        self._alive = bytearray(b'\x01' * len(rows))
+        self._names = [self._names[row] for row in rows]
+        self._surnames = [self._surnames[row] for row in rows]
+        self._addresses = [self._addresses[row] for row in rows]
+        self._rows = {id: row for row, id in enumerate(self._ids)}
+
+    def _materialize(self, row: int) -> Contact:
+        return Contact.from_normalized(self._names[row], self._surnames[row], self._phones.get(row),
+                                       self._emails.get(row), self._addresses[row], self._ids[row])
+
+    def count_contacts(self) -> int:
+        return len(self._rows)
+
+    def get_contact_by_id(self, id: int) -> Contact | bool:
+        row = self._rows.get(id)
+        return False if row is None else self._materialize(row)
+
+    def _rows_matching(self, field_name: str, search_value, label: str = None, mode: str = 'exact') -> set[int]:
+        """
+        Return the rows matching one criterion, with the semantics of Contact.one_field_match.
+        """
+        columns = {'name': self._names, 'surname': self._surnames, 'address': self._addresses}
+        labelled = {'phone': self._phones, 'email': self._emails}
+
+        if field_name not in columns and field_name not in labelled and field_name != 'id':
+            raise ValueError("Invalid field.")
+        if mode != 'exact':
+            if field_name != 'phone' or mode not in ('prefix', 'suffix'):
+                raise ValueError("Invalid match mode. Use 'exact', or 'prefix'/'suffix' for phone numbers.")
+            search_value = str(search_value)
+            if not search_value.isdigit():
+                return set()
+            if mode == 'prefix':
+                return self._phones.rows_where(lambda n: n.isdigit() and n.startswith(search_value), label)
+            return self._phones.rows_where(lambda n: n.isdigit() and n.endswith(search_value), label)
+
+        if field_name in labelled:
+            return labelled[field_name].rows_where(lambda v: v == search_value, label)
+        if field_name in columns:
+            search_value = search_value.lower()
+            alive = self._alive
+            return {row for row, value in enumerate(columns[field_name]) if alive[row] and value.lower() == search_value}
+        return set() # id is not a string field, never matches
+
+    def _search_ids(self, how, show, criteria, workers: int = 0) -> list[int]:
+        """
+        Scan the columns one criterion at a time. workers is ignored, column scans are already fast.
+        """
+        if any(len(arg)<2 or len(arg)>4 for arg in criteria):
+            raise ValueError("Invalid length fo matching criteria. Provide filed name and value, optional label and match mode.")
+        if how not in ('all', 'any'):
+            raise ValueError("Invalid match mode. Use 'all' or 'any'.")
+
+        if how == 'all':
+            rows = None
+            for arg in criteria:
+                matched = self._rows_matching(*arg)
+                rows = matched if rows is None else rows & matched
+                if not rows:
+                    break
+            if rows is None:
+                rows = self._rows.values()
+        else:
+            rows = set()
+            for arg in criteria:
+                rows |= self._rows_matching(*arg)
+
+        rows = sorted(rows)  # rows are in ID order
+        if show == 'first':
+            rows = rows[:1]
+        return [self._ids[row] for row in rows]
+
+    def explain(self, how='all', *criteria) -> str:
+        """
+        Describe how search_contacts runs the criteria: a scan of the column of each one, in the given order.
+        """
+        Query(how, criteria) # validates the criteria
+        combine = "intersect the rows, stopping when none is left" if how == 'all' else "union of the rows"
+        lines = [f"{how} of {len(criteria)} criteria: scan a column per criterion, {combine}"]
+        for i, arg in enumerate(criteria, 1):
+            step = f"scan    ({arg[0]} column)"
+            lines.append(f"  {i}. {step:<24} {Term(*arg)}")
+        return '\n'.join(lines)
+
+    def _iter_search_ids(self, how, criteria, after: int = None):
+        ids = self._search_ids(how, 'all', criteria)
+        return iter(ids if after is None else ids[bisect_right(ids, after):])
+
+    def _get_many(self, ids) -> list[Contact]:
+        return [self._materialize(self._rows[id]) for id in ids]
+
+    def _same_name_ids(self, contact: Contact) -> list[int]:
+        """
+        Same as ContactBook, with a search of the name and surname columns.
+        """
+        return self._search_ids('all', 'all', (('name', contact.name), ('surname', contact.surname)))
+
+    def _same_content_ids(self, contact: Contact) -> list[int]:
+        key = fingerprint(contact)
+        return [c.id for c in self._get_many(self._same_name_ids(contact)) if fingerprint(c) == key]
+
+    def fuzzy_search(self, value: str, field: str = None, k: int = 10, min_score: float = 0.3) -> list[tuple[Contact, float]]:
+        """
+        Same as ContactBook.fuzzy_search, computed with a scan of the name/surname columns.
+        """
+        if field not in (None, 'name', 'surname'):
+            raise ValueError("Invalid field. Fuzzy search supports 'name' and 'surname'.")
+        grams = trigrams(value)
+        columns = [self._names] if field == 'name' else [self._surnames] if field == 'surname' else [self._names, self._surnames]
+        scored = []
+        for row in self._rows.values():
+            score = 0
+            for column in columns:
+                other = trigrams(column[row])
+                score = max(score, 2 * len(grams & other) / (len(grams) + len(other)))
+            if score >= min_score:
+                scored.append((-score, row))
+        scored.sort()
+        return [(self._materialize(row), -score) for score, row in scored[:k]]
+
+    def _holds(self, contact: Contact) -> bool:
+        row = self._rows.get(contact.id)
+        return row is not None and CompactContact.from_contact(self._materialize(row)) == contact
+
+    def update_contact(self, contact: Contact, updates: list[dict]):
+        """
+        Update a given contact with one or more fields, and write the result back to the columns.
+        """
+        row = self._rows.get(contact.id)
+        try:
+            res = contact.update_multiple(updates)
+            if res: #if aborted, returns False; else True
+                self.modified = True
+        except Exception as e:
+            print(f"Update failed. Exception: {e}")
+        if row is not None:
+            self.generation += 1
+            self._write_row(row, contact)
+            self._log('update', contact)
+
+    def _iter_records(self):
+        """
+        Yield the records straight from the columns, for save_to_json.
+        """
+        for row in self._rows.values():
+            yield {'name': self._names[row], 'surname': self._surnames[row], 'phone': self._phones.get(row),
+                   'email': self._emails.get(row), 'address': self._addresses[row], 'id': self._ids[row]}
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Optional
 import re
+import sys
 
 # Default factories for phone/email fields
 def default_phone_dict() -> dict:
@@ -9,6 +10,55 @@ def default_phone_dict() -> dict:
 def default_email_dict() -> dict:
     return {'personal': [], 'work': [], 'other': []}
 
+EMAIL_PATTERN = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+(\.\w+)*$") # email format, requires a @ not at the beginning or end, requires a domain. No checks on the existance of the domain.
+
+# Normalization of phone/email input, shared by Contact and the bulk import of ContactBook.add_contacts
+def normalize_phone(phone) -> dict[str, list[str]]:
+    """
+    Return phone input (a number, a list of numbers or a dict of labelled numbers) as a dict of labelled lists.
+    Numbers that are not numeric are stored as 'error'. A dict is normalized in place.
+    """
+    if isinstance(phone, (str,int)):
+        return {"other": [str(phone) if str(phone).isdigit() else "error"]}
+    elif isinstance(phone, list):
+        return {"other": [str(x) if str(x).isdigit() else "error" for x in phone]}
+    elif isinstance(phone, dict):
+        for label, numbers in phone.items():
+            phone[label] = [str(n) if str(n).isdigit() else "error" for n in (numbers if isinstance(numbers, list) else [numbers])]
+        return phone
+    raise TypeError("Invalid type for phone number.")
+
+def normalize_email(email) -> dict[str, list[str]]:
+    """
+    Return email input (an email, a list of emails or a dict of labelled emails) as a dict of labelled lists.
+    Emails that do not match EMAIL_PATTERN are stored as 'error'. A dict is normalized in place.
+    """
+    match = EMAIL_PATTERN.match
+    if isinstance(email, str):
+        return {"other": [email if match(email) else 'error']}
+    elif isinstance(email,list):
+        return {"other": [str(e) if match(e) else 'error' for e in email]}
+    elif isinstance(email, dict):
+        for label, emails in email.items():
+            email[label] = [str(e) if match(e) else 'error' for e in (emails if isinstance(emails, list) else [emails])]
+        return email
+    raise TypeError("Invalid type for email.")
+
+def check_entry(entry) -> dict:
+    """
+    Check the types that Contact.from_dict rejects in a raw contact dict, without normalizing it, and return it.
+    Lets a lazy load fail on a bad entry like an eager load does. The items of phone and email lists are not checked.
+    """
+    if not isinstance(entry, dict):
+        raise TypeError("Invalid contact entry, expected an object.")
+    if not (isinstance(entry.get("name", ""), str) and isinstance(entry.get("surname", ""), str)):
+        raise TypeError("Invalide type for name and surname.")
+    if not isinstance(entry.get("phone", {}), (str, int, list, dict)):
+        raise TypeError("Invalid type for phone number.")
+    if not isinstance(entry.get("email", {}), (str, list, dict)):
+        raise TypeError("Invalid type for email.")
+    return entry
+
 @dataclass
 class Contact:
     """
@@ -36,7 +86,7 @@ class Contact:
     address: str = ""
     id: Optional[int] = field(default=None, init=False, compare=False)
 
-    EMAIL_REGEX = r"^[\w\.-]+@[\w\.-]+\.\w+(\.\w+)*$" # regex for email format, requires a @ not at the beginning or end, requires a domain. No checks on the existance of the domain.
+    EMAIL_REGEX = EMAIL_PATTERN.pattern
 
     def __post_init__(self):
         # Normalize name and surname
@@ -46,58 +96,85 @@ class Contact:
         else:
             raise TypeError("Invalide type for name and surname.")
 
-        # Normalize phone input
-        if isinstance(self.phone, (str,int)):
-            self.phone = {"other": [str(self.phone) if str(self.phone).isdigit() else "error"]}
-        elif isinstance(self.phone, list):
-            self.phone = {"other": [str(x) if str(x).isdigit() else "error" for x in self.phone]}
-        elif isinstance(self.phone, dict):
-            for label, numbers in self.phone.items():
-                self.phone[label] = [str(n) if str(n).isdigit() else "error" for n in (numbers if isinstance(numbers, list) else [numbers])]
-        else:
-            raise TypeError("Invalid type for phone number.") # do I want to raise an error or just a warning?
-        if any(x=="error" for x_l in self.phone.values() for x in x_l):
-            print("Some phone numbers were not numeric and could not be loaded. They have been stored as 'error'.\nThese can be found using the search function and searching for the value 'error'.")
-
-        # Normalize email input
-        if isinstance(self.email, str):
-            self.email = {"other": [self.email if re.match(self.EMAIL_REGEX,self.email) else 'error']}
-        elif isinstance(self.email,list):
-            self.email = {"other": [str(e) if re.match(self.EMAIL_REGEX,e) else 'error' for e in self.email]}
-        elif isinstance(self.email, dict):
-            for label, emails in self.email.items():
-                self.email[label] = [str(e) if re.match(self.EMAIL_REGEX,e) else 'error' for e in (emails if isinstance(emails, list) else [emails])]
-        else:
-            raise TypeError("Invalid type for email.")
-        if any(x=="error" for x_l in self.email.values() for x in x_l):
-            print("Some emails did not respect the email format (text_or_puntuation@text.text-optional.text) and could not be loaded. They have been stored as 'error'.\nThese can be found using the search function and searching for the value 'error'.")
+        # Normalize phone and email input. Invalid values are stored as 'error', without warnings:
+        # books collect them in a ValidationReport, see src/validation.py
+        self.phone = normalize_phone(self.phone)
+        self.email = normalize_email(self.email)
+
+    @classmethod
+    def from_normalized(cls, name: str, surname: str, phone: dict, email: dict, address: str = "", id: int = None) -> 'Contact':
+        """
+        Build a contact from values that are already normalized (e.g. read back from storage), skipping __post_init__.
+        """
+        contact = cls.__new__(cls)
+        contact.name = name
+        contact.surname = surname
+        contact.phone = phone
+        contact.email = email
+        contact.address = address
+        contact.id = id
+        return contact
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> 'Contact':
+        """
+        Build a contact from a raw dict (as read from a file, or the output of to_dict), normalized like __post_init__
+        without building the dataclass. The 'id' key is ignored.
+        """
+        name, surname = entry.get("name", ""), entry.get("surname", "")
+        if not (isinstance(name, str) and isinstance(surname, str)):
+            raise TypeError("Invalide type for name and surname.")
+        return cls.from_normalized(name.capitalize(), surname.capitalize(), normalize_phone(entry.get("phone", {})),
+                                   normalize_email(entry.get("email", {})), entry.get("address", ""))
 
     def name_eq(self,other):
         return self.name==other.name and self.surname==other.surname
+
+    def to_dict(self) -> dict:
+        """Returns the contact as a JSON serializable dict."""
+        return {'name': self.name, 'surname': self.surname, 'phone': self.phone, 'email': self.email,
+                'address': self.address, 'id': self.id}
     
-    def display(self):
-        """Prints a readable representation of the contact."""
-        print(f"\n[{self.id}] - {self.name} {self.surname}")
+    def format(self) -> str:
+        """Returns a readable representation of the contact, as printed by display."""
+        lines = [f"\n[{self.id}] - {self.name} {self.surname}"]
         for label, numbers in self.phone.items():
             if numbers:
-                print(f"  {label.title()} Phones: {', '.join(numbers)}")
+                lines.append(f"  {label.title()} Phones: {', '.join(numbers)}")
         for label, emails in self.email.items():
             if emails:
-                print(f"  {label.title()} Emails: {', '.join(emails)}")
+                lines.append(f"  {label.title()} Emails: {', '.join(emails)}")
         if self.address:
-            print(f"  Address: {self.address}")
-        print("-" * 40)
+            lines.append(f"  Address: {self.address}")
+        lines.append("-" * 40)
+        return '\n'.join(lines)
+
+    def display(self):
+        """Prints a readable representation of the contact."""
+        print(self.format())
 
-    def one_field_match(self, field_name: str, search_value: str, label: str = None) -> bool:
+    def one_field_match(self, field_name: str, search_value: str, label: str = None, mode: str = 'exact') -> bool:
         """
         Checks if a value matches in a given field.
         Supports optional labels for phone/email fields.
+        Phone numbers can also be matched by 'prefix' or 'suffix' (e.g. area code or last digits).
         """
         if not hasattr(self, field_name):
             raise ValueError("Invalid field.")
 
         field_value = getattr(self, field_name)
 
+        if mode != 'exact':
+            if field_name != 'phone' or mode not in ('prefix', 'suffix'):
+                raise ValueError("Invalid match mode. Use 'exact', or 'prefix'/'suffix' for phone numbers.")
+            search_value = str(search_value)
+            if not search_value.isdigit():
+                return False
+            numbers = field_value.get(label, []) if label else [n for values in field_value.values() for n in values]
+            if mode == 'prefix':
+                return any(n.isdigit() and n.startswith(search_value) for n in numbers)
+            return any(n.isdigit() and n.endswith(search_value) for n in numbers)
+
         if isinstance(field_value, dict):
             if label:
                 return search_value in field_value.get(label, [])
@@ -112,24 +189,18 @@ class Contact:
     def matches(self, how='all', *args) -> bool:
         """
         Checks if the contact matches multiple criteria.
-        Each arg must be a tuple of 2 or 3 elements: (field, value[, label])
+        Each arg must be a tuple of 2 to 4 elements: (field, value[, label[, mode]])
         Modes:
             - 'all': All criteria must match
             - 'any': At least one must match
         """
-        if any(len(arg)<2 or len(arg)>3 for arg in args):
-          raise ValueError("Invalid length fo matching criteria. Provide filed name and value, optional label.")
+        if any(len(arg)<2 or len(arg)>4 for arg in args):
+          raise ValueError("Invalid length fo matching criteria. Provide filed name and value, optional label and match mode.")
 
         if how == 'all':
-            return all(
-                self.one_field_match(*arg) if len(arg) == 2 else self.one_field_match(*arg[:2], label=arg[2])
-                for arg in args
-            )
+            return all(self.one_field_match(*arg) for arg in args)
         elif how == 'any':
-            return any(
-                self.one_field_match(*arg) if len(arg) == 2 else self.one_field_match(*arg[:2], label=arg[2])
-                for arg in args
-            )
+            return any(self.one_field_match(*arg) for arg in args)
         else:
             raise ValueError("Invalid match mode. Use 'all' or 'any'.")
 
@@ -149,7 +220,7 @@ class Contact:
               return False
 
         elif field_name == 'email':
-            if not re.match(self.EMAIL_REGEX,new_value):
+            if not EMAIL_PATTERN.match(new_value):
               print("Invalid email format. Operation aborted.")
               return False
             if label not in ['other','personal', 'work']:
@@ -165,10 +236,12 @@ class Contact:
        
             if mode == 'replace':
                 target_dict[label] = [str(new_value)] if isinstance(new_value, (str,int)) else [str(v) for v in new_value] # does this read lists? will it transform lists into strings?
+                setattr(self, field_name, target_dict) # store it back for contacts that do not keep the dict itself (CompactContact)
                 return True
             elif mode == 'add':
                 target_dict.setdefault(label, [])
                 target_dict[label].extend([str(new_value)] if isinstance(new_value, (str,int)) else [str(v) for v in new_value])
+                setattr(self, field_name, target_dict)
                 return True
 
         else:
@@ -190,3 +263,93 @@ class Contact:
                 mode=update_item.get('mode', 'replace')
             ))
         return any(res)
+
+
+def _compact_labels(values: dict) -> tuple:
+    """
+    Pack a label -> list dict into a tuple of (label, tuple) pairs, dropping empty labels and interning the label strings.
+    """
+    return tuple((sys.intern(label), tuple(items)) for label, items in values.items() if items)
+
+class CompactContact:
+    """
+    A memory-compact, slotted representation of a Contact, for large books.
+    Phone numbers and emails are stored as tuples of (label, numbers) pairs without the empty labels,
+    and are exposed through the same phone/email dict attributes as Contact.
+    Build one from a Contact with CompactContact.from_contact, or from the same arguments as Contact.
+    """
+    __slots__ = ('name', 'surname', 'address', 'id', '_phone', '_email')
+
+    EMAIL_REGEX = Contact.EMAIL_REGEX
+
+    def __init__(self, name: str, surname: str, phone=None, email=None, address: str = ""):
+        contact = Contact(name, surname, phone if phone is not None else {}, email if email is not None else {}, address)
+        self.name = contact.name
+        self.surname = contact.surname
+        self.phone = contact.phone
+        self.email = contact.email
+        self.address = contact.address
+        self.id = None
+
+    @classmethod
+    def from_contact(cls, contact: Contact) -> 'CompactContact':
+        """
+        Build a compact copy of an already normalized contact, keeping its ID.
+        """
+        compact = cls.__new__(cls)
+        compact.name = contact.name
+        compact.surname = contact.surname
+        compact.phone = contact.phone
+        compact.email = contact.email
+        compact.address = contact.address
+        compact.id = contact.id
+        return compact
+
+    def to_contact(self) -> Contact:
+        """
+        Return a regular Contact with the same content and ID.
+        """
+        contact = Contact(self.name, self.surname, self.phone, self.email, self.address)
+        contact.id = self.id
+        return contact
+
+    @property
+    def phone(self) -> dict[str, list[str]]:
+        return {label: list(numbers) for label, numbers in self._phone}
+
+    @phone.setter
+    def phone(self, value: dict[str, list[str]]):
+        self._phone = _compact_labels(value)
+
+    @property
+    def email(self) -> dict[str, list[str]]:
+        return {label: list(emails) for label, emails in self._email}
+
+    @email.setter
+    def email(self, value: dict[str, list[str]]):
+        self._email = _compact_labels(value)
+
+    def __repr__(self):
+        return (f"CompactContact(name={self.name!r}, surname={self.surname!r}, phone={self.phone!r}, "
+                f"email={self.email!r}, address={self.address!r})")
+
+    def __eq__(self, other):
+        """
+        Compares the content of the contacts, ignoring empty labels. Also compares with a regular Contact.
+        """
+        if not isinstance(other, (Contact, CompactContact)):
+            return NotImplemented
+        return (self.name == other.name and self.surname == other.surname and self.address == other.address
+                and self._phone == _compact_labels(other.phone) and self._email == _compact_labels(other.email))
+
+    __hash__ = None
+
+    # Same behavior as Contact, working on the phone/email properties.
+    name_eq = Contact.name_eq
+    to_dict = Contact.to_dict
+    format = Contact.format
+    display = Contact.display
+    one_field_match = Contact.one_field_match
+    matches = Contact.matches
+    update_one = Contact.update_one
+    update_multiple = Contact.update_multiple
@@ -1,219 +1,993 @@
+import gc
 import json
-import csv
-from src.contact import Contact  # adjust import path as needed
+import os
+from bisect import bisect_right
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from src.book_diff import BookDiff, content_counts, diff_books
+from src.compression import from_extension, is_compressed, open_read, open_write
+from src.contact import Contact, CompactContact, check_entry  # adjust import path as needed
+from src.contact_index import ContactIndex, fingerprint, name_key
+from src.csv_stream import iter_csv_contacts, write_csv_contacts
+from src.json_stream import (iter_json_contacts, iter_ndjson_contacts, iter_ndjson_lines, last_ndjson_record, split_ndjson,
+                              write_json_contacts, write_ndjson_contacts)
+from src.query import Query, QueryCache
+from src.vcard import iter_vcard_contacts, write_vcard_contacts
+from src.validation import ValidationReport
+
+@contextmanager
+def _gc_paused():
+    """
+    Pause the garbage collector while building many acyclic objects (a bulk import), collecting would only rescan them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _normalize_chunk(entries: list[dict]) -> list[tuple]:
+    """
+    Normalize a chunk of raw contact entries, in a worker process of load_from_json(workers=...).
+    Returns one (name, surname, phone, email, address, id in the file) tuple per entry, in order.
+    """
+    results = []
+    for entry in entries:
+        c = Contact.from_dict(entry)
+        results.append((c.name, c.surname, c.phone, c.email, c.address, entry.get("id")))
+    return results
+
+def _normalize_ndjson_range(file_path: str, start: int, stop: int) -> list[tuple]:
+    """
+    Parse and normalize the NDJSON lines in a byte range of a file, in a worker process of load_from_ndjson(workers=...).
+    """
+    with open(file_path, 'rb') as f:
+        return _normalize_chunk(list(iter_ndjson_contacts(f, start, stop)))
 
 class ContactBook:
     """
     A class to store and manage multiple Contact objects.
+    With compact=True, contacts are stored as CompactContact to reduce memory on large books.
     """
+    LOAD_CHUNK_SIZE = 5000 # contacts per chunk sent to a worker process by load_from_json(workers=...)
+    LOAD_CHUNK_BYTES = 4 << 20 # bytes per range parsed by a worker process in load_from_ndjson(workers=...)
+    LAZY_LOAD = True # whether load_from_json/load_from_ndjson(lazy=True) can keep raw records, see _hydrate
 
-    def __init__(self):
-        self.contacts: list[Contact] = []
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self._contacts: dict[int, Contact] = {}  # id -> contact, kept in id order
+        self._index = ContactIndex()
+        self._unhydrated: int = 0  # raw records left by a lazy load in _contacts, see _hydrate
+        self._indexed: bool = True  # False from a lazy load until the index is needed, see _ensure_index
         self.next_id: int = 1
         self.modified: bool = False  # Track unsaved changes
+        self.journal_path: str | None = None  # changes are appended to this file when set, see attach_journal
+        self.validation = ValidationReport()  # invalid values found by the last load_from_json or add_contacts
+        self.generation: int = 0  # bumped by every change to the stored contacts
+        self._scan_snapshot = None  # (generation, path, finalizer) of the snapshot read by parallel scans
+        self.cache = QueryCache()  # search results, see search_contacts
 
     def __repr__(self):
-        return f"<ContactBook: {len(self.contacts)} contacts>"
+        return f"<{type(self).__name__}: {self.count_contacts()} contacts>"
 
     def __str__(self):
-        return f"ContactBook with {len(self.contacts)} contacts"
+        return f"ContactBook with {self.count_contacts()} contacts"
+
+    def __eq__(self, other):
+        """
+        Books are equal when they hold the same contacts, whatever their IDs and order (see book_diff.content_counts).
+        """
+        if not isinstance(other, ContactBook):
+            return NotImplemented
+        if self.count_contacts() != other.count_contacts():
+            return False
+        with _gc_paused():
+            return content_counts(self) == content_counts(other)
+
+    def diff(self, other: 'ContactBook') -> BookDiff:
+        """
+        Return the contacts added, removed and changed from this book to other, matched by ID, in linear time.
+        Works across storages, e.g. to compare a SqliteContactBook with the JSON book it was built from.
+        """
+        with _gc_paused():
+            return diff_books(self, other)
+
+    @property
+    def contacts(self) -> list[Contact]:
+        """
+        The contacts of the book, in ID order.
+        Returns a new list: use add_contact/remove_contact to modify the book.
+        """
+        return list(self._iter_contacts())
+
+    @contacts.setter
+    def contacts(self, contacts: list[Contact]):
+        self.generation += 1
+        self._contacts = {}
+        self._index = ContactIndex()
+        self._unhydrated, self._indexed = 0, True
+        for contact in contacts:
+            if contact.id is None:
+                contact.id = self.next_id
+            self._put(contact)
+
+    def _put(self, contact: Contact):
+        """
+        Store a contact under its ID, replacing the contact with the same ID if any.
+        """
+        if self.compact and isinstance(contact, Contact):
+            contact = CompactContact.from_contact(contact)
+        old = self._contacts.get(contact.id)
+        if old is not None:
+            if self._indexed:
+                self._index.remove(old)
+            elif isinstance(old, (dict, bytes)):
+                self._unhydrated -= 1
+        self.generation += 1
+        self._contacts[contact.id] = contact
+        if self._indexed:
+            self._index.add(contact)
+        self.next_id = max(self.next_id, contact.id + 1)
+
+    def _put_many(self, contacts: list[Contact]):
+        """
+        Store a batch of new contacts, under IDs above those of the book, and index them all at once.
+        """
+        if self.compact:
+            contacts = [CompactContact.from_contact(c) if isinstance(c, Contact) else c for c in contacts]
+        self.generation += 1
+        self._contacts.update((c.id, c) for c in contacts)
+        if self._indexed:
+            self._index.add_many(contacts)
+        if contacts:
+            self.next_id = max(self.next_id, contacts[-1].id + 1)
+
+    def _insert(self, contact: Contact):
+        """
+        Assign the next ID to a contact and store it in the book.
+        """
+        contact.id = self.next_id
+        self._put(contact)
+
+    def _holds(self, contact: Contact) -> bool:
+        """
+        Whether the book holds this contact, under its ID.
+        """
+        return self._contact(contact.id) == contact
+
+    def _discard(self, id: int) -> Contact | None:
+        """
+        Drop the contact with the given ID from the storage. Returns it, or None if there is none.
+        A record left raw by a lazy load is returned as it is.
+        """
+        contact = self._contacts.pop(id, None)
+        if contact is not None:
+            self.generation += 1
+            if self._indexed:
+                self._index.remove(contact)
+            elif isinstance(contact, (dict, bytes)):
+                self._unhydrated -= 1
+        return contact
+
+    def _contact(self, id: int) -> Contact | None:
+        """
+        Return the contact with the given ID, or None, hydrating it if a lazy load left it raw
+        (None too if the record cannot be converted, see _hydrate).
+        """
+        contact = self._contacts.get(id)
+        if isinstance(contact, (dict, bytes)):
+            return self._hydrate(id, contact)
+        return contact
+
+    def _iter_contacts(self):
+        """
+        Iterate over the contacts in ID order, hydrating the raw records of a lazy load as they are reached.
+        """
+        if not self._unhydrated:
+            return iter(self._contacts.values())
+        # over a copy of the IDs: an unreadable record is removed on the way
+        return (c for c in map(self._contact, list(self._contacts)) if c is not None)
+
+    def _hydrate(self, id: int, record) -> Contact | None:
+        """
+        Normalize a raw record kept by a lazy load (an entry of the JSON file, or an undecoded NDJSON line),
+        store the contact in its place and check it into self.validation.
+        A record that cannot be converted (an NDJSON line that is not valid JSON, or a value of the wrong type
+        that the load could not check, see check_entry) is removed from the book and recorded in
+        self.validation.dropped: returns None.
+        """
+        try:
+            contact = self._from_raw(id, record)
+        except (TypeError, ValueError, AttributeError) as e: # json.JSONDecodeError is a ValueError
+            del self._contacts[id]
+            self.generation += 1
+            self._unhydrated -= 1
+            self.validation.drop(id, e)
+            if not self._unhydrated:
+                self._ensure_index()
+            return None
+        if self.compact:
+            contact = CompactContact.from_contact(contact)
+        self._contacts[id] = contact # same key, the ID order is kept
+        self._unhydrated -= 1
+        self.validation.check(contact)
+        if not self._unhydrated:
+            self._ensure_index()
+        return contact
+
+    @staticmethod
+    def _from_raw(id: int, record) -> Contact:
+        contact = Contact.from_dict(json.loads(record) if isinstance(record, bytes) else record)
+        contact.id = id
+        return contact
+
+    def _store_raw(self, records):
+        """
+        Store (ID or None, raw record) pairs as they are, for a lazy load: see _hydrate. Records without an ID get the next one.
+        The index is dropped, it is built again when a search needs it (see _ensure_index).
+        """
+        self._indexed = False
+        self._index = ContactIndex()
+        self.generation += 1
+        contacts = self._contacts
+        for id, record in records:
+            if id is None:
+                id = self.next_id
+            elif id in contacts:
+                self._discard(id)
+            contacts[id] = record
+            self._unhydrated += 1
+            if id >= self.next_id:
+                self.next_id = id + 1
 
-    def __eq__(self,other):
-        return all(c in self.contacts for c in other.contacts) and (c in other.contacts for c in self.contacts)
+    def _ensure_index(self):
+        """
+        Build the index after a lazy load, hydrating all the contacts. This is done by the first search with criteria,
+        duplicate check or fuzzy search, or once the last raw record is hydrated: until then, pages and reads by ID
+        only hydrate the contacts they return.
+        """
+        if not self._indexed:
+            self._indexed = True # set first: hydrating the last raw record below calls this again
+            try:
+                with _gc_paused():
+                    contacts = list(self._iter_contacts())
+                    self._index = ContactIndex()
+                    self._index.add_many(contacts)
+            except BaseException:
+                self._indexed = False
+                raise
 
     def count_contacts(self) -> int:
         """
         Return and print the total number of contacts.
         """
-        return len(self.contacts)
+        return len(self._contacts)
 
     def add_contact(self, contact: Contact):
         """
         Add a contact to the book and assign it a unique ID.
         """
-        if isinstance(contact,Contact):
-          contact.id = self.next_id
-          self.contacts.append(contact)
-          self.next_id += 1
+        if isinstance(contact,(Contact,CompactContact)):
+          self._insert(contact)
           self.modified = True
+          self._log('add', contact)
         else:
           print("The object is not a contact. Contact not added.")
 
-    def search_contacts(self, how='all', show='all', *criteria) -> list[Contact] | bool:
+    def add_contacts(self, contacts, echo: int = 0, every: int = 1) -> int:
+        """
+        Add many contacts at once, from Contact objects or raw dicts (with the keys of Contact.to_dict, 'id' is ignored).
+        Dicts are normalized without building a dataclass. The invalid values are collected in self.validation,
+        and summarized once at the end: echo > 0 also prints the first echo of them as they are found,
+        every > 1 only one in every `every` of them, a sample of a large batch (see ValidationReport).
+        The contacts get a contiguous block of IDs and are indexed together at the end, with the garbage collector paused,
+        which is several times faster than add_contact in a loop. Nothing is added if a dict cannot be converted (TypeError).
+        Returns the number of contacts added.
+        """
+        report = ValidationReport(echo, every)
+        added = self._add_batch(contacts, report)
+        if added:
+            self.modified = True
+            self.validation = report
+            if report:
+                print(report.summary())
+        return added
+
+    def _add_batch(self, contacts, report: ValidationReport) -> int:
+        """
+        Normalize, validate into report, store and journal a batch of new contacts, see add_contacts.
+        """
+        batch = []
+        next_id = self.next_id
+        with _gc_paused():
+            for item in contacts:
+                if isinstance(item, dict):
+                    item = Contact.from_dict(item)
+                elif not isinstance(item, (Contact, CompactContact)):
+                    print("The object is not a contact. Contact not added.")
+                    continue
+                item.id = next_id
+                next_id += 1
+                report.check(item)
+                batch.append(item)
+            if not batch:
+                return 0
+            self._put_many(batch)
+
+        if self.journal_path is not None:
+            with open(self.journal_path, 'a') as f:
+                f.writelines(json.dumps({"op": 'add', "contact": c.to_dict()}, separators=(',', ':')) + '\n' for c in batch)
+        return len(batch)
+
+    def search_contacts(self, how='all', show='all', *criteria, workers: int = 0) -> list[Contact] | bool:
         """
         Return a list of contacts matching the given criteria.
         Does not display results — for CLI to handle.
+        The criteria are compiled once into a query plan (see src/query.py and explain): criteria on name, surname,
+        phone and email are answered by the index, the others are tested on the candidates or in a scan of the book.
+        Phone criteria accept a 'prefix' or 'suffix' match mode as 4th element, e.g. ('phone', '1234', None, 'suffix').
+        With workers > 1, a scan is split between that many processes (see src/parallel_scan.py): worth it for
+        large books only, as the first parallel scan after a change writes a snapshot of the book.
+        Results are cached (see self.cache) until the book changes.
         """
-        if show == 'first':
-          for c in self.contacts:
-            if c.matches(how, *criteria):
-              return [c]
-          return []
-        elif show == 'all':
-          return [c for c in self.contacts if c.matches(how, *criteria)]
-        else:
+        if show not in ('first', 'all'):
           print("Invalid input. Show can be 'all' or 'first'.")
           return False
 
+        key = self.cache.key(how, show, criteria)
+        ids = self.cache.get(key, self.generation)
+        if ids is None:
+          ids = self._search_ids(how, show, criteria, workers)
+          self.cache.put(key, self.generation, ids)
+        return self._get_many(ids)
+
+    def _search_ids(self, how, show, criteria, workers: int = 0) -> list[int]:
+        """
+        Return the IDs of the contacts matching the criteria (all of them, or the first one), in ID order.
+        """
+        query = self._query(how, criteria)
+        if not query.uses_index and workers > 1 and self._contacts:
+          from src.parallel_scan import scan # imported here, parallel_scan depends on this module
+          return scan(self, how, show, criteria, workers)
+        ids = self._matching_ids(query)
+        return list(islice(ids, 1)) if show == 'first' else list(ids)
+
+    def _matching_ids(self, query: Query, after: int = None):
+        """
+        Lazily yield the IDs of the contacts matching a compiled query, in ID order, from the first ID above after.
+        """
+        if query.uses_index:
+          ids = query.candidates()
+          if after is not None:
+            ids = ids[bisect_right(ids, after):]
+          if query.residual is None:
+            return iter(ids)
+          return (i for i in ids if query.residual(self._contacts[i]))
+        if not query.terms and query.how == 'all': # every contact matches, none needs to be read (or hydrated)
+          if after is None:
+            return iter(self._contacts)
+          return (i for i in range(after + 1, self.next_id) if i in self._contacts)
+        if after is None:
+          contacts = self._iter_contacts()
+        else:
+          contacts = (c for c in map(self._contact, range(after + 1, self.next_id)) if c is not None)
+        return (c.id for c in filter(query.predicate, contacts))
+
+    def _iter_search_ids(self, how, criteria, after: int = None):
+        """
+        Validate the criteria, and return an iterator over the IDs of the matching contacts above after, in ID order.
+        """
+        return self._matching_ids(self._query(how, criteria), after)
+
+    def _query(self, how, criteria) -> Query:
+        """
+        Compile criteria against the index, building it first if a lazy load left it out (see _ensure_index).
+        """
+        if criteria:
+            self._ensure_index()
+        return Query(how, criteria, self._index, len(self._contacts))
+
+    def iter_search(self, how='all', *criteria, limit: int = None, offset: int = 0, after: int = None):
+        """
+        Return an iterator over the contacts matching the criteria, in ID order, evaluated lazily:
+        only the contacts needed for the next result are tested, so a caller can stop at any time.
+        offset skips the first matches and limit caps the number returned. after is a cursor: pass the ID of the
+        last contact received to continue a search where it stopped, e.g. after a change to the book, which must not
+        be modified while iterating. Criteria are validated immediately.
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+          raise ValueError("offset and limit must not be negative.")
+        ids = islice(self._iter_search_ids(how, criteria, after), offset, None if limit is None else offset + limit)
+        return (contact for id in ids for contact in self._get_many((id,)))
+
+    def _get_many(self, ids) -> list[Contact]:
+        """
+        Return the contacts with the given IDs, in the same order.
+        """
+        if self._unhydrated:
+            return [c for c in map(self._contact, ids) if c is not None]
+        return [self._contacts[i] for i in ids]
+
+    def explain(self, how='all', *criteria) -> str:
+        """
+        Describe how search_contacts would run the given criteria.
+        """
+        return self._query(how, criteria).explain()
+
+    def fuzzy_search(self, value: str, field: str = None, k: int = 10, min_score: float = 0.3) -> list[tuple[Contact, float]]:
+        """
+        Return up to k (contact, score) pairs whose name or surname is similar to value, best match first.
+        Tolerates typos (e.g. 'Smtih' finds 'Smith'). Scores go from 0 to 1, 1 being an exact match.
+        field can restrict the search to 'name' or 'surname'.
+        """
+        if field not in (None, 'name', 'surname'):
+            raise ValueError("Invalid field. Fuzzy search supports 'name' and 'surname'.")
+        fields = (field,) if field else ('name', 'surname')
+        self._ensure_index()
+        return [(self._contacts[id], score) for id, score in self._index.trigrams.search(value, fields, k, min_score)]
+
+    def same_content(self, contact: Contact) -> list[Contact]:
+        """
+        Return the contacts of the book holding the same values as contact (see contact_index.fingerprint), in ID order.
+        Answered by the index in constant time, e.g. to warn about a duplicate before adding a contact.
+        """
+        return self._get_many(self._same_content_ids(contact))
+
+    def same_name(self, contact: Contact) -> list[Contact]:
+        """
+        Return the contacts of the book with the same name and surname as contact, ignoring case, in ID order.
+        """
+        return self._get_many(self._same_name_ids(contact))
+
+    def _same_content_ids(self, contact: Contact) -> list[int]:
+        self._ensure_index()
+        return sorted(self._index.fingerprints.get(fingerprint(contact), ()))
+
+    def _same_name_ids(self, contact: Contact) -> list[int]:
+        self._ensure_index()
+        return sorted(self._index.names.get(name_key(contact), ()))
+
+    DUPLICATE_KEYS = ('name', 'phone', 'email')
+
+    def find_duplicates(self, keys=DUPLICATE_KEYS) -> list[list[int]]:
+        """
+        Return the groups of contacts that may be duplicates: contacts sharing a blocking key, directly or through
+        other contacts of the group. The keys are the name and surname ignoring case ('name'), a phone number ('phone')
+        and an email ignoring case ('email'); values stored as 'error' and an empty name and surname are not keys.
+        The contacts are read once and grouped with a union-find, instead of comparing all the pairs.
+        Returns the sorted IDs of each group of 2 contacts or more, groups ordered by their first ID (see merge_contacts).
+        """
+        if any(key not in self.DUPLICATE_KEYS for key in keys):
+            raise ValueError("Invalid key. Use 'name', 'phone' or 'email'.")
+        parent: dict[int, int] = {}
+
+        def root(id: int) -> int:
+            while parent[id] != id:
+                parent[id] = id = parent[parent[id]]
+            return id
+
+        first: dict[tuple, int] = {}  # blocking key -> ID of the first contact holding it
+        for record in self._iter_records():
+            id = parent[record["id"]] = record["id"]
+            for key in self._blocking_keys(record, keys):
+                other = first.setdefault(key, id)
+                if other != id:
+                    a, b = root(other), root(id)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b) # the root of a group is its lowest ID
+        groups = defaultdict(list)
+        for id in parent:
+            groups[root(id)].append(id)
+        return [ids for ids in groups.values() if len(ids) > 1]
+
+    @staticmethod
+    def _blocking_keys(record: dict, keys) -> set[tuple]:
+        found = set()
+        if 'name' in keys and (record["name"] or record["surname"]):
+            found.add(('name', str(record["name"]).lower(), str(record["surname"]).lower()))
+        if 'phone' in keys:
+            found.update(('phone', n) for numbers in record["phone"].values() for n in numbers if n != 'error')
+        if 'email' in keys:
+            found.update(('email', e.lower()) for emails in record["email"].values() for e in emails if e != 'error')
+        return found
+
+    def merge_contacts(self, ids) -> Contact | bool:
+        """
+        Merge the contacts with the given IDs (e.g. a group returned by find_duplicates) into the one with the lowest ID,
+        which keeps its name, and remove the others. Phone numbers and emails are gathered under their labels without
+        repeats, the address is the first one that is not empty.
+        Returns the merged contact, or False if an ID is not in the book.
+        """
+        ids = sorted(set(ids))
+        contacts = [self.get_contact_by_id(id) for id in ids]
+        if not contacts or not all(contacts):
+            print("Contact not found in the book.")
+            return False
+        phone, email = {}, {}
+        for contact in contacts:
+            for merged, values in ((phone, contact.phone), (email, contact.email)):
+                for label, items in values.items():
+                    target = merged.setdefault(label, [])
+                    for item in items:
+                        if item not in target:
+                            target.append(item)
+        kept = contacts[0]
+        address = next((c.address for c in contacts if c.address), "")
+        contact = Contact.from_normalized(kept.name, kept.surname, phone, email, address, kept.id)
+        for id in ids[1:]:
+            self._discard(id)
+            self._log('remove', id=id)
+        self._put(contact)
+        self._log('update', contact)
+        self.modified = True
+        return contact
+
     def remove_contact(self, contact: Contact): # check integration with CLI (search contact first)
         """
         Remove a contact from the book.
         """
-        if isinstance(contact,Contact):
-            if contact in self.contacts:
-                self.contacts.remove(contact)
-                self.modified = True
+        if isinstance(contact,(Contact,CompactContact)):
+            if self._holds(contact):
+                self.remove_by_id(contact.id)
             else:
                 print("Contact not found in the book.")
         else:
             print("The object is not a contact. Contact not removed.")
 
+    def remove_by_id(self, id: int) -> Contact | bool:
+        """
+        Remove the contact with the given ID from the book.
+        Returns the removed contact, or False if no contact has this ID.
+        """
+        if isinstance(self._contacts.get(id), (dict, bytes)): # never read since a lazy load
+            self._contact(id) # an unreadable record is dropped here, and not found below
+        contact = self._discard(id)
+        if contact is None:
+            print("Contact not found in the book.")
+            return False
+        self.modified = True
+        self._log('remove', id=id)
+        return contact
+
     def update_contact(self, contact: Contact, updates: list[dict]): # check integration with CLI (search contact first)
         """
         Update a given contact with one or more fields.
         """
+        stored = self._contact(contact.id)
+        if self.compact and stored is not contact and stored == contact:
+            contact = stored # the book keeps a compact copy of the contacts added to it
+        held = stored is contact
+        if held and self._indexed:
+            self._index.remove(contact)
         try:
             res = contact.update_multiple(updates)
             if res: #if aborted, returns False; else True
                 self.modified = True
         except Exception as e:
             print(f"Update failed. Exception: {e}")
+        finally:
+            if held:
+                self.generation += 1
+                if self._indexed:
+                    self._index.add(contact)
+                self._log('update', contact)
+
+    def _log(self, op: str, contact: Contact = None, id: int = None):
+        """
+        Append a change record to the journal, if one is attached.
+        """
+        if self.journal_path is None:
+            return
+        record = {"op": op, "id": id} if op == 'remove' else {"op": op, "contact": contact.to_dict()}
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
 
-    def save_to_json(self, file_path: str): 
+    def attach_journal(self, journal_path: str) -> int:
+        """
+        Replay the change records of a journal onto the book, then append every later change
+        (add_contact, update_contact, remove_contact) to it as a single line.
+        The book must hold the snapshot the journal belongs to, loaded with its IDs: see load_from_json(journal=...).
+        A record left incomplete by a crash at the end of the journal is dropped.
+        Returns the number of records replayed.
+        """
+        replayed = 0
+        if os.path.exists(journal_path):
+            end = 0
+            with open(journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self._replay(record)
+                    end += len(line)
+                    replayed += 1
+            if end < os.path.getsize(journal_path):
+                os.truncate(journal_path, end)
+            elif end and not line.endswith(b'\n'):
+                with open(journal_path, 'a') as f:
+                    f.write('\n')
+        self.journal_path = journal_path
+        return replayed
+
+    def _replay(self, record: dict):
+        if record["op"] == 'remove':
+            self._discard(record["id"])
+        else:
+            entry = record["contact"]
+            self._put(Contact.from_normalized(entry["name"], entry["surname"], entry["phone"], entry["email"],
+                                              entry["address"], entry["id"]))
+
+    def compact_journal(self, snapshot_path: str, compact: bool = False, compression: str = 'auto', level: int = None) -> bool:
+        """
+        Fold the journal into a fresh snapshot of the book at snapshot_path, then empty the journal.
+        The snapshot is written to a temporary file first, so a failure leaves the old snapshot and journal untouched.
+        compression and level are those of save_to_json, 'auto' following the extension of snapshot_path (not of the temporary file).
+        """
+        if self.journal_path is None:
+            print("No journal attached to the book.")
+            return False
+        if compression == 'auto':
+            compression = from_extension(snapshot_path)
+        tmp_path = snapshot_path + '.tmp'
+        if not self.save_to_json(tmp_path, compact=compact, compression=compression, level=level):
+            return False
+        os.replace(tmp_path, snapshot_path)
+        open(self.journal_path, 'w').close()
+        return True
+
+    def _iter_records(self):
+        """
+        Yield the contacts as JSON serializable dicts, in ID order.
+        """
+        for c in self._iter_contacts():
+            yield c.to_dict()
+
+    def save_to_json(self, file_path: str, compact: bool = False, compression: str = 'auto', level: int = None):
         """
         Save the contact book to a JSON file.
+        Contacts are serialized and written in chunks, without building the whole document in memory. Empty labels are not written.
+        compact=True writes the file without indentation, which is smaller and faster to write.
+        compression ('gzip', 'xz' or None) compresses the file as it is written, by default from its extension (.json.gz, .json.xz),
+        level sets the gzip level or xz preset (see src/compression.py).
         This function does not check if the file ovrewrites an existing one, this is handled in the CLI.
         """
         try:
-            data = {"contacts": [c.__dict__ for c in self.contacts]}
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=4)
+            with open_write(file_path, compression, level) as f:
+                write_json_contacts(f, self._iter_records(), compact=compact)
             self.modified = False
             print(f"Contact book saved to {file_path}")
+            return True
         except Exception as e:
             print(f"Error saving file: {e}")
+            return False
 
-    def load_from_json(self, file_path: str):
+    def save_to_ndjson(self, file_path: str, append: bool = False, compression: str = 'auto', level: int = None) -> bool:
         """
-        Load contacts from a JSON file.
+        Save the contact book to an NDJSON file, one contact per line (see json_stream.write_ndjson_contacts).
+        With append=True, only the contacts with an ID above the one of the last line of the file are written at its end,
+        the rest of the file is neither read nor rewritten: changes to the contacts already in the file are not saved.
+        compression and level work as in save_to_json. A compressed file is appended to as a new gzip member or xz stream,
+        but finding its last line decompresses it.
         """
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-
-            for entry in data.get("contacts", []):
-                contact = Contact(
-                    name=entry.get("name", ""),
-                    surname=entry.get("surname", ""),
-                    phone=entry.get("phone", {}),
-                    email=entry.get("email", {}),
-                    address=entry.get("address", "")
-                )
-                contact.id = self.next_id
-                self.contacts.append(contact)
-                self.next_id += 1
-            self.modified = False # True?
-            print(f"{len(self.contacts)} contacts loaded from {file_path}")
+            records = self._iter_records()
+            line_break = ''
+            if append and os.path.exists(file_path):
+                with open_read(file_path) as f:
+                    last = last_ndjson_record(f)
+                    if last is not None:
+                        last_id = last["id"]
+                        records = (r for r in records if r["id"] > last_id)
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            line_break = '\n'
+            with open_write(file_path, compression, level, append=append) as f:
+                f.write(line_break)
+                count = write_ndjson_contacts(f, records)
+            if not append:
+                self.modified = False
+            print(f"{count} contacts {'appended' if append else 'saved'} to {file_path}")
+            return True
+        except Exception as e:
+            print(f"Error saving file: {e}")
+            return False
+
+    def load_from_ndjson(self, file_path: str, progress=None, echo: int = 0, every: int = 1, workers: int = 0,
+                         limit: int = None, lazy: bool = False):
+        """
+        Load contacts from an NDJSON file, one contact per line, as written by save_to_ndjson.
+        In an empty book, contacts keep the IDs saved in the file, so that save_to_ndjson(append=True) can tell the new ones.
+        Loaded into a book that already has contacts, they get new IDs after its own instead, as with load_from_json:
+        the contacts of the book are never replaced, and the book is then marked as modified.
+        limit reads only the first limit contacts, the rest of the file is not read.
+        With workers > 1, the file is split at line boundaries into byte ranges that a pool of that many processes
+        parses and normalizes independently, see split_ndjson. Ranges are stored in file order as they come back.
+        A compressed file cannot be split: it is parsed here and only normalized by the pool, as in load_from_json.
+        lazy=True keeps the lines undecoded, only their ID is read: see load_from_json. workers is then ignored.
+        progress, echo, every and the handling of an invalid file are the same as in load_from_json.
+        """
+        self._check_lazy(lazy)
+        first_id = self.next_id
+        keep_ids = not self.count_contacts()
+        report = ValidationReport(echo, every)
+        try:
+            with open_read(file_path) as f, _gc_paused():
+                if lazy:
+                    lines = islice(iter_ndjson_lines(f, progress), limit)
+                    self._store_raw(lines if keep_ids else ((None, line) for _, line in lines))
+                elif workers > 1 and limit is None and is_compressed(f):
+                    self._load_parallel(iter_ndjson_contacts(f, progress=progress), workers, keep_ids, report)
+                elif workers > 1 and limit is None:
+                    self._load_ndjson_parallel(file_path, f, workers, progress, keep_ids, report)
+                else:
+                    for entry in islice(iter_ndjson_contacts(f, progress=progress), limit):
+                        contact = Contact.from_dict(entry)
+                        if keep_ids and entry.get("id") is not None:
+                            contact.id = entry["id"]
+                            self._put(contact)
+                        else:
+                            self._insert(contact)
+                        report.check(contact)
+            self.modified = not keep_ids
+            self.validation = report
+            print(f"{self.count_contacts()} contacts loaded from {file_path}")
+            if report:
+                print(report.summary())
         except FileNotFoundError:
             print(f"File {file_path} not found.")
         except Exception as e:
+            if keep_ids: # the IDs of the file may be below first_id, the book was empty
+                self._rollback(1)
+                self.next_id = first_id
+            else:
+                self._rollback(first_id)
             print(f"Error loading file: {e}")
 
-    def display_all_contacts(self):
+    def _load_ndjson_parallel(self, file_path: str, f, workers: int, progress, keep_ids: bool, report: ValidationReport):
         """
-        Display all contacts.
+        Load an NDJSON file in byte ranges parsed by a process pool, see load_from_ndjson.
+        The ranges are LOAD_CHUNK_BYTES long, and at most 2 per worker are in flight, to bound memory.
         """
-        if not self.contacts:
-            print("No contacts to display.")
-            return
+        total = os.fstat(f.fileno()).st_size
+        ranges = split_ndjson(f, max(workers, -(-total // self.LOAD_CHUNK_BYTES)))
 
-        print(f"\nThere are {self.count_contacts()} contacts.\n")
-        for contact in self.contacts:
-            contact.display()
+        def store(stop: int, future):
+            self._store_normalized(future.result(), keep_ids, report)
+            if progress:
+                progress(stop, total)
 
-    def get_contact_by_id(self, id: int) -> Contact | bool:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for start, stop in ranges:
+                pending.append((stop, pool.submit(_normalize_ndjson_range, file_path, start, stop)))
+                if len(pending) >= 2 * workers:
+                    store(*pending.popleft())
+            while pending:
+                store(*pending.popleft())
+
+    def export_to_csv(self, file_path: str, chunk_size: int = 1000, compression: str = 'auto', level: int = None) -> bool:
         """
-        Retrieve a contact by its ID.
+        Export all contacts to a CSV file, one row per contact (see src/csv_stream.py for the format).
+        Rows are streamed from the book and written chunk_size at a time, memory does not grow with the book.
+        compression and level work as in save_to_json.
+        This function does not check if the file ovrewrites an existing one.
         """
-        for c in self.contacts:
-            if c.id == id:
-                return c
-        return False
-
-
-'''
-consider adding
-
+        return self._export_file(file_path, 'CSV', lambda f, records: write_csv_contacts(f, records, chunk_size),
+                                 compression, level)
 
+    def import_from_csv(self, file_path: str, chunk_size: int = LOAD_CHUNK_SIZE, progress=None, echo: int = 0,
+                        every: int = 1) -> int:
+        """
+        Import the contacts of a CSV file (see src/csv_stream.py) as new contacts, IDs of the file are ignored.
+        A gzip or xz compressed file is decompressed as it is read.
+        Rows are streamed from the file and added chunk_size at a time through the batch path of add_contacts,
+        so only one chunk of raw rows is held in memory. progress, echo and every work as in load_from_json, the invalid
+        values of the whole file are collected in self.validation.
+        If the file is invalid, the contacts already imported are discarded.
+        Returns the number of contacts imported.
+        """
+        return self._import_file(file_path, 'CSV', iter_csv_contacts, chunk_size, progress, echo, every)
 
-# --- CSV EXPORT ---
-    def export_to_csv(self, file_path: str):
+    def _export_file(self, file_path: str, kind: str, write, compression: str, level: int) -> bool:
         """
-        Export all contacts to a CSV file.
-        Each phone/email label is stored as semicolon-separated entries.
+        Stream the records of the book to a text file with write(f, records), which returns the number written.
         """
-        with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["ID", "Name", "Surname", "Address", "Phones", "Emails"])
+        try:
+            with open_write(file_path, compression, level, newline='', encoding='utf-8') as f:
+                count = write(f, self._iter_records())
+            print(f"Exported {count} contacts to {file_path}")
+            return True
+        except Exception as e:
+            print(f"Error exporting to {kind}: {e}")
+            return False
 
-            for contact in self.contacts:
-                phones = "; ".join(
-                    f"{label}:{','.join(numbers)}" for label, numbers in contact.phone.items() if numbers
-                )
-                emails = "; ".join(
-                    f"{label}:{','.join(emails)}" for label, emails in contact.email.items() if emails
-                )
+    def _import_file(self, file_path: str, kind: str, read, chunk_size: int, progress, echo: int, every: int) -> int:
+        """
+        Add the raw entries yielded by read(binary file, progress) as new contacts, chunk_size at a time, see import_from_csv.
+        """
+        first_id = self.next_id
+        report = ValidationReport(echo, every)
+        count = 0
+        try:
+            with open_read(file_path) as f, _gc_paused(): # paused across chunks, a collection would rescan the book
+                entries = read(f, progress)
+                while chunk := list(islice(entries, chunk_size)):
+                    count += self._add_batch(chunk, report)
+        except FileNotFoundError:
+            print(f"File {file_path} not found.")
+            return 0
+        except Exception as e:
+            added = range(first_id, self.next_id)
+            self._rollback(first_id)
+            if self.journal_path is not None and added:
+                with open(self.journal_path, 'a') as f: # the adds of the earlier chunks are already journaled
+                    f.writelines(json.dumps({"op": 'remove', "id": id}, separators=(',', ':')) + '\n' for id in added)
+            print(f"Error importing from {kind}: {e}")
+            return 0
+        if count:
+            self.modified = True
+        self.validation = report
+        print(f"Imported {count} contacts from {file_path}")
+        if report:
+            print(report.summary())
+        return count
 
-                writer.writerow([
-                    contact.id, contact.name, contact.surname, contact.address, phones, emails
-                ])
+    def export_to_vcard(self, file_path: str, version: str = '3.0', compression: str = 'auto', level: int = None) -> bool:
+        """
+        Export all contacts to a vCard file (version '3.0' or '4.0'), one card per contact, see src/vcard.py.
+        Cards are streamed from the book, memory does not grow with the book. Values stored as 'error' are left out.
+        compression and level work as in save_to_json.
+        This function does not check if the file ovrewrites an existing one.
+        """
+        return self._export_file(file_path, 'vCard', lambda f, records: write_vcard_contacts(f, records, version),
+                                 compression, level)
 
-        print(f"Exported {len(self.contacts)} contacts to {file_path}")
+    def import_from_vcard(self, file_path: str, chunk_size: int = LOAD_CHUNK_SIZE, progress=None, echo: int = 0,
+                          every: int = 1) -> int:
+        """
+        Import the cards of a vCard 3.0/4.0 file (see src/vcard.py for the mapping onto the fields) as new contacts.
+        Cards are read one at a time and added chunk_size at a time, as in import_from_csv.
+        Returns the number of contacts imported.
+        """
+        return self._import_file(file_path, 'vCard', iter_vcard_contacts, chunk_size, progress, echo, every)
 
-    # --- CSV IMPORT ---
-    def import_from_csv(self, file_path: str):
+    def load_from_json(self, file_path: str, progress=None, journal: str = None, echo: int = 0, every: int = 1,
+                       workers: int = 0, lazy: bool = False):
         """
-        Import contacts from a CSV file.
-        Assumes labels and values are separated by ':' and values by ','.
+        Load contacts from a JSON file.
+        The file is parsed incrementally, one contact at a time, so that the whole JSON tree is never held in memory.
+        A gzip or xz compressed file (.json.gz, .json.xz, detected from its content) is decompressed as it is read.
+        progress, if given, is called as progress(bytes_read, total_bytes) while reading (see json_stream.print_progress).
+        If the file is invalid, the contacts already read are discarded.
+        With a journal path, the contacts keep the IDs saved in the file, and the journal is replayed and attached
+        (see attach_journal): the book should be empty.
+        Invalid phone numbers and emails are collected in self.validation and summarized after loading,
+        echo > 0 also prints the first echo of them as they are found, every > 1 only one in every `every` of them,
+        a sample of a large file (see ValidationReport).
+        With workers > 1, contacts are normalized by a pool of that many processes, see _load_parallel.
+        lazy=True only parses the file: the entries are kept raw and each one is normalized and validated when it is
+        first read (get_contact_by_id, search results, display, update, export), see _hydrate. The index is built by
+        the first search with criteria or duplicate check, or once every contact was read. self.validation is then filled
+        as contacts are read. An entry of the wrong type fails the load (see check_entry); one that still cannot be
+        converted when it is read is removed from the book (see _hydrate).
+        workers is ignored.
         """
+        self._check_lazy(lazy)
+        first_id = self.next_id
+        report = ValidationReport(echo, every)
         try:
-            with open(file_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    phone_dict = {}
-                    email_dict = {}
-
-                    # Parse phones
-                    phone_data = row.get("Phones", "")
-                    for group in phone_data.split(";"):
-                        if ":" in group:
-                            label, nums = group.strip().split(":", 1)
-                            phone_dict[label.strip()] = [n.strip() for n in nums.split(",")]
-
-                    # Parse emails
-                    email_data = row.get("Emails", "")
-                    for group in email_data.split(";"):
-                        if ":" in group:
-                            label, ems = group.strip().split(":", 1)
-                            email_dict[label.strip()] = [e.strip() for e in ems.split(",")]
-
-                    contact = Contact(
-                        name=row.get("Name", ""),
-                        surname=row.get("Surname", ""),
-                        address=row.get("Address", ""),
-                        phone=phone_dict,
-                        email=email_dict
-                    )
-                    self.add_contact(contact)
-
-            print(f"Imported contacts from {file_path}")
-
+            with open_read(file_path) as f:
+                entries = iter_json_contacts(f, progress=progress)
+                if lazy:
+                    with _gc_paused():
+                        entries = map(check_entry, entries) # the types from_dict rejects fail the load, as without lazy
+                        self._store_raw((entry.get("id") if journal is not None else None, entry) for entry in entries)
+                elif workers > 1:
+                    self._load_parallel(entries, workers, journal is not None, report)
+                else:
+                    for entry in entries:
+                        contact = Contact.from_dict(entry)
+                        if journal is not None and entry.get("id") is not None:
+                            contact.id = entry["id"]
+                            self._put(contact)
+                        else:
+                            self._insert(contact)
+                        report.check(contact)
+            if journal is not None:
+                self.attach_journal(journal)
+            self.modified = False # True?
+            self.validation = report
+            print(f"{self.count_contacts()} contacts loaded from {file_path}")
+            if report:
+                print(report.summary())
         except FileNotFoundError:
             print(f"File {file_path} not found.")
         except Exception as e:
-            print(f"Error importing from CSV: {e}")
+            self._rollback(first_id)
+            print(f"Error loading file: {e}")
+
+    def _check_lazy(self, lazy: bool):
+        if lazy and not self.LAZY_LOAD:
+            raise ValueError(f"{type(self).__name__} does not support lazy loading.")
 
-    # --- TXT EXPORT ---
+    def _load_parallel(self, entries, workers: int, keep_ids: bool, report: ValidationReport):
+        """
+        Load raw entries in chunks normalized by a process pool, for load_from_json(workers=...).
+        The file is still parsed here, the workers run the normalization and validation and send back plain tuples.
+        Chunks are stored in file order as they come back, so IDs and the resulting book are the same as with a
+        sequential load. At most 2 chunks per worker are in flight, to bound memory.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool, _gc_paused():
+            pending = deque()
+            while chunk := list(islice(entries, self.LOAD_CHUNK_SIZE)):
+                pending.append(pool.submit(_normalize_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    self._store_normalized(pending.popleft().result(), keep_ids, report)
+            while pending:
+                self._store_normalized(pending.popleft().result(), keep_ids, report)
+
+    def _store_normalized(self, chunk: list[tuple], keep_ids: bool, report: ValidationReport):
+        """
+        Store a chunk of contacts normalized by a worker process (see _normalize_chunk), in order.
+        With keep_ids, contacts keep the ID they had in the file, if any.
+        """
+        batch = []
+        for name, surname, phone, email, address, id in chunk:
+            contact = Contact.from_normalized(name, surname, phone, email, address)
+            if keep_ids:
+                if id is not None:
+                    contact.id = id
+                    self._put(contact)
+                else:
+                    self._insert(contact)
+            else:
+                contact.id = self.next_id + len(batch)
+                batch.append(contact)
+            report.check(contact)
+        if batch:
+            self._put_many(batch)
+
+    def _rollback(self, first_id: int):
+        """
+        Remove the contacts inserted from first_id on, after a failed load.
+        """
+        for id in range(first_id, self.next_id):
+            self._discard(id)
+        self.next_id = first_id
+
+    def display_all_contacts(self, page_size: int = 1000):
+        """
+        Display all contacts, printed page_size at a time to limit the number of writes to the terminal.
+        """
+        n = self.count_contacts()
+        if not n:
+            print("No contacts to display.")
+            return
+
+        print(f"\nThere are {n} contacts.\n")
+        contacts = self.iter_search('all')
+        while page := list(islice(contacts, page_size)):
+            print('\n'.join(c.format() for c in page))
+
+    def get_contact_by_id(self, id: int) -> Contact | bool:
+        """
+        Retrieve a contact by its ID.
+        """
+        contact = self._contact(id)
+        return contact if contact is not None else False
+
+
+'''
+consider adding
+
+
+
+# --- TXT EXPORT ---
     def export_to_txt(self, file_path: str):
         """
         Export all contacts to a TXT file in readable format.
@@ -242,28 +1016,6 @@ consider adding
 
 
 
-import csv
-
-file_path='test_book.csv'
-with open(file_path, 'w', newline='') as csvfile:
-    fieldnames = ['name', 'surname', 'phone', 'email', 'address']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for contact in test_file:
-        phone_str = "; ".join([f"{label}: {', '.join(nums)}" for label, nums in contact['phone'].items()])
-        email_str = "; ".join([f"{label}: {', '.join(emails)}" for label, emails in contact['email'].items()])
-        
-        writer.writerow({
-            'name': contact['name'],
-            'surname': contact['surname'],
-            'phone': phone_str,
-            'email': email_str,
-            'address': contact['address']
-        })
-
-print(f"Contacts saved to CSV: {file_path}")
-
 def save_contacts_as_txt(file_path='test_contact_book.txt'):
     with open(file_path, 'w') as txtfile:
         for contact in contacts:
@@ -277,34 +1029,6 @@ def save_contacts_as_txt(file_path='test_contact_book.txt'):
 
     print(f"Contacts saved to TXT: {file_path}")
 
-def read_contacts_from_csv(file_path: str):
-    contacts = []
-    with open(file_path, 'r', newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            phone = {}
-            email = {}
-
-            if row['phone']:
-                for item in row['phone'].split(";"):
-                    label, *nums = item.strip().split(":")
-                    phone[label.strip()] = [n.strip() for n in ":".join(nums).split(",")]
-
-            if row['email']:
-                for item in row['email'].split(";"):
-                    label, *emails = item.strip().split(":")
-                    email[label.strip()] = [e.strip() for e in ":".join(emails).split(",")]
-
-            contact = {
-                "name": row['name'].strip(),
-                "surname": row['surname'].strip(),
-                "phone": phone,
-                "email": email,
-                "address": row['address'].strip()
-            }
-            contacts.append(contact)
-    return contacts
-
 def read_contacts_from_txt(file_path: str):
     contacts = []
     with open(file_path, 'r') as f:
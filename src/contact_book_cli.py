@@ -1,8 +1,14 @@
 import os
+from itertools import islice
 from src.contact_book import ContactBook
 from src.contact import Contact
+from src.json_stream import print_progress
+from src.validation import print_contact_errors
 
 class ContactBookCLI:
+    PAGE_SIZE = 10 # contacts per page in the paged views
+    PROGRESS_MIN_SIZE = 50_000_000 # show loading progress, and load lazily, for books larger than this, in bytes
+
     def __init__(self):
         self.book = None
         self.saved = True
@@ -32,7 +38,8 @@ class ContactBookCLI:
         path = input("Provide JSON file path: ").strip()
         try:
             self.book = ContactBook()
-            self.book.load_from_json(path)
+            large = os.path.isfile(path) and os.path.getsize(path) > self.PROGRESS_MIN_SIZE
+            self.book.load_from_json(path, progress=print_progress() if large else None, lazy=large)
             self.saved = True
             self.book_menu()
         except Exception as e:
@@ -52,11 +59,13 @@ class ContactBookCLI:
                 print("4. Remove contact")
             print("5. Save book")
             print("6. Return to main menu")
+            if n > 1:
+                print("7. Find and merge duplicates")
 
             selection = input("Choose an option: ").strip()
 
             if selection == '0':
-                self.book.display_all_contacts()
+                self.display_contacts_menu()
             elif selection == '1':
                 self.add_contact_menu()
             elif selection == '2' and n > 0:
@@ -67,6 +76,8 @@ class ContactBookCLI:
                 self.remove_contact_menu()
             elif selection == '5':
                 self.save_book_menu()
+            elif selection == '7' and n > 1:
+                self.merge_duplicates_menu()
             elif selection == '6':
                 if not self.saved:
                     confirm = input("Unsaved changes. Exit without saving? (y/n): ").strip().lower()
@@ -76,6 +87,32 @@ class ContactBookCLI:
             else:
                 print("Invalid selection. Try again.")
 
+    def show_pages(self, contacts) -> list:
+        """
+        Print contacts one page at a time, each page in a single write, until they run out or the user stops.
+        contacts is consumed lazily: only the contacts shown are searched and formatted. Returns them.
+        """
+        shown = []
+        while True:
+            page = list(islice(contacts, self.PAGE_SIZE))
+            if not page:
+                if shown:
+                    print("No more contacts.")
+                break
+            print('\n'.join(c.format() for c in page))
+            shown.extend(page)
+            if len(page) < self.PAGE_SIZE or input("Press enter for the next page, 'q' to stop: ").strip().lower() == 'q':
+                break
+        return shown
+
+    def display_contacts_menu(self):
+        n = self.book.count_contacts()
+        if not n:
+            print("No contacts to display.")
+            return
+        print(f"\nThere are {n} contacts.\n")
+        self.show_pages(self.book.iter_search('all'))
+
     def add_contact_menu(self):
         print("\n--- Add Contact ---")
         name = input("First name: ").strip()
@@ -99,22 +136,41 @@ class ContactBookCLI:
             email.setdefault(label, []).extend(mail)
 
         contact = Contact(name=name, surname=surname, phone=phone, email=email, address=address)
-        if contact in self.book.contacts and input("This contact already exists. Do you want to add in again? (y/n) > ").strip().lower()!='y': # it doesn't work, need to define equality detweeen contacts
+        print_contact_errors(contact)
+        if self.book.same_content(contact):
+            if input("This contact already exists. Do you want to add in again? (y/n) > ").strip().lower()!='y':
                 return
-        elif any(contact.name_eq(c) for c in self.book.contacts):
+        elif self.book.same_name(contact):
             if input(f"A contact with this name already exists. Press 'y' to add {contact.name} {contact.surname} as a new contact. Press 'x' to return to main menu and update the existing contact intead.").strip().lower()!='y':
                 return
         self.book.add_contact(contact)
         self.saved = False
         print(f"Contact added with ID: {contact.id}")
 
+    def merge_duplicates_menu(self):
+        print("\n--- Find and merge duplicates ---")
+        groups = self.book.find_duplicates()
+        if not groups:
+            print("No duplicates found.")
+            return
+        print(f"{len(groups)} groups of contacts share a name, a phone number or an email.")
+        for group in groups:
+            print("\n".join(self.book.get_contact_by_id(id).format() for id in group))
+            choice = input("Merge these contacts into the first one? (y/n, 'q' to stop) > ").strip().lower()
+            if choice == 'q':
+                break
+            if choice == 'y' and self.book.merge_contacts(group):
+                self.saved = False
+                print(f"Contacts merged into ID: {group[0]}")
+
     def find_contact_menu(self):
         print("\n--- Find Contact ---")
         mode = input("Search mode ('all' to match all criteria or 'any' to match at least one criteria): ").strip().lower()
-        show = input("Display mode ('first' to display the first match or 'all' to display all matches): ").strip().lower()
+        show = input("Display mode ('first' to display the first match, 'all' to display all matches or 'page' to browse them a page at a time): ").strip().lower()
 
         criteria = []
         valid_fields = ['name', 'surname', 'phone', 'email', 'address']
+        valid_matches = ['exact', 'prefix', 'suffix']
 
         while True:
             field = input(f"Field to search ({valid_fields}): ").strip().lower()
@@ -125,14 +181,29 @@ class ContactBookCLI:
             if field in ['phone', 'email']:
                 label = input("Label (optional): ").strip().lower() or None
             value = input("Search value: ").strip() or ''
-            criteria.append((field, value, label))
+            match = 'exact'
+            while field == 'phone':
+                match = input("Match ('prefix', 'suffix' or enter for the exact number): ").strip().lower() or 'exact'
+                if match in valid_matches:
+                    break
+                print("Invalid match mode.")
+            criteria.append((field, value, label) if match == 'exact' else (field, value, label, match))
             if input("Do you want to add another serch criteria? (y/n) > ").strip().lower()!='y':
                 break
 
+        if show == 'page':
+            try:
+                return self.show_pages(self.book.iter_search(mode, *criteria))
+            except ValueError as e:
+                print(f"Invalid search: {e}")
+                return []
         matches = self.book.search_contacts(mode, show, *criteria)
+        if matches is False:
+            return []
         print(f"\nContacts found: {len(matches)}\n")
         for c in matches:
             c.display()
+        return matches
 
     def remove_contact_menu(self):
         print("\n--- Remove Contact ---")
@@ -0,0 +1,314 @@
+from collections import defaultdict
+import heapq
+from src.contact import Contact
+
+def trigrams(value: str) -> set[str]:
+    """
+    Return the character trigrams of a lowercased value, padded so that the start of the word weighs more.
+    """
+    padded = f"  {value.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def name_key(contact) -> tuple[str, str]:
+    """
+    Return the lowercased (name, surname) of a contact: contacts with the same key have the same name for a search.
+    """
+    return (str(contact.name).lower(), str(contact.surname).lower())
+
+def _labels_key(values: dict) -> tuple:
+    return tuple(sorted((label, tuple(items)) for label, items in values.items() if items))
+
+def fingerprint(contact) -> tuple:
+    """
+    Return a hashable key of the content of a contact, ignoring its ID, empty labels and the order of the labels:
+    two contacts have the same fingerprint when they hold the same values.
+    """
+    return (contact.name, contact.surname, contact.address, _labels_key(contact.phone), _labels_key(contact.email))
+
+def record_fingerprint(record: dict) -> tuple:
+    """
+    Same as fingerprint, for a contact as a dict (see Contact.to_dict).
+    """
+    return (record["name"], record["surname"], record["address"], _labels_key(record["phone"]), _labels_key(record["email"]))
+
+class _TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.entries: dict[tuple[int, str], int] = {}  # (id, label) -> number of occurrences ending here
+
+
+class DigitTrie:
+    """
+    A trie over digit strings, used to find phone numbers by prefix.
+    Numbers inserted reversed give a trie to find them by suffix.
+    Lookups cost time proportional to the length of the prefix plus the size of the matching subtree.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, number: str, id: int, label: str):
+        node = self.root
+        for digit in number:
+            child = node.children.get(digit)
+            if child is None:
+                child = node.children[digit] = _TrieNode()
+            node = child
+        node.entries[(id, label)] = node.entries.get((id, label), 0) + 1
+
+    def insert_many(self, entries: list[tuple[str, int, str]]):
+        """
+        Insert (number, id, label) entries in sorted order, so that each number walks down
+        from the path of the previous one instead of from the root.
+        """
+        path, previous = [self.root], ''
+        for number, id, label in sorted(entries):
+            common = 0
+            for a, b in zip(number, previous):
+                if a != b:
+                    break
+                common += 1
+            del path[common + 1:]
+            node = path[-1]
+            for digit in number[common:]:
+                child = node.children.get(digit)
+                if child is None:
+                    child = node.children[digit] = _TrieNode()
+                node = child
+                path.append(node)
+            node.entries[(id, label)] = node.entries.get((id, label), 0) + 1
+            previous = number
+
+    def remove(self, number: str, id: int, label: str):
+        path = [self.root]
+        for digit in number:
+            node = path[-1].children.get(digit)
+            if node is None:
+                return
+            path.append(node)
+        node = path[-1]
+        count = node.entries.get((id, label), 0)
+        if count > 1:
+            node.entries[(id, label)] = count - 1
+        elif count:
+            del node.entries[(id, label)]
+        # prune the branches left empty
+        for parent, digit in zip(reversed(path[:-1]), reversed(number)):
+            child = parent.children[digit]
+            if child.children or child.entries:
+                break
+            del parent.children[digit]
+
+    def search(self, prefix: str, label: str = None) -> set[int]:
+        """
+        Return the IDs of the contacts with a number starting with prefix, optionally under the given label.
+        """
+        node = self.root
+        for digit in prefix:
+            node = node.children.get(digit)
+            if node is None:
+                return set()
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            ids.update(id for id, l in node.entries if not label or l == label)
+            stack.extend(node.children.values())
+        return ids
+
+
+class TrigramIndex:
+    """
+    Character-trigram index over the name and surname of the contacts, for typo tolerant search.
+    Similarity is the Dice coefficient between the trigram sets of the query and of the value.
+    """
+    FIELDS = ('name', 'surname')
+
+    def __init__(self):
+        self.postings = {f: defaultdict(set) for f in self.FIELDS}  # trigram -> ids
+        self.sizes = {f: {} for f in self.FIELDS}  # id -> number of trigrams of the value
+
+    def add(self, contact: Contact):
+        for field_name in self.FIELDS:
+            value = getattr(contact, field_name)
+            if isinstance(value, str):
+                grams = trigrams(value)
+                for gram in grams:
+                    self.postings[field_name][gram].add(contact.id)
+                self.sizes[field_name][contact.id] = len(grams)
+
+    def add_many(self, contacts: list[Contact]):
+        """
+        Same as add for each contact, with the postings of every field looked up once.
+        """
+        for field_name in self.FIELDS:
+            postings, sizes = self.postings[field_name], self.sizes[field_name]
+            for contact in contacts:
+                value = getattr(contact, field_name)
+                if isinstance(value, str):
+                    grams = trigrams(value)
+                    id = contact.id
+                    for gram in grams:
+                        postings[gram].add(id)
+                    sizes[id] = len(grams)
+
+    def remove(self, contact: Contact):
+        for field_name in self.FIELDS:
+            value = getattr(contact, field_name)
+            if isinstance(value, str):
+                for gram in trigrams(value):
+                    ContactIndex._discard(self.postings[field_name], gram, contact.id)
+                self.sizes[field_name].pop(contact.id, None)
+
+    def search(self, query: str, fields=FIELDS, k: int = 10, min_score: float = 0.3) -> list[tuple[int, float]]:
+        """
+        Return up to k (id, score) pairs, best first, of the contacts whose value in one of the fields is similar to query.
+        Only contacts sharing at least one trigram with the query are scored.
+        """
+        grams = trigrams(query)
+        best: dict[int, float] = {}
+        for field_name in fields:
+            shared = defaultdict(int)
+            for gram in grams:
+                for id in self.postings[field_name].get(gram, ()):
+                    shared[id] += 1
+            sizes = self.sizes[field_name]
+            for id, n in shared.items():
+                score = 2 * n / (len(grams) + sizes[id])
+                if score >= min_score and score > best.get(id, 0):
+                    best[id] = score
+        return heapq.nsmallest(k, best.items(), key=lambda item: (-item[1], item[0]))
+
+
+class ContactIndex:
+    """
+    Inverted indexes mapping field values to the IDs of the contacts holding them.
+
+    - name/surname are indexed lowercased, as string fields match case-insensitively.
+    - phone/email are indexed by exact value, both per label and across labels.
+    - numeric phone numbers are also stored in forward and reversed digit tries for prefix/suffix search.
+    - name/surname trigrams are indexed for fuzzy search.
+    - the name keys and fingerprints of the contacts (see name_key and fingerprint) give their duplicates in O(1).
+
+    The index is kept up to date by ContactBook: contacts must be modified through the book
+    (add_contact, update_contact, remove_contact) for the index to stay in sync.
+    """
+    STRING_FIELDS = ('name', 'surname')
+    DICT_FIELDS = ('phone', 'email')
+
+    def __init__(self):
+        self.strings = {f: defaultdict(set) for f in self.STRING_FIELDS}  # lowercased value -> ids
+        self.labelled = {f: defaultdict(set) for f in self.DICT_FIELDS}  # (label, value) -> ids
+        self.values = {f: defaultdict(set) for f in self.DICT_FIELDS}  # value -> ids, any label
+        self.phone_prefixes = DigitTrie()
+        self.phone_suffixes = DigitTrie()  # numbers stored reversed
+        self.trigrams = TrigramIndex()
+        self.names = defaultdict(set)  # name_key -> ids
+        self.fingerprints = defaultdict(set)  # fingerprint -> ids
+
+    def add(self, contact: Contact):
+        """
+        Add the values of a contact to the indexes.
+        """
+        for field_name in self.STRING_FIELDS:
+            value = getattr(contact, field_name)
+            if isinstance(value, str):
+                self.strings[field_name][value.lower()].add(contact.id)
+        for field_name in self.DICT_FIELDS:
+            for label, values in getattr(contact, field_name).items():
+                for value in values:
+                    self.labelled[field_name][(label, value)].add(contact.id)
+                    self.values[field_name][value].add(contact.id)
+        for label, numbers in contact.phone.items():
+            for number in numbers:
+                if number.isdigit():
+                    self.phone_prefixes.insert(number, contact.id, label)
+                    self.phone_suffixes.insert(number[::-1], contact.id, label)
+        self.trigrams.add(contact)
+        self.names[name_key(contact)].add(contact.id)
+        self.fingerprints[fingerprint(contact)].add(contact.id)
+
+    def add_many(self, contacts: list[Contact]):
+        """
+        Add the values of many contacts to the indexes, one field at a time (see ContactBook.add_contacts).
+        Gives the same indexes as add for each contact, with much less per-contact overhead.
+        """
+        for field_name in self.STRING_FIELDS:
+            strings = self.strings[field_name]
+            for contact in contacts:
+                value = getattr(contact, field_name)
+                if isinstance(value, str):
+                    strings[value.lower()].add(contact.id)
+        for field_name in self.DICT_FIELDS:
+            labelled, values_index = self.labelled[field_name], self.values[field_name]
+            for contact in contacts:
+                id = contact.id
+                for label, values in getattr(contact, field_name).items():
+                    for value in values:
+                        labelled[(label, value)].add(id)
+                        values_index[value].add(id)
+        numbers = [(number, contact.id, label) for contact in contacts
+                   for label, values in contact.phone.items() for number in values if number.isdigit()]
+        self.phone_prefixes.insert_many(numbers)
+        self.phone_suffixes.insert_many([(number[::-1], id, label) for number, id, label in numbers])
+        self.trigrams.add_many(contacts)
+        names, fingerprints = self.names, self.fingerprints
+        for contact in contacts:
+            names[name_key(contact)].add(contact.id)
+            fingerprints[fingerprint(contact)].add(contact.id)
+
+    def remove(self, contact: Contact):
+        """
+        Remove the values of a contact from the indexes.
+        """
+        for field_name in self.STRING_FIELDS:
+            value = getattr(contact, field_name)
+            if isinstance(value, str):
+                self._discard(self.strings[field_name], value.lower(), contact.id)
+        for field_name in self.DICT_FIELDS:
+            for label, values in getattr(contact, field_name).items():
+                for value in values:
+                    self._discard(self.labelled[field_name], (label, value), contact.id)
+                    self._discard(self.values[field_name], value, contact.id)
+        for label, numbers in contact.phone.items():
+            for number in numbers:
+                if number.isdigit():
+                    self.phone_prefixes.remove(number, contact.id, label)
+                    self.phone_suffixes.remove(number[::-1], contact.id, label)
+        self.trigrams.remove(contact)
+        self._discard(self.names, name_key(contact), contact.id)
+        self._discard(self.fingerprints, fingerprint(contact), contact.id)
+
+    @staticmethod
+    def _discard(postings: dict, key, id: int):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(id)
+            if not ids:
+                del postings[key]
+
+    def lookup(self, field_name: str, search_value, label: str = None, mode: str = 'exact') -> set[int] | None:
+        """
+        Return the IDs of the contacts matching one criterion, with the same semantics as Contact.one_field_match.
+        Returns None if the criterion cannot be answered by the index. The returned set must not be modified.
+        """
+        if mode != 'exact':
+            if field_name != 'phone' or mode not in ('prefix', 'suffix'):
+                return None
+            search_value = str(search_value)
+            if not search_value.isdigit():
+                return set()
+            if mode == 'prefix':
+                return self.phone_prefixes.search(search_value, label)
+            return self.phone_suffixes.search(search_value[::-1], label)
+        if not isinstance(search_value, str):
+            return None
+        if field_name in self.STRING_FIELDS:
+            return self.strings[field_name].get(search_value.lower(), set())
+        if field_name in self.DICT_FIELDS:
+            if label:
+                return self.labelled[field_name].get((label, search_value), set())
+            return self.values[field_name].get(search_value, set())
+        return None
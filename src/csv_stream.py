@@ -0,0 +1,105 @@
+"""
+Streaming CSV reader and writer for contact books, see ContactBook.export_to_csv and import_from_csv.
+
+One row per contact, with the columns of CSV_HEADER. Phone numbers and emails are written under their labels as
+'label:value,value; label:value', empty labels are left out. Rows are read and written one at a time,
+the file is never held in memory.
+"""
+
+import csv
+from src.compression import stream_size
+
+CSV_HEADER = ["ID", "Name", "Surname", "Address", "Phones", "Emails"]
+_COLUMNS = {'id': 'id', 'name': 'name', 'surname': 'surname', 'address': 'address',
+            'phones': 'phone', 'phone': 'phone', 'emails': 'email', 'email': 'email'}  # header (lowercased) -> key
+_PROGRESS_EVERY = 10000  # rows read between two calls of progress
+
+
+def format_labels(values: dict) -> str:
+    """
+    Format a dict of labelled lists as 'label:value,value; label:value', leaving out empty labels.
+    """
+    return "; ".join(f"{label}:{','.join(items)}" for label, items in values.items() if items)
+
+
+def parse_labels(text: str) -> dict[str, list[str]]:
+    """
+    Parse 'label:value,value; label:value' back into a dict of labelled lists. Groups without a label are ignored.
+    """
+    values = {}
+    for group in text.split(";"):
+        if ":" in group:
+            label, items = group.split(":", 1)
+            items = [item for item in map(str.strip, items.split(",")) if item]
+            label = label.strip()
+            if label in values:
+                values[label].extend(items)
+            else:
+                values[label] = items
+    return values
+
+
+def write_csv_contacts(f, records, chunk_size: int = 1000) -> int:
+    """
+    Write contact records (dicts, see Contact.to_dict) to a text file opened with newline='', chunk_size rows at a time.
+    Returns the number of records written.
+    """
+    writer = csv.writer(f)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    chunk = []
+    for record in records:
+        chunk.append((record["id"], record["name"], record["surname"], record["address"],
+                      format_labels(record["phone"]), format_labels(record["email"])))
+        if len(chunk) >= chunk_size:
+            writer.writerows(chunk)
+            count += len(chunk)
+            chunk = []
+    writer.writerows(chunk)
+    return count + len(chunk)
+
+
+def _lines(f, progress, total):
+    """
+    Decode the lines of a binary file, calling progress(bytes_read, total) every _PROGRESS_EVERY lines.
+    """
+    bytes_read = 0
+    for n, line in enumerate(f, 1):
+        bytes_read += len(line)
+        if progress and n % _PROGRESS_EVERY == 0:
+            progress(bytes_read, total)
+        yield line.decode('utf-8-sig' if n == 1 else 'utf-8')
+    if progress:
+        progress(bytes_read, total)
+
+
+def iter_csv_contacts(f, progress=None):
+    """
+    Yield the rows of a CSV file of contacts one at a time, as raw entries for Contact.from_dict
+    (with 'id' as an int, or None if the cell is empty or not a number, e.g. 'A-17'). f must be a file opened in binary mode.
+    The header names the columns, in any order and case: ID, Name, Surname, Address, Phones (or Phone), Emails (or Email).
+    Missing columns are left empty, unknown ones are ignored.
+    progress, if given, is called as progress(bytes_read, total_bytes) while reading (see json_stream.print_progress).
+    """
+    total = stream_size(f)
+    reader = csv.reader(_lines(f, progress, total))
+    header = next(reader, None)
+    if header is None:
+        return
+    width = len(header) + 1  # a missing column reads the empty cell added at the end of each row
+    columns = {key: width - 1 for key in ('id', 'name', 'surname', 'address', 'phone', 'email')}
+    for i, name in enumerate(header):
+        if name.strip().lower() in _COLUMNS:
+            columns[_COLUMNS[name.strip().lower()]] = i
+    if columns['name'] == width - 1:
+        raise ValueError("Invalid CSV: the header has no Name column.")
+    id_, name, surname, address, phone, email = columns.values()
+    padding = [''] * width
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row += padding[len(row):]
+        phones, emails, row_id = row[phone], row[email], row[id_].strip()
+        yield {'name': row[name], 'surname': row[surname], 'phone': parse_labels(phones) if phones else {},
+               'email': parse_labels(emails) if emails else {}, 'address': row[address], 'id': int(row_id) if row_id.isdecimal() else None}
@@ -0,0 +1,270 @@
+import codecs
+import json
+import os
+import re
+from src.compression import stream_size
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_PROGRESS_LINES = 10000  # NDJSON lines read between two calls of progress
+# the "id" member of a record: labels map to lists and quotes inside strings are escaped, so it cannot match elsewhere
+_NDJSON_ID = re.compile(rb'"id"\s*:\s*(-?\d+)')
+
+
+class _StreamReader:
+    """
+    Buffered reader decoding a JSON document from a binary file one value at a time.
+    Only the value being decoded and one chunk of the file are held in memory.
+    """
+
+    def __init__(self, f, chunk_size: int, progress=None):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self.total = stream_size(f)
+
+    def fill(self) -> bool:
+        """
+        Read the next chunk, dropping the part of the buffer already decoded. Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        if self.progress:
+            self.progress(self.bytes_read, self.total)
+        return not self.eof
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character, or '' at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON: expected {' or '.join(repr(c) for c in chars)} at byte {self.bytes_read}.")
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """
+        Decode the next JSON value, reading more chunks until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill() # the value may continue in the next chunk (e.g. a number cut in half)
+
+
+def iter_json_contacts(f, chunk_size: int = 1 << 16, progress=None):
+    """
+    Yield the entries of the "contacts" array of a {"contacts": [...]} JSON document one at a time.
+    f must be a file opened in binary mode. Other top-level keys are skipped.
+    progress, if given, is called as progress(bytes_read, total_bytes) after each chunk read.
+    """
+    reader = _StreamReader(f, chunk_size, progress)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(':')
+        if key == "contacts":
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.decode()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            reader.decode()
+        if reader.expect(',}') == '}':
+            return
+
+
+def print_progress(step: int = 10):
+    """
+    Return a progress callback for iter_json_contacts printing the share of the file read, every step percent.
+    When the size is not known (a compressed file, see compression.stream_size), it prints the data read every step MB.
+    """
+    last = [-step]
+
+    def progress(bytes_read: int, total: int):
+        if total:
+            percent = bytes_read * 100 // total
+            if percent >= last[0] + step:
+                last[0] = percent - percent % step
+                print(f"Loading... {last[0]}%")
+        elif total is None:
+            mb = bytes_read >> 20
+            if mb >= last[0] + step:
+                last[0] = mb - mb % step
+                print(f"Loading... {last[0]} MB")
+    return progress
+
+
+def _without_empty_labels(record: dict) -> dict:
+    for key in ('phone', 'email'):
+        values = record.get(key)
+        if isinstance(values, dict) and not all(values.values()):
+            record[key] = {label: items for label, items in values.items() if items}
+    return record
+
+
+def write_json_contacts(f, records, compact: bool = False, chunk_size: int = 1000) -> int:
+    """
+    Write contact records (dicts) to a text file as a {"contacts": [...]} JSON document, without building it in memory.
+    Records are serialized one by one and written chunk_size at a time. Empty phone/email labels are left out.
+    compact=True writes without indentation and whitespace, otherwise the layout of json.dump(..., indent=4) is used.
+    Returns the number of records written.
+    """
+    if compact:
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        head, first, separator, tail, empty_tail = '{"contacts":[', '', ',', ']}', ']}'
+    else:
+        encode = json.JSONEncoder(indent=4).encode
+        dumps = lambda record: '        ' + encode(record).replace('\n', '\n        ')
+        head, first, separator, tail, empty_tail = '{\n    "contacts": [', '\n', ',\n', '\n    ]\n}', ']\n}'
+
+    count = 0
+    chunk = []
+    f.write(head)
+    for record in records:
+        chunk.append(dumps(_without_empty_labels(record)))
+        if len(chunk) >= chunk_size:
+            f.write((separator if count else first) + separator.join(chunk))
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        f.write((separator if count else first) + separator.join(chunk))
+        count += len(chunk)
+    f.write(tail if count else empty_tail)
+    return count
+
+
+# --- NDJSON: one contact record per line ---
+
+def write_ndjson_contacts(f, records, chunk_size: int = 1000) -> int:
+    """
+    Write contact records (dicts) to a text file as NDJSON, one compact JSON object per line, chunk_size lines at a time.
+    Empty phone/email labels are left out. Returns the number of records written.
+    """
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    count = 0
+    chunk = []
+    for record in records:
+        chunk.append(dumps(_without_empty_labels(record)) + '\n')
+        if len(chunk) >= chunk_size:
+            f.write(''.join(chunk))
+            count += len(chunk)
+            chunk = []
+    f.write(''.join(chunk))
+    return count + len(chunk)
+
+
+def iter_ndjson_contacts(f, start: int = 0, stop: int = None, progress=None):
+    """
+    Yield the records of the NDJSON lines of a binary file one at a time, blank lines are skipped.
+    With start and stop, only the lines starting in the byte range [start, stop) are read, start must be the
+    beginning of a line (see split_ndjson). Nothing after the last line yielded is read, beyond the read buffer.
+    progress, if given, is called as progress(bytes_read, total_bytes) every _PROGRESS_LINES lines.
+    """
+    total = stream_size(f)
+    f.seek(start)
+    pos = start
+    for n, line in enumerate(f, 1):
+        if stop is not None and pos >= stop:
+            break
+        pos += len(line)
+        if line.strip():
+            yield json.loads(line)
+        if progress and n % _PROGRESS_LINES == 0:
+            progress(pos, total)
+    if progress:
+        progress(pos, total)
+
+
+def iter_ndjson_lines(f, progress=None):
+    """
+    Yield (id, line) for the non-blank lines of a binary NDJSON file, without decoding them, for a lazy load.
+    id is read from the "id" member of the line, None if it has none. progress works as in iter_ndjson_contacts.
+    """
+    total = stream_size(f)
+    pos = 0
+    search = _NDJSON_ID.search
+    for n, line in enumerate(f, 1):
+        pos += len(line)
+        if not line.isspace():
+            match = search(line)
+            yield (int(match[1]) if match else None), line
+        if progress and n % _PROGRESS_LINES == 0:
+            progress(pos, total)
+    if progress:
+        progress(pos, total)
+
+
+def split_ndjson(f, parts: int) -> list[tuple[int, int]]:
+    """
+    Split a binary NDJSON file into at most parts byte ranges (start, stop) of about the same size, cut at line boundaries,
+    to be parsed independently (see iter_ndjson_contacts).
+    """
+    total = f.seek(0, os.SEEK_END)
+    bounds = [0]
+    for i in range(1, parts):
+        target = total * i // parts
+        if target <= bounds[-1]:
+            continue
+        f.seek(target - 1)
+        f.readline() # to the end of the line holding the byte before target, so that a range starting on a line is kept
+        if bounds[-1] < f.tell() < total:
+            bounds.append(f.tell())
+    bounds.append(total)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def last_ndjson_record(f) -> dict | None:
+    """
+    Return the record of the last line of a binary NDJSON file, reading the file backwards from its end,
+    or None if the file has no record. Raises ValueError if the last line is incomplete.
+    """
+    end = f.seek(0, os.SEEK_END)
+    tail = b''
+    while end > 0:
+        start = max(0, end - (1 << 12))
+        f.seek(start)
+        tail = f.read(end - start) + tail
+        end = start
+        lines = tail.rstrip().split(b'\n')
+        if len(lines) > 1 or end == 0:
+            last = lines[-1].strip()
+            if not last:
+                return None
+            try:
+                return json.loads(last)
+            except json.JSONDecodeError:
+                raise ValueError("Invalid NDJSON: the last line is incomplete.")
+    return None
@@ -0,0 +1,114 @@
+"""
+Parallel predicate scan for ContactBook.search_contacts(..., workers=N), for criteria the index cannot answer.
+
+The book is written once to a binary snapshot (see src/snapshot.py), in shared memory (/dev/shm) when available.
+Each worker process maps the same read-only file and evaluates the compiled criteria (see src/query.py) over shards of records,
+decoding only the fields used by the criteria.
+Shards are numbered in ID order, so the results merge back in ID order. For show='first', the lowest matching
+record found so far is shared between the workers, which stop once they cannot find a lower one.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from src.contact import Contact
+from src.contact_book import _gc_paused
+from src.query import Query
+from src.snapshot import SnapshotContactBook, write_snapshot
+
+SHARDS_PER_WORKER = 4
+_CHECK_EVERY = 256  # records scanned between two checks of the shared lowest match
+
+# state of a worker process, set by _init_worker
+_snapshot: SnapshotContactBook | None = None
+_lowest = None
+
+
+def _init_worker(path: str, lowest):
+    global _snapshot, _lowest
+    _snapshot = SnapshotContactBook(path)
+    _lowest = lowest
+
+
+def _decoder(fields: set[str]):
+    """
+    Return a function decoding a record into a Contact with only the given fields filled in, enough for matches.
+    """
+    string, labelled = _snapshot._string, _snapshot._labelled
+
+    def decode(n: int) -> Contact:
+        id, name, surname, address, phone_start, phone_count, email_start, email_count = _snapshot._record(n)
+        return Contact.from_normalized(string(name) if 'name' in fields else '',
+                                       string(surname) if 'surname' in fields else '',
+                                       labelled(phone_start, phone_count) if 'phone' in fields else {},
+                                       labelled(email_start, email_count) if 'email' in fields else {},
+                                       string(address) if 'address' in fields else '', id)
+    return decode
+
+
+def _scan_shard(start: int, stop: int, how: str, criteria: tuple, first: bool) -> list[int]:
+    """
+    Return the IDs of the matching records in [start, stop). With first, return at most the first one,
+    and give up as soon as another worker has found a match in a lower record.
+    """
+    decode = _decoder({arg[0] for arg in criteria})
+    predicate = Query(how, criteria).predicate
+    ids = []
+    for n in range(start, stop):
+        if first and (n - start) % _CHECK_EVERY == 0 and _lowest.value < n:
+            break
+        contact = decode(n)
+        if predicate(contact):
+            ids.append(contact.id)
+            if first:
+                with _lowest.get_lock():
+                    _lowest.value = min(_lowest.value, n)
+                break
+    return ids
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def snapshot_path(book) -> str:
+    """
+    Return the path of an up-to-date snapshot of the book, written again only if the book changed since the last one.
+    The file is removed when the book is garbage collected.
+    """
+    if book._scan_snapshot is not None:
+        generation, path, finalizer = book._scan_snapshot
+        if generation == book.generation:
+            return path
+        finalizer()
+    fd, path = tempfile.mkstemp(prefix='contact_book_', suffix='.snap', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    os.close(fd)
+    with _gc_paused():
+        write_snapshot(book, path)
+    book._scan_snapshot = (book.generation, path, weakref.finalize(book, _remove, path))
+    return path
+
+
+def scan(book, how: str, show: str, criteria: tuple, workers: int) -> list[int]:
+    """
+    Return the IDs of the contacts of the book matching the criteria (all of them, or the first one), in ID order.
+    """
+    path = snapshot_path(book)
+    total = book.count_contacts()
+    shards = max(1, min(total, workers * SHARDS_PER_WORKER))
+    bounds = [total * i // shards for i in range(shards + 1)]
+    lowest = multiprocessing.Value('q', total)
+    first = show == 'first'
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path, lowest)) as pool:
+        futures = [pool.submit(_scan_shard, bounds[i], bounds[i + 1], how, criteria, first) for i in range(shards)]
+        ids = []
+        for future in futures:
+            ids.extend(future.result())
+            if first and ids:
+                for other in futures:
+                    other.cancel()
+                break
+    return ids
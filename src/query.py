@@ -0,0 +1,242 @@
+"""
+Compilation of search criteria (see Contact.matches) into a query plan.
+
+The criteria are validated and normalized once, and each one becomes a Term with a specialized test,
+instead of going through the generic Contact.one_field_match for every contact.
+With a ContactIndex, the terms it can answer carry their postings: search_contacts starts from those,
+and only tests the other terms on the candidates. In 'all' mode the terms are ordered by estimated
+selectivity (the size of their postings), then by the cost of their test, so the cheapest, most selective
+test runs first. Query.explain() describes the chosen plan.
+"""
+
+from collections import OrderedDict
+from operator import attrgetter
+from src.contact_index import ContactIndex
+
+FIELDS = ('name', 'surname', 'address', 'phone', 'email', 'id')
+STRING_FIELDS = ('name', 'surname', 'address')
+DICT_FIELDS = ('phone', 'email')
+
+# relative cost of the test of a term, used to order terms of the same selectivity
+_COSTS = {'never': 0, 'string': 1, 'exact': 2, 'affix': 3, 'generic': 4}
+
+
+class Term:
+    """
+    One compiled criterion: test(contact) gives the same result as contact.one_field_match(field, value, label, mode).
+    postings holds the IDs matching the term when the index answers it, else None.
+    """
+    __slots__ = ('field', 'value', 'label', 'mode', 'kind', 'test', 'postings')
+
+    def __init__(self, field_name: str, search_value, label: str = None, mode: str = 'exact'):
+        if field_name not in FIELDS:
+            raise ValueError("Invalid field.")
+        if mode != 'exact' and (field_name != 'phone' or mode not in ('prefix', 'suffix')):
+            raise ValueError("Invalid match mode. Use 'exact', or 'prefix'/'suffix' for phone numbers.")
+        self.field = field_name
+        self.value = search_value
+        self.label = label
+        self.mode = mode
+        self.postings = None
+        self.kind, self.test = self._compile()
+
+    def _compile(self):
+        get = attrgetter(self.field)
+        label = self.label
+
+        if self.mode != 'exact':
+            digits = str(self.value)
+            if not digits.isdigit():
+                return 'never', lambda contact: False
+            if self.mode == 'prefix':
+                matches = lambda n: n.isdigit() and n.startswith(digits)
+            else:
+                matches = lambda n: n.isdigit() and n.endswith(digits)
+            if label:
+                return 'affix', lambda contact: any(map(matches, get(contact).get(label, ())))
+            return 'affix', lambda contact: any(matches(n) for values in get(contact).values() for n in values)
+
+        value = self.value
+        if self.field in DICT_FIELDS:
+            if label:
+                return 'exact', lambda contact: value in get(contact).get(label, [])
+            return 'exact', lambda contact: any(value in values for values in get(contact).values())
+        if self.field == 'id':
+            return 'never', lambda contact: False # id is not a string field, never matches
+        if not isinstance(value, str):
+            args = (self.field, value, label, self.mode)
+            return 'generic', lambda contact: contact.one_field_match(*args)
+        key = value.lower()
+
+        def test(contact) -> bool:
+            field_value = get(contact)
+            return isinstance(field_value, str) and field_value.lower() == key
+        return 'string', test
+
+    def __str__(self):
+        text = f"{self.field} {'=' if self.mode == 'exact' else self.mode} {self.value!r}"
+        return text + (f" [{self.label}]" if self.label else "")
+
+
+class Query:
+    """
+    Search criteria compiled once for a given how ('all' or 'any'), optionally against the index of a book.
+
+    - predicate(contact) is equivalent to contact.matches(how, *criteria).
+    - uses_index tells if the index gives the candidates: then candidates() returns their sorted IDs, and
+      residual(contact), if not None, tests the terms the index could not answer.
+    """
+
+    def __init__(self, how: str, criteria, index: ContactIndex = None, total: int = None):
+        if any(len(arg)<2 or len(arg)>4 for arg in criteria):
+            raise ValueError("Invalid length fo matching criteria. Provide filed name and value, optional label and match mode.")
+        if how not in ('all', 'any'):
+            raise ValueError("Invalid match mode. Use 'all' or 'any'.")
+        self.how = how
+        self.total = total
+        self.terms = [Term(*arg) for arg in criteria]
+        if index is not None:
+            for term in self.terms:
+                term.postings = index.lookup(term.field, term.value, term.label, term.mode)
+
+        indexed = [t for t in self.terms if t.postings is not None]
+        if how == 'all':
+            self.terms.sort(key=self._estimate)
+            self.uses_index = bool(indexed)
+        else:
+            self.terms.sort(key=lambda t: _COSTS[t.kind])
+            self.uses_index = bool(self.terms) and len(indexed) == len(self.terms)
+        self.predicate = self._combine([t.test for t in self.terms])
+        residual = [t.test for t in self.terms if t.postings is None]
+        self.residual = self._combine(residual) if self.uses_index and residual else None
+
+    def _estimate(self, term: Term) -> tuple:
+        """
+        Sort key of a term in 'all' mode: the number of contacts it may match, then the cost of its test.
+        """
+        if term.kind == 'never':
+            return (0, 0)
+        size = len(term.postings) if term.postings is not None else self.total if self.total is not None else float('inf')
+        return (size, _COSTS[term.kind])
+
+    def _combine(self, tests: list):
+        if len(tests) == 1:
+            return tests[0]
+        if self.how == 'all':
+            def predicate(contact) -> bool:
+                for test in tests:
+                    if not test(contact):
+                        return False
+                return True
+        else:
+            def predicate(contact) -> bool:
+                for test in tests:
+                    if test(contact):
+                        return True
+                return False
+        return predicate
+
+    def candidates(self) -> list[int]:
+        """
+        The sorted IDs given by the index: the intersection of the postings in 'all' mode
+        (residual must still be tested on them), their union in 'any' mode.
+        """
+        postings = [t.postings for t in self.terms if t.postings is not None]
+        if self.how == 'any':
+            return sorted(set().union(*postings))
+        ids = set(postings[0]).intersection(*postings[1:]) # terms are sorted, smallest postings first
+        return sorted(ids)
+
+    def explain(self) -> str:
+        """
+        Describe the plan: how the candidates are found and which tests run on them, in order.
+        """
+        n = len(self.terms)
+        if self.uses_index:
+            if self.how == 'all':
+                lines = [f"all of {n} criteria: intersect the index postings, smallest first, then test the rest"]
+            else:
+                lines = [f"any of {n} criteria: union of the index postings"]
+        else:
+            size = f"{self.total} contacts" if self.total is not None else "all the contacts"
+            lines = [f"{self.how} of {n} criteria: scan {size}, testing in this order"]
+        for i, term in enumerate(self.terms, 1):
+            if term.postings is not None and self.uses_index:
+                step = f"index   ({len(term.postings)} contacts)"
+            elif term.kind == 'never':
+                step = "test    (never matches)"
+            else:
+                step = f"test    ({term.kind})"
+            lines.append(f"  {i}. {step:<24} {term}")
+        return '\n'.join(lines)
+
+
+class QueryCache:
+    """
+    LRU cache of search results (the matching IDs), keyed on the normalized (how, show, criteria) of the search.
+    Each entry remembers the generation of the book it was computed at (see ContactBook.generation):
+    an entry from an older generation is stale, it is dropped and counted as a miss.
+    maxsize=0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[int, tuple[int, ...]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"<QueryCache: {len(self)}/{self.maxsize} entries, {self.hits} hits, {self.misses} misses>"
+
+    @staticmethod
+    def key(how, show, criteria) -> tuple | None:
+        """
+        Normalize a search so that equivalent ones share a key: string values lowercased, empty labels and the default
+        match mode made explicit, criteria order and duplicates ignored. Returns None if the search cannot be cached
+        (invalid criteria, or values that cannot be hashed).
+        """
+        terms = []
+        for arg in criteria:
+            if len(arg) < 2 or len(arg) > 4:
+                return None
+            field_name, value, label, mode = tuple(arg) + (None, 'exact')[len(arg) - 2:]
+            if field_name in STRING_FIELDS and isinstance(value, str):
+                value = value.lower()
+            elif mode in ('prefix', 'suffix'):
+                value = str(value)
+            terms.append((field_name, value, label or None, mode))
+        try:
+            return (how, show, frozenset(terms))
+        except TypeError:
+            return None
+
+    def get(self, key: tuple | None, generation: int) -> tuple[int, ...] | None:
+        """
+        Return the cached IDs for key if they were computed at this generation, else None.
+        """
+        if key is None or not self.maxsize:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != generation:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple | None, generation: int, ids):
+        if key is None or not self.maxsize:
+            return
+        self._entries[key] = (generation, tuple(ids))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,291 @@
+"""
+Binary snapshot format of a contact book (all integers little-endian):
+
+    header      magic b'CBSNAP\\0\\0', version (u32), number of records (u32),
+                offsets (u64) of the 7 sections below
+    strings     count (u64), count + 1 offsets (u64) into the blob, utf-8 blob. Every string is stored once.
+    records     count (u64), fixed-width records sorted by ID:
+                id (u64), name, surname, address (string numbers, u32),
+                first phone entry, phone entry count, first email entry, email entry count (u32)
+    entries     count (u64), (label, value) string numbers (u32) of all the phone and email entries
+    indexes     name, surname, phone, email: count (u64), (key, record, label) triples (u32) sorted by key string.
+                name/surname keys are lowercased, label is NO_LABEL for them.
+"""
+
+import mmap
+import struct
+from bisect import bisect_left
+from itertools import islice
+from src.contact import Contact
+from src.contact_book import ContactBook
+from src.contact_index import fingerprint, trigrams
+from src.query import Query, Term
+
+MAGIC = b'CBSNAP\0\0'
+VERSION = 1
+NO_LABEL = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<8sII7Q')
+_COUNT = struct.Struct('<Q')
+_OFFSET = struct.Struct('<Q')
+_RECORD = struct.Struct('<Q7I')
+_ENTRY = struct.Struct('<II')
+_POSTING = struct.Struct('<III')
+INDEXED_FIELDS = ('name', 'surname', 'phone', 'email')
+
+
+def write_snapshot(book: ContactBook, file_path: str) -> int:
+    """
+    Write the contacts of a book to a binary snapshot file, with prebuilt indexes. Returns the number of records.
+    Records are written in ID order, which the binary search of SnapshotContactBook._find relies on, whatever the
+    order of the book (e.g. loaded from an NDJSON file with unsorted IDs).
+    """
+    strings: dict[str, int] = {}
+
+    def sid(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    records, entries = [], []
+    postings = {field_name: [] for field_name in INDEXED_FIELDS}
+    for record in sorted(book._iter_records(), key=lambda record: record['id']):
+        n = len(records)
+        phone_start = len(entries)
+        for field_name in ('phone', 'email'):
+            if field_name == 'email':
+                email_start = len(entries)
+            for label, values in record[field_name].items():
+                for value in values:
+                    entries.append((sid(label), sid(value)))
+                    postings[field_name].append((value, n, sid(label)))
+        for field_name in ('name', 'surname'):
+            postings[field_name].append((record[field_name].lower(), n, NO_LABEL))
+        records.append((record['id'], sid(record['name']), sid(record['surname']), sid(record['address']),
+                        phone_start, email_start - phone_start, email_start, len(entries) - email_start))
+    for field_name in INDEXED_FIELDS:
+        postings[field_name].sort()
+        postings[field_name] = [(sid(key), n, label) for key, n, label in postings[field_name]]
+
+    encoded = [s.encode('utf-8') for s in strings]
+    with open(file_path, 'wb') as f:
+        f.write(b'\0' * _HEADER.size)
+        offsets = [f.tell()]
+        f.write(_COUNT.pack(len(encoded)))
+        position = 0
+        for data in encoded:
+            f.write(_OFFSET.pack(position))
+            position += len(data)
+        f.write(_OFFSET.pack(position))
+        for data in encoded:
+            f.write(data)
+        offsets.append(f.tell())
+        f.write(_COUNT.pack(len(records)))
+        for record in records:
+            f.write(_RECORD.pack(*record))
+        offsets.append(f.tell())
+        f.write(_COUNT.pack(len(entries)))
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+        for field_name in INDEXED_FIELDS:
+            offsets.append(f.tell())
+            f.write(_COUNT.pack(len(postings[field_name])))
+            for posting in postings[field_name]:
+                f.write(_POSTING.pack(*posting))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records), *offsets))
+    return len(records)
+
+
+class SnapshotContactBook(ContactBook):
+    """
+    A read-only ContactBook over a binary snapshot file (see write_snapshot), opened with mmap.
+    Opening costs a header read, whatever the size of the book: records are decoded when
+    get_contact_by_id, search_contacts or display touch them, and exact searches use the prebuilt indexes.
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__()
+        with open(file_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._n, *offsets = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a contact book snapshot.")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}.")
+        strings, records, entries, *indexes = offsets
+        (n_strings,) = _COUNT.unpack_from(self._mm, strings)
+        self._string_offsets = strings + _COUNT.size
+        self._blob = self._string_offsets + (n_strings + 1) * _OFFSET.size
+        self._records = records + _COUNT.size
+        self._entries = entries + _COUNT.size
+        self._indexes = {field_name: (offset + _COUNT.size, _COUNT.unpack_from(self._mm, offset)[0])
+                         for field_name, offset in zip(INDEXED_FIELDS, indexes)}
+        self.next_id = self._record(self._n - 1)[0] + 1 if self._n else 1
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- decoding ---
+
+    def _string(self, i: int) -> str:
+        start, end = struct.unpack_from('<QQ', self._mm, self._string_offsets + i * _OFFSET.size)
+        return self._mm[self._blob + start:self._blob + end].decode('utf-8')
+
+    def _record(self, n: int) -> tuple:
+        return _RECORD.unpack_from(self._mm, self._records + n * _RECORD.size)
+
+    def _labelled(self, start: int, count: int) -> dict[str, list[str]]:
+        values = {}
+        for i in range(start, start + count):
+            label, value = _ENTRY.unpack_from(self._mm, self._entries + i * _ENTRY.size)
+            values.setdefault(self._string(label), []).append(self._string(value))
+        return values
+
+    def _decode(self, n: int) -> Contact:
+        id, name, surname, address, phone_start, phone_count, email_start, email_count = self._record(n)
+        return Contact.from_normalized(self._string(name), self._string(surname), self._labelled(phone_start, phone_count),
+                                       self._labelled(email_start, email_count), self._string(address), id)
+
+    def _lower_bound(self, id: int) -> int:
+        """
+        Return the number of the first record with an ID greater than or equal to id.
+        """
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, id: int) -> int | None:
+        n = self._lower_bound(id)
+        return n if n < self._n and self._record(n)[0] == id else None
+
+    def _postings(self, field_name: str, key: str):
+        """
+        Yield the (record, label) pairs of the index of a field whose key equals key.
+        """
+        offset, count = self._indexes[field_name]
+        posting = lambda i: _POSTING.unpack_from(self._mm, offset + i * _POSTING.size)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(posting(mid)[0]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < count:
+            key_id, n, label = posting(lo)
+            if self._string(key_id) != key:
+                return
+            yield n, label
+            lo += 1
+
+    def _lookup(self, field_name: str, search_value, label: str = None, mode: str = 'exact') -> set[int] | None:
+        """
+        Return the records matching one criterion from the indexes, or None if it needs a scan.
+        """
+        if mode != 'exact' or not isinstance(search_value, str) or field_name not in INDEXED_FIELDS:
+            return None
+        if field_name in ('name', 'surname'):
+            return {n for n, _ in self._postings(field_name, search_value.lower())}
+        return {n for n, l in self._postings(field_name, search_value) if not label or self._string(l) == label}
+
+    # --- read API ---
+
+    @property
+    def contacts(self) -> list[Contact]:
+        return [self._decode(n) for n in range(self._n)]
+
+    def _iter_records(self):
+        for n in range(self._n):
+            yield self._decode(n).to_dict()
+
+    def count_contacts(self) -> int:
+        return self._n
+
+    def get_contact_by_id(self, id: int) -> Contact | bool:
+        n = self._find(id)
+        return False if n is None else self._decode(n)
+
+    def _iter_search_ids(self, how, criteria, after: int = None):
+        """
+        Exact criteria on name, surname, phone and email use the indexes of the snapshot, others decode and scan the records.
+        """
+        start = 0 if after is None else self._lower_bound(after + 1)
+        query = Query(how, criteria)
+        postings = [self._lookup(*arg) for arg in criteria]
+        if criteria and None not in postings:
+            records = sorted(set.intersection(*postings) if how == 'all' else set.union(*postings))
+            records = records[bisect_left(records, start):]
+        else:
+            records = (n for n in range(start, self._n) if query.predicate(self._decode(n)))
+        return (self._record(n)[0] for n in records)
+
+    def explain(self, how='all', *criteria) -> str:
+        """
+        Describe how search_contacts runs the criteria: from the indexes of the snapshot when they answer all of them,
+        else with a scan decoding the records, as ContactBook without an index.
+        """
+        query = Query(how, criteria, total=self._n)
+        postings = [self._lookup(*arg) for arg in criteria]
+        if not criteria or None in postings:
+            return query.explain()
+        combine = "intersect" if how == 'all' else "union of"
+        lines = [f"{how} of {len(criteria)} criteria: {combine} the snapshot indexes"]
+        for i, (arg, records) in enumerate(zip(criteria, postings), 1):
+            step = f"index   ({len(records)} contacts)"
+            lines.append(f"  {i}. {step:<24} {Term(*arg)}")
+        return '\n'.join(lines)
+
+    def _search_ids(self, how, show, criteria, workers: int = 0) -> list[int]:
+        ids = self._iter_search_ids(how, criteria)
+        return list(islice(ids, 1)) if show == 'first' else list(ids)
+
+    def _get_many(self, ids) -> list[Contact]:
+        return [self._decode(self._find(id)) for id in ids]
+
+    def _same_name_ids(self, contact: Contact) -> list[int]:
+        """
+        Same as ContactBook, through the name and surname indexes of the snapshot.
+        """
+        return self._search_ids('all', 'all', (('name', contact.name), ('surname', contact.surname)))
+
+    def _same_content_ids(self, contact: Contact) -> list[int]:
+        key = fingerprint(contact)
+        return [c.id for c in self._get_many(self._same_name_ids(contact)) if fingerprint(c) == key]
+
+    def fuzzy_search(self, value: str, field: str = None, k: int = 10, min_score: float = 0.3) -> list[tuple[Contact, float]]:
+        """
+        Same as ContactBook.fuzzy_search, computed with a scan of the names and surnames of the records.
+        """
+        if field not in (None, 'name', 'surname'):
+            raise ValueError("Invalid field. Fuzzy search supports 'name' and 'surname'.")
+        grams = trigrams(value)
+        positions = {'name': 1, 'surname': 2}
+        scored = []
+        for n in range(self._n):
+            record = self._record(n)
+            score = 0
+            for field_name in ((field,) if field else ('name', 'surname')):
+                other = trigrams(self._string(record[positions[field_name]]))
+                score = max(score, 2 * len(grams & other) / (len(grams) + len(other)))
+            if score >= min_score:
+                scored.append((-score, n))
+        scored.sort()
+        return [(self._decode(n), -score) for score, n in scored[:k]]
+
+    # --- the snapshot is read-only ---
+
+    def _read_only(self, *args, **kwargs):
+        print("This contact book is read-only.")
+        return False
+
+    add_contact = add_contacts = remove_contact = remove_by_id = update_contact = merge_contacts = load_from_json = load_from_ndjson = import_from_csv = import_from_vcard = attach_journal = _read_only
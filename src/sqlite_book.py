@@ -0,0 +1,336 @@
+import sqlite3
+from src.contact import Contact, CompactContact
+from src.contact_book import ContactBook
+from src.contact_index import fingerprint, trigrams
+from src.query import QueryCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    surname TEXT NOT NULL,
+    address TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    surname_key TEXT NOT NULL,
+    address_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    value TEXT NOT NULL,
+    value_rev TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS emails (
+    contact_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+CREATE INDEX IF NOT EXISTS contacts_name ON contacts (name_key);
+CREATE INDEX IF NOT EXISTS contacts_surname ON contacts (surname_key);
+CREATE INDEX IF NOT EXISTS contacts_address ON contacts (address_key);
+CREATE INDEX IF NOT EXISTS phones_contact ON phones (contact_id);
+CREATE INDEX IF NOT EXISTS phones_value ON phones (value, label);
+CREATE INDEX IF NOT EXISTS phones_value_rev ON phones (value_rev, label);
+CREATE INDEX IF NOT EXISTS emails_contact ON emails (contact_id);
+CREATE INDEX IF NOT EXISTS emails_value ON emails (value, label);
+"""
+
+_BATCH = 500  # IDs per query when fetching phone numbers and emails
+
+
+class SqliteContactBook(ContactBook):
+    """
+    A ContactBook stored in a SQLite database, for books larger than memory and durable single-record updates.
+    Phone numbers and emails live in their own tables, and every searchable field is indexed:
+    search_contacts criteria are translated into one SQL query.
+    Contacts returned by the book are copies, modify them through the book (update_contact).
+    Use SqliteContactBook.from_json to migrate an existing JSON book.
+    """
+    LAZY_LOAD = False # rows are written as they are loaded
+
+    def __init__(self, db_path: str = ':memory:'):
+        super().__init__()
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript(_SCHEMA)
+        self.cache = QueryCache(0)  # other connections can change the database without bumping self.generation
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        self.next_id = row[0] if row else 1
+
+    @classmethod
+    def from_json(cls, json_path: str, db_path: str) -> 'SqliteContactBook':
+        """
+        One-shot migration of a JSON contact book into a new SQLite database.
+        """
+        book = cls(db_path)
+        book.load_from_json(json_path)
+        return book
+
+    def close(self):
+        self._db.close()
+
+    # --- storage ---
+
+    @staticmethod
+    def _row(contact: Contact) -> tuple:
+        return (contact.id, contact.name, contact.surname, contact.address,
+                contact.name.lower(), contact.surname.lower(), contact.address.lower())
+
+    @staticmethod
+    def _entries(contact: Contact, field_name: str) -> list[tuple]:
+        entries = [(label, value) for label, values in getattr(contact, field_name).items() for value in values]
+        if field_name == 'phone':
+            return [(contact.id, i, label, n, n[::-1]) for i, (label, n) in enumerate(entries)]
+        return [(contact.id, i, label, e) for i, (label, e) in enumerate(entries)]
+
+    def _put(self, contact: Contact):
+        self.generation += 1
+        db = self._db
+        db.execute("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(contact))
+        db.execute("DELETE FROM phones WHERE contact_id = ?", (contact.id,))
+        db.execute("DELETE FROM emails WHERE contact_id = ?", (contact.id,))
+        db.executemany("INSERT INTO phones VALUES (?, ?, ?, ?, ?)", self._entries(contact, 'phone'))
+        db.executemany("INSERT INTO emails VALUES (?, ?, ?, ?)", self._entries(contact, 'email'))
+        self._set_next_id(contact.id + 1)
+
+    def _put_many(self, contacts: list[Contact]):
+        self.generation += 1
+        db = self._db
+        db.executemany("INSERT INTO contacts VALUES (?, ?, ?, ?, ?, ?, ?)", map(self._row, contacts))
+        db.executemany("INSERT INTO phones VALUES (?, ?, ?, ?, ?)", (e for c in contacts for e in self._entries(c, 'phone')))
+        db.executemany("INSERT INTO emails VALUES (?, ?, ?, ?)", (e for c in contacts for e in self._entries(c, 'email')))
+        self._set_next_id(contacts[-1].id + 1)
+
+    def _set_next_id(self, next_id: int):
+        if next_id > self.next_id:
+            self.next_id = next_id
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('next_id', ?)", (next_id,))
+
+    def _discard(self, id: int) -> Contact | None:
+        contact = self.get_contact_by_id(id)
+        if not contact:
+            return None
+        self.generation += 1
+        for table, column in (('contacts', 'id'), ('phones', 'contact_id'), ('emails', 'contact_id')):
+            self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (id,))
+        return contact
+
+    def _holds(self, contact: Contact) -> bool:
+        stored = self.get_contact_by_id(contact.id)
+        return bool(stored) and CompactContact.from_contact(stored) == contact
+
+    def _rollback(self, first_id: int):
+        self._db.rollback()
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        self.next_id = row[0] if row else 1
+
+    def _fetch(self, ids: list[int]) -> list[Contact]:
+        """
+        Materialize the contacts with the given IDs, in the same order.
+        """
+        contacts = []
+        for i in range(0, len(ids), _BATCH):
+            batch = ids[i:i + _BATCH]
+            marks = ','.join('?' * len(batch))
+            rows = {row[0]: row for row in self._db.execute(
+                f"SELECT id, name, surname, address FROM contacts WHERE id IN ({marks})", batch)}
+            phones, emails = {}, {}
+            for table, values in (('phones', phones), ('emails', emails)):
+                for id, label, value in self._db.execute(
+                        f"SELECT contact_id, label, value FROM {table} WHERE contact_id IN ({marks}) "
+                        f"ORDER BY contact_id, position", batch):
+                    values.setdefault(id, {}).setdefault(label, []).append(value)
+            contacts.extend(Contact.from_normalized(rows[id][1], rows[id][2], phones.get(id, {}), emails.get(id, {}),
+                                                    rows[id][3], id) for id in batch if id in rows)
+        return contacts
+
+    def _iter_ids(self):
+        cursor = self._db.execute("SELECT id FROM contacts ORDER BY id")
+        while True:
+            ids = [row[0] for row in cursor.fetchmany(_BATCH)]
+            if not ids:
+                return
+            yield ids
+
+    # --- ContactBook API ---
+
+    @property
+    def contacts(self) -> list[Contact]:
+        return [c for ids in self._iter_ids() for c in self._fetch(ids)]
+
+    @contacts.setter
+    def contacts(self, contacts: list[Contact]):
+        with self._db:
+            self.generation += 1
+            for table in ('contacts', 'phones', 'emails'):
+                self._db.execute(f"DELETE FROM {table}")
+            for contact in contacts:
+                if contact.id is None:
+                    contact.id = self.next_id
+                self._put(contact)
+
+    def _iter_records(self):
+        for ids in self._iter_ids():
+            for contact in self._fetch(ids):
+                yield contact.to_dict()
+
+    def count_contacts(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def get_contact_by_id(self, id: int) -> Contact | bool:
+        contacts = self._fetch([id])
+        return contacts[0] if contacts else False
+
+    def add_contact(self, contact: Contact):
+        with self._db:
+            super().add_contact(contact)
+
+    def add_contacts(self, contacts, echo: int = 0, every: int = 1) -> int:
+        with self._db:
+            return super().add_contacts(contacts, echo, every)
+
+    def remove_by_id(self, id: int) -> Contact | bool:
+        with self._db:
+            return super().remove_by_id(id)
+
+    def merge_contacts(self, ids) -> Contact | bool:
+        with self._db:
+            return super().merge_contacts(ids)
+
+    def update_contact(self, contact: Contact, updates: list[dict]):
+        """
+        Update a given contact with one or more fields, and store the result.
+        """
+        held = bool(self.get_contact_by_id(contact.id))
+        try:
+            res = contact.update_multiple(updates)
+            if res: #if aborted, returns False; else True
+                self.modified = True
+        except Exception as e:
+            print(f"Update failed. Exception: {e}")
+        if held:
+            with self._db:
+                self._put(contact)
+            self._log('update', contact)
+
+    def load_from_json(self, file_path: str, progress=None, journal: str = None, echo: int = 0, every: int = 1,
+                       workers: int = 0, lazy: bool = False):
+        super().load_from_json(file_path, progress, journal, echo, every, workers, lazy)
+        self._db.commit()
+
+    def load_from_ndjson(self, file_path: str, progress=None, echo: int = 0, every: int = 1, workers: int = 0,
+                         limit: int = None, lazy: bool = False):
+        super().load_from_ndjson(file_path, progress, echo, every, workers, limit, lazy)
+        self._db.commit()
+
+    def _import_file(self, file_path: str, kind: str, read, chunk_size: int, progress, echo: int, every: int) -> int:
+        count = super()._import_file(file_path, kind, read, chunk_size, progress, echo, every)
+        self._db.commit()
+        return count
+
+    @staticmethod
+    def _where(field_name: str, search_value, label: str = None, mode: str = 'exact') -> tuple[str, list]:
+        """
+        Translate one criterion into a SQL condition on the contacts table, with the semantics of Contact.one_field_match.
+        """
+        if field_name not in ('name', 'surname', 'address', 'phone', 'email', 'id'):
+            raise ValueError("Invalid field.")
+        label_sql, label_args = (" AND label = ?", [label]) if label else ("", [])
+
+        if mode != 'exact':
+            if field_name != 'phone' or mode not in ('prefix', 'suffix'):
+                raise ValueError("Invalid match mode. Use 'exact', or 'prefix'/'suffix' for phone numbers.")
+            search_value = str(search_value)
+            if not search_value.isdigit():
+                return "0", []
+            column = 'value' if mode == 'prefix' else 'value_rev'
+            key = search_value if mode == 'prefix' else search_value[::-1]
+            # digits sort before ':', so this range holds exactly the numbers starting with key
+            return (f"id IN (SELECT contact_id FROM phones WHERE {column} >= ? AND {column} < ?{label_sql})",
+                    [key, key + ':', *label_args])
+
+        if field_name in ('phone', 'email'):
+            if not isinstance(search_value, str):
+                return "0", []
+            return (f"id IN (SELECT contact_id FROM {field_name}s WHERE value = ?{label_sql})",
+                    [search_value, *label_args])
+        if field_name == 'id':
+            return "0", [] # id is not a string field, never matches
+        return f"{field_name}_key = ?", [search_value.lower()]
+
+    def _select(self, how, criteria, after: int = None, limit: int = None):
+        """
+        Run the search as a single indexed SQL query, returning a cursor over the matching IDs in ID order.
+        """
+        return self._db.execute(*self._sql(how, criteria, after, limit))
+
+    def _sql(self, how, criteria, after: int = None, limit: int = None) -> tuple[str, list]:
+        """
+        Build the SQL query of a search and its arguments, see _select.
+        """
+        if any(len(arg)<2 or len(arg)>4 for arg in criteria):
+            raise ValueError("Invalid length fo matching criteria. Provide filed name and value, optional label and match mode.")
+        if how not in ('all', 'any'):
+            raise ValueError("Invalid match mode. Use 'all' or 'any'.")
+
+        conditions, args = [], []
+        for arg in criteria:
+            condition, condition_args = self._where(*arg)
+            conditions.append(f"({condition})")
+            args.extend(condition_args)
+        where = (' AND ' if how == 'all' else ' OR ').join(conditions) or ('1' if how == 'all' else '0')
+        if after is not None:
+            where = f"({where}) AND id > ?"
+            args.append(after)
+        limit = f" LIMIT {int(limit)}" if limit is not None else ""
+        return f"SELECT id FROM contacts WHERE {where} ORDER BY id{limit}", args
+
+    def explain(self, how='all', *criteria) -> str:
+        """
+        Describe how search_contacts runs the criteria: the SQL query, then the plan of SQLite for it (EXPLAIN QUERY PLAN).
+        """
+        sql, args = self._sql(how, criteria)
+        plan = self._db.execute("EXPLAIN QUERY PLAN " + sql, args).fetchall()
+        return '\n'.join([f"{sql} {args}"] + [f"  {row[-1]}" for row in plan])
+
+    def _search_ids(self, how, show, criteria, workers: int = 0) -> list[int]:
+        return [row[0] for row in self._select(how, criteria, limit=1 if show == 'first' else None)]
+
+    def _iter_search_ids(self, how, criteria, after: int = None):
+        return (row[0] for row in self._select(how, criteria, after))
+
+    def _get_many(self, ids) -> list[Contact]:
+        return self._fetch(list(ids))
+
+    def _same_name_ids(self, contact: Contact) -> list[int]:
+        """
+        Same as ContactBook, with a query on the indexed lowercased name and surname.
+        """
+        return self._search_ids('all', 'all', (('name', contact.name), ('surname', contact.surname)))
+
+    def _same_content_ids(self, contact: Contact) -> list[int]:
+        key = fingerprint(contact)
+        return [c.id for c in self._get_many(self._same_name_ids(contact)) if fingerprint(c) == key]
+
+    def fuzzy_search(self, value: str, field: str = None, k: int = 10, min_score: float = 0.3) -> list[tuple[Contact, float]]:
+        """
+        Same as ContactBook.fuzzy_search, computed with a scan of the names and surnames.
+        """
+        if field not in (None, 'name', 'surname'):
+            raise ValueError("Invalid field. Fuzzy search supports 'name' and 'surname'.")
+        grams = trigrams(value)
+        scored = []
+        for id, name, surname in self._db.execute("SELECT id, name, surname FROM contacts ORDER BY id"):
+            score = 0
+            for field_name, field_value in (('name', name), ('surname', surname)):
+                if field in (None, field_name):
+                    other = trigrams(field_value)
+                    score = max(score, 2 * len(grams & other) / (len(grams) + len(other)))
+            if score >= min_score:
+                scored.append((-score, id))
+        scored.sort()
+        scores = {id: -score for score, id in scored[:k]}
+        return [(c, scores[c.id]) for c in self._fetch(list(scores))]
@@ -0,0 +1,111 @@
+INVALID_PHONE = 'invalid_phone'
+INVALID_EMAIL = 'invalid_email'
+KINDS = {INVALID_PHONE: 'phone', INVALID_EMAIL: 'email'}  # error kind -> field holding the 'error' values
+
+MESSAGES = {
+    INVALID_PHONE: "Some phone numbers were not numeric and could not be loaded. They have been stored as 'error'.",
+    INVALID_EMAIL: "Some emails did not respect the email format (text_or_puntuation@text.text-optional.text) and could not be loaded. They have been stored as 'error'.",
+}
+SEARCH_HINT = "These can be found using the search function and searching for the value 'error'."
+
+
+def contact_errors(contact) -> dict[str, int]:
+    """
+    Return the number of invalid values of a contact (stored as 'error' by the normalization) per error kind.
+    """
+    errors = {}
+    for kind, field_name in KINDS.items():
+        n = sum(values.count('error') for values in getattr(contact, field_name).values())
+        if n:
+            errors[kind] = n
+    return errors
+
+
+def print_contact_errors(contact):
+    """
+    Print the warnings for the invalid values of a single contact, e.g. one typed in the CLI.
+    """
+    errors = contact_errors(contact)
+    for kind in errors:
+        print(MESSAGES[kind])
+    if errors:
+        print(SEARCH_HINT)
+
+
+class ValidationReport:
+    """
+    The invalid values found while loading or importing contacts: counts per error kind
+    (see KINDS) and the IDs of the affected contacts, in the order they were checked.
+    dropped lists the IDs of the records of a lazy load that could not be converted at all, see ContactBook._hydrate.
+
+    Nothing is printed while checking unless echo is set: then the first echo issues are printed,
+    one in every `every` issues if given (a sample of a large import), and the rest are only counted.
+    """
+
+    def __init__(self, echo: int = 0, every: int = 1):
+        if every < 1:
+            raise ValueError("every must be at least 1.")
+        self.counts: dict[str, int] = {kind: 0 for kind in KINDS}  # number of invalid values
+        self.ids: dict[str, list[int]] = {kind: [] for kind in KINDS}  # contacts with at least one invalid value
+        self.dropped: list[int] = []  # records that could not be converted, removed from the book
+        self.echo = echo
+        self.every = every
+        self._seen = 0
+        self._echoed = 0
+
+    def __len__(self) -> int:
+        return sum(self.counts.values()) + len(self.dropped)
+
+    def __repr__(self):
+        return f"<ValidationReport: {', '.join(f'{kind}={n}' for kind, n in self.counts.items())}>"
+
+    def check(self, contact) -> dict[str, int]:
+        """
+        Record the invalid values of a contact, which must have its ID. Returns them per error kind.
+        """
+        errors = contact_errors(contact)
+        for kind, n in errors.items():
+            self.counts[kind] += n
+            self.ids[kind].append(contact.id)
+            if self.echo:
+                self._echo(kind, contact)
+        return errors
+
+    def drop(self, id: int, error: Exception):
+        """
+        Record a raw record that could not be converted into a contact, and print why.
+        """
+        self.dropped.append(id)
+        print(f"[{id}] could not be read and was removed from the book: {error}")
+
+    def _echo(self, kind: str, contact):
+        self._seen += 1
+        if self._echoed < self.echo and (self._seen - 1) % self.every == 0:
+            self._echoed += 1
+            print(f"[{contact.id}] {contact.name} {contact.surname}: {kind.replace('_', ' ')} stored as 'error'.")
+            if self._echoed == self.echo:
+                print("Further invalid values are counted without being printed.")
+
+    def merge(self, other: 'ValidationReport'):
+        """
+        Add the issues of another report (e.g. of another chunk of the same load) to this one.
+        """
+        for kind in KINDS:
+            self.counts[kind] += other.counts[kind]
+            self.ids[kind].extend(other.ids[kind])
+        self.dropped.extend(other.dropped)
+
+    def summary(self) -> str:
+        """
+        One line per error kind with its count, followed by how to find the invalid values. Empty if there are none.
+        """
+        if not self:
+            return ""
+        names = {INVALID_PHONE: 'phone numbers', INVALID_EMAIL: 'emails'}
+        lines = [f"{self.counts[kind]} invalid {names[kind]} in {len(self.ids[kind])} contacts have been stored as 'error'."
+                 for kind in KINDS if self.counts[kind]]
+        if lines:
+            lines.append(SEARCH_HINT)
+        if self.dropped:
+            lines.append(f"{len(self.dropped)} unreadable records have been removed from the book.")
+        return '\n'.join(lines)
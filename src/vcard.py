@@ -0,0 +1,247 @@
+"""
+Streaming vCard 3.0/4.0 reader and writer for contact books, see ContactBook.export_to_vcard and import_from_vcard.
+
+The reader goes through the file line by line, unfolding continuation lines, and yields one contact per BEGIN:VCARD ...
+END:VCARD block, so only the card being read is held in memory. It maps the vCard properties onto the fields of Contact:
+
+- N (or FN when there is no N) gives name and surname, ADR (or LABEL) the address.
+- TEL and EMAIL values are stored under the label given by their TYPE parameter (see PHONE_TYPES and EMAIL_TYPES),
+  'other' when no type is known. Phone numbers lose their formatting (spaces, dashes, dots, parentheses, a tel: URI)
+  and a leading '+' becomes the international prefix '00', so that they are stored as digits.
+
+Other properties are ignored.
+"""
+
+from src.compression import stream_size
+
+VERSIONS = ('3.0', '4.0')
+# vCard TYPE -> label, in order of precedence when a value has several types
+PHONE_TYPES = {'cell': 'mobile', 'mobile': 'mobile', 'iphone': 'mobile', 'home': 'home', 'work': 'work'}
+EMAIL_TYPES = {'home': 'personal', 'personal': 'personal', 'work': 'work'}
+# label -> vCard TYPE, labels not listed are written as their own TYPE ('other' is written without one)
+PHONE_LABELS = {'mobile': 'cell', 'home': 'home', 'work': 'work', 'other': None}
+EMAIL_LABELS = {'personal': 'home', 'work': 'work', 'other': None}
+_FOLD = 75  # maximum length of a line in octets, without the line break
+_PROGRESS_LINES = 10000  # lines read between two calls of progress
+
+
+def escape(value: str) -> str:
+    """
+    Escape a text value for a content line: backslashes, line breaks, commas and semicolons.
+    """
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace(',', '\\,').replace(';', '\\;')
+
+
+def unescape(value: str) -> str:
+    """
+    Undo the escaping of a vCard text value: \\n (or \\N), \\, \\; and \\\\.
+    """
+    if '\\' not in value:
+        return value
+    out, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            out.append('\n' if char in 'nN' else char)
+        else:
+            out.append(char)
+    return ''.join(out)
+
+
+def split_escaped(value: str, separator: str) -> list[str]:
+    """
+    Split a structured value (e.g. N or ADR) on the separators that are not escaped, and unescape the parts.
+    """
+    if '\\' not in value:
+        return value.split(separator)
+    parts, start, i = [], 0, 0
+    while i < len(value):
+        if value[i] == '\\':
+            i += 2
+            continue
+        if value[i] == separator:
+            parts.append(unescape(value[start:i]))
+            start = i + 1
+        i += 1
+    parts.append(unescape(value[start:]))
+    return parts
+
+
+def _fold(line: str) -> str:
+    """
+    Fold a content line into lines of at most _FOLD octets, without cutting a UTF-8 character.
+    """
+    if len(line) <= _FOLD // 4 or len(line.encode('utf-8')) <= _FOLD:
+        return line + '\r\n'
+    parts, current, size = [], [], 0
+    for char in line:
+        n = len(char.encode('utf-8'))
+        if size + n > _FOLD:
+            parts.append(''.join(current))
+            current, size = [' '], 1  # continuation lines start with a space
+        current.append(char)
+        size += n
+    parts.append(''.join(current))
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _property(line: str) -> tuple[str, dict[str, list[str]], str]:
+    """
+    Split an unfolded content line into its uppercased name (without group), its parameters and its raw value.
+    Parameters are name -> lowercased values; bare parameters of vCard 2.1 (TEL;HOME;CELL:...) count as TYPE.
+    """
+    i = line.find(':')
+    if '"' in line[:i]:  # the first ':' may be inside a quoted parameter value
+        quoted = False
+        for i, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ':' and not quoted:
+                break
+        else:
+            i = -1
+    if i < 0:
+        return '', {}, ''
+    head, value = line[:i], line[i + 1:]
+    name, *params = head.split(';')
+    params_dict: dict[str, list[str]] = {}
+    for param in params:
+        key, equals, values = param.partition('=')
+        if not equals:
+            key, values = 'TYPE', key
+        params_dict.setdefault(key.strip().upper(), []).extend(
+            v.strip().strip('"').lower() for v in values.split(',') if v.strip())
+    return name.rpartition('.')[2].strip().upper(), params_dict, value
+
+
+def _label(types: list[str], mapping: dict[str, str]) -> str:
+    for vcard_type, label in mapping.items():
+        if vcard_type in types:
+            return label
+    return 'other'
+
+
+def _phone_number(value: str) -> str:
+    number = value.strip()
+    if number[:4].lower() == 'tel:':
+        number = number[4:].split(';')[0]  # drop the URI parameters, e.g. ;ext=
+    for char in ' -.()/':
+        number = number.replace(char, '')
+    if number.startswith('+'):
+        number = '00' + number[1:]
+    return number
+
+
+def _entry(lines: list[str]) -> dict:
+    """
+    Build a raw contact entry (see Contact.from_dict) from the unfolded lines of a card.
+    """
+    entry = {'name': '', 'surname': '', 'phone': {}, 'email': {}, 'address': ''}
+    full_name = address = label = None
+    for line in lines:
+        name, params, value = _property(line)
+        if name == 'N':
+            parts = split_escaped(value, ';') + ['', '']
+            entry['surname'], entry['name'] = parts[0].strip(), parts[1].strip()
+        elif name == 'FN':
+            full_name = unescape(value).strip()
+        elif name == 'TEL':
+            number = _phone_number(value)
+            if number:
+                entry['phone'].setdefault(_label(params.get('TYPE', []), PHONE_TYPES), []).append(number)
+        elif name == 'EMAIL':
+            email = unescape(value).strip()
+            if email:
+                entry['email'].setdefault(_label(params.get('TYPE', []), EMAIL_TYPES), []).append(email)
+        elif name == 'ADR' and address is None:
+            address = ', '.join(part.strip() for part in split_escaped(value, ';') if part.strip())
+        elif name == 'LABEL' and label is None:
+            label = unescape(value).strip().replace('\n', ', ')
+    if not (entry['name'] or entry['surname']) and full_name:
+        entry['name'], _, entry['surname'] = full_name.partition(' ')
+    entry['address'] = address or label or ''
+    return entry
+
+
+def _lines(f, progress, total):
+    """
+    Yield the unfolded content lines of a binary file, calling progress(bytes_read, total) every _PROGRESS_LINES lines.
+    """
+    bytes_read = 0
+    current = None
+    for n, raw in enumerate(f, 1):
+        bytes_read += len(raw)
+        if progress and n % _PROGRESS_LINES == 0:
+            progress(bytes_read, total)
+        line = raw.decode('utf-8-sig' if n == 1 else 'utf-8').rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+    if progress:
+        progress(bytes_read, total)
+
+
+def iter_vcard_contacts(f, progress=None):
+    """
+    Yield the cards of a vCard file one at a time, as raw entries for Contact.from_dict. f must be a file opened in
+    binary mode. progress, if given, is called as progress(bytes_read, total_bytes) while reading.
+    Raises ValueError if a card is not closed.
+    """
+    total = stream_size(f)
+    card = None
+    for line in _lines(f, progress, total):
+        key = line.strip().upper()
+        if key == 'BEGIN:VCARD':
+            card = []
+        elif key == 'END:VCARD':
+            if card is not None:
+                yield _entry(card)
+            card = None
+        elif card is not None and line.strip():
+            card.append(line)
+    if card is not None:
+        raise ValueError("Invalid vCard: the last card has no END:VCARD.")
+
+
+def _card(record: dict, version: str) -> str:
+    name, surname = escape(record["name"]), escape(record["surname"])
+    lines = ['BEGIN:VCARD', f'VERSION:{version}', f'N:{surname};{name};;;', f'FN:{escape(" ".join(filter(None, (record["name"], record["surname"]))))}']
+    for values, labels, prop in ((record["phone"], PHONE_LABELS, 'TEL'), (record["email"], EMAIL_LABELS, 'EMAIL')):
+        for label, items in values.items():
+            vcard_type = labels.get(label, label)
+            params = f';TYPE={vcard_type}' if vcard_type and vcard_type.replace('-', '').isalnum() else ''
+            for item in items:
+                if item == 'error':
+                    continue  # the invalid value it stands for was not kept
+                if prop == 'TEL' and version == '4.0':
+                    lines.append(f'TEL;VALUE=uri{params}:tel:{item}')
+                else:
+                    lines.append(f'{prop}{params}:{escape(item)}')
+    if record["address"]:
+        lines.append(f'ADR:;;{escape(record["address"])};;;;')
+    lines.append('END:VCARD')
+    return ''.join(map(_fold, lines))
+
+
+def write_vcard_contacts(f, records, version: str = '3.0', chunk_size: int = 1000) -> int:
+    """
+    Write contact records (dicts, see Contact.to_dict) to a text file opened with newline='' as vCards of the given version,
+    chunk_size cards at a time. Values stored as 'error' are left out. Returns the number of cards written.
+    """
+    if version not in VERSIONS:
+        raise ValueError("Invalid vCard version. Use '3.0' or '4.0'.")
+    count = 0
+    chunk = []
+    for record in records:
+        chunk.append(_card(record, version))
+        if len(chunk) >= chunk_size:
+            f.write(''.join(chunk))
+            count += len(chunk)
+            chunk = []
+    f.write(''.join(chunk))
+    return count + len(chunk)
@@ -0,0 +1,98 @@
+import unittest
+import os
+from src.contact_book import ContactBook
+from src.columnar_book import ColumnarContactBook
+from src.sqlite_book import SqliteContactBook
+from src.contact import Contact
+from src.book_diff import BookDiff, content_counts
+
+class TestBookDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = [
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234"], "home": ["555"]}, "address": "Main St"},
+            {"name": "Bob", "surname": "Smith", "email": "bob@mail.com"},
+            {"name": "Carl", "surname": "White"},
+        ]
+        self.book = ContactBook()
+        self.book.add_contacts(self.entries)
+        self.other = ContactBook()
+        self.other.add_contacts(self.entries)
+
+    def test_no_differences(self):
+        diff = self.book.diff(self.other)
+        self.assertEqual(diff, BookDiff())
+        self.assertFalse(diff)
+        self.assertEqual(diff.summary(), "0 added, 0 removed, 0 changed")
+
+    def test_added_removed_changed(self):
+        self.other.remove_by_id(2)
+        self.other.add_contact(Contact(name="Dan", surname="Grey"))
+        self.other.update_contact(self.other.get_contact_by_id(1), [{'field': 'address', 'value': 'Elm St'}])
+        diff = self.book.diff(self.other)
+        self.assertEqual((diff.added, diff.removed, diff.changed), ([4], [2], [1]))
+        self.assertEqual(diff.summary(), "1 added, 1 removed, 1 changed")
+        reverse = self.other.diff(self.book)
+        self.assertEqual((reverse.added, reverse.removed, reverse.changed), ([2], [4], [1]))
+
+    def test_empty_labels_and_label_order_are_not_changes(self):
+        self.other.update_contact(self.other.get_contact_by_id(3), [{'field': 'phone', 'value': [], 'label': 'work'}])
+        phone = self.other.get_contact_by_id(1).phone
+        self.other.get_contact_by_id(1).phone = {"home": phone["home"], "mobile": phone["mobile"]}
+        self.assertFalse(self.book.diff(self.other))
+
+    def test_across_storages(self):
+        db_path = os.path.join(".", "test_book_diff.db")
+        try:
+            for other in (ColumnarContactBook(), SqliteContactBook(db_path)):
+                with self.subTest(book=type(other).__name__):
+                    other.add_contacts(self.entries)
+                    self.assertFalse(self.book.diff(other))
+                    other.remove_by_id(3)
+                    self.assertEqual(other.diff(self.book).added, [3])
+                    if isinstance(other, SqliteContactBook):
+                        other.close()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+    def test_content_counts(self):
+        self.book.add_contacts(self.entries[:1])
+        counts = content_counts(self.book)
+        self.assertEqual(sorted(counts.values()), [1, 1, 2])
+
+
+class TestContactBookEquality(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = [{"name": "Alice", "surname": "Smith", "phone": "1234"}, {"name": "Bob", "surname": "Smith"}]
+        self.book = ContactBook()
+        self.book.add_contacts(self.entries)
+
+    def test_ignores_ids_and_order(self):
+        other = ContactBook()
+        other.add_contact(Contact(name="Carl", surname="White"))
+        other.add_contacts(reversed(self.entries))
+        other.remove_by_id(1)
+        self.assertEqual(self.book, other)
+        self.assertEqual(other, self.book)
+
+    def test_multiset(self):
+        other = ContactBook()
+        other.add_contacts(self.entries + self.entries[:1])
+        self.book.add_contacts(self.entries[1:])
+        self.assertNotEqual(self.book, other) # same contacts, not the same number of each
+        self.assertNotEqual(other, self.book)
+
+    def test_symmetric(self):
+        other = ContactBook()
+        other.add_contacts(self.entries[:1])
+        self.assertNotEqual(self.book, other)
+        self.assertNotEqual(other, self.book)
+
+    def test_not_a_book(self):
+        self.assertNotEqual(self.book, self.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
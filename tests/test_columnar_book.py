@@ -0,0 +1,151 @@
+import unittest
+import json
+import os
+from src.contact_book import ContactBook
+from src.columnar_book import ColumnarContactBook
+from src.contact import Contact, CompactContact
+
+class TestColumnarContactBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ColumnarContactBook()
+        self.reference = ContactBook()
+        for book in (self.book, self.reference):
+            book.add_contact(Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"], "home": ["555"]},
+                                     email={"work": ["alice@work.com"]}, address="Main St"))
+            book.add_contact(Contact(name="Bob", surname="Smith", phone={"home": ["1234"]}, email="bob@mail.com"))
+            book.add_contact(Contact(name="alice", surname="Brown", phone=["999"], address="main st"))
+        self.filepath = os.path.join(".", "test_columnar.json")
+
+    def tearDown(self):
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def test_add_and_count(self):
+        self.assertEqual(self.book.count_contacts(), 3)
+        self.assertEqual(self.book.next_id, 4)
+        self.assertTrue(self.book.modified)
+        self.assertEqual(self.book.get_contact_by_id(2).email, {"other": ["bob@mail.com"]})
+        self.assertFalse(self.book.get_contact_by_id(9))
+
+    def test_search_same_as_contact_book(self):
+        queries = [
+            ('all', 'all', ('name', 'ALICE')),
+            ('all', 'all', ('surname', 'smith'), ('phone', '1234')),
+            ('all', 'all', ('phone', '1234', 'home')),
+            ('all', 'all', ('name', 'alice'), ('address', 'MAIN ST')),
+            ('all', 'first', ('name', 'alice')),
+            ('any', 'all', ('surname', 'Brown'), ('email', 'bob@mail.com')),
+            ('any', 'all', ('phone', '55', None, 'prefix'), ('phone', '99', None, 'suffix')),
+            ('all', 'all'),
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                results = self.book.search_contacts(*query)
+                expected = self.reference.search_contacts(*query)
+                self.assertEqual([c.id for c in results], [c.id for c in expected])
+                self.assertEqual([CompactContact.from_contact(c) for c in results], expected)
+
+    def test_iter_search_same_as_contact_book(self):
+        for criteria in ([('surname', 'smith')], [('name', 'alice'), ('address', 'main st')], []):
+            with self.subTest(criteria=criteria):
+                self.assertEqual([c.id for c in self.book.iter_search('any', *criteria, offset=1)],
+                                 [c.id for c in self.reference.iter_search('any', *criteria, offset=1)])
+                self.assertEqual([c.id for c in self.book.iter_search('all', *criteria, after=1, limit=1)],
+                                 [c.id for c in self.reference.iter_search('all', *criteria, after=1, limit=1)])
+
+    def test_duplicates_same_as_contact_book(self):
+        for contact in (Contact(name="ALICE", surname="smith"), self.reference.get_contact_by_id(2)):
+            with self.subTest(contact=contact):
+                self.assertEqual([c.id for c in self.book.same_name(contact)], [c.id for c in self.reference.same_name(contact)])
+                self.assertEqual([c.id for c in self.book.same_content(contact)], [c.id for c in self.reference.same_content(contact)])
+        self.assertEqual(self.book.find_duplicates(), self.reference.find_duplicates())
+        self.assertEqual(CompactContact.from_contact(self.book.merge_contacts([1, 2])), self.reference.merge_contacts([1, 2]))
+        self.assertEqual([CompactContact.from_contact(c) for c in self.book.contacts], self.reference.contacts)
+
+    def test_explain(self):
+        self.assertEqual(self.book.explain('any', ('surname', 'Brown'), ('phone', '55', None, 'prefix')),
+                         "any of 2 criteria: scan a column per criterion, union of the rows\n"
+                         "  1. scan    (surname column) surname = 'Brown'\n"
+                         "  2. scan    (phone column)   phone prefix '55'")
+        with self.assertRaises(ValueError):
+            self.book.explain('some', ('name', 'Bob'))
+
+    def test_search_invalid(self):
+        self.assertFalse(self.book.search_contacts('all', 'invalid_input', ('name', 'Alice')))
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('all', 'all', ('birthday', 'today'))
+
+    def test_update_contact(self):
+        bob = self.book.search_contacts('all', 'first', ('name', 'Bob'))[0]
+        self.book.update_contact(bob, [{'field': 'phone', 'value': '777', 'label': 'work', 'mode': 'add'}])
+        self.assertEqual(self.book.get_contact_by_id(2).phone, {"home": ["1234"], "work": ["777"]})
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '1234'))], [1, 2])
+
+    def test_remove_contact(self):
+        self.book.remove_contact(self.book.get_contact_by_id(1))
+        self.assertEqual(self.book.count_contacts(), 2)
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '1234'))], [2])
+        self.assertFalse(self.book.remove_by_id(1))
+
+    def test_space_is_reclaimed(self):
+        book = ColumnarContactBook()
+        book.add_contacts([{"name": f"n{i}", "surname": "Grey", "phone": {"home": [str(i)], "work": [str(i + 1)]}}
+                           for i in range(1000)])
+        for i in range(20):
+            for id in range(1, 1001):
+                book.update_contact(book.get_contact_by_id(id), [{'field': 'address', 'value': f"{i} Main St"}])
+        self.assertEqual(len(book._phones.values), 2000)
+        for i in range(50):
+            book.update_contact(book.get_contact_by_id(7), [{'field': 'phone', 'value': str(i), 'label': 'mobile', 'mode': 'add'}])
+        self.assertLessEqual(len(book._phones.values), 2 * book._phones.live)
+        self.assertEqual(book.get_contact_by_id(7).phone["mobile"], [str(i) for i in range(50)])
+        for id in range(1, 1001, 2):
+            book.remove_by_id(id)
+        self.assertEqual([c.id for c in book.search_contacts('all', 'all', ('phone', '9', None, 'suffix'))], list(range(10, 1001, 10)))
+        self.assertEqual(book.get_contact_by_id(8).phone, {"home": ["7"], "work": ["8"]})
+        for id in range(2, 1001, 2):
+            book.remove_by_id(id)
+        self.assertEqual((len(book._ids), len(book._phones.values), len(book._emails.starts)), (0, 0, 0))
+        book.add_contact(Contact(name="Dan", surname="Grey", phone="1"))
+        self.assertEqual([c.id for c in book.search_contacts('all', 'all', ('phone', '1'))], [1001])
+
+    def test_add_contacts(self):
+        entries = [{"name": "dan", "surname": "grey", "phone": "4321"}, Contact(name="Eve", surname="Smith")]
+        self.assertEqual(self.book.add_contacts(entries), 2)
+        self.reference.add_contacts(entries)
+        self.assertEqual([c.id for c in self.book.search_contacts('any', 'all', ('surname', 'smith'), ('phone', '4321'))],
+                         [1, 2, 4, 5])
+        self.assertEqual(self.book.next_id, 6)
+
+    def test_fuzzy_search(self):
+        self.assertEqual([c.id for c, score in self.book.fuzzy_search("Smtih")],
+                         [c.id for c, score in self.reference.fuzzy_search("Smtih")])
+
+    def test_save_and_load(self):
+        self.book.save_to_json(self.filepath)
+        with open(self.filepath) as f:
+            self.assertEqual(len(json.load(f)["contacts"]), 3)
+        loaded = ColumnarContactBook()
+        loaded.load_from_json(self.filepath)
+        self.assertEqual([c.to_dict() for c in loaded.contacts], [c.to_dict() for c in self.book.contacts])
+
+    def test_journal(self):
+        journal = self.filepath + ".journal"
+        try:
+            self.book.save_to_json(self.filepath)
+            book = ColumnarContactBook()
+            book.load_from_json(self.filepath, journal=journal)
+            book.update_contact(book.get_contact_by_id(2), [{'field': 'address', 'value': '1 New St'}])
+            book.remove_by_id(1)
+            reopened = ColumnarContactBook()
+            reopened.load_from_json(self.filepath, journal=journal)
+            self.assertEqual([c.to_dict() for c in reopened.contacts], [c.to_dict() for c in book.contacts])
+            self.assertEqual(reopened.get_contact_by_id(2).address, '1 New St')
+        finally:
+            if os.path.exists(journal):
+                os.remove(journal)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import gzip
+import io
+import lzma
+import os
+from src.compression import detect, from_extension, is_compressed, open_read, open_write, stream_size
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(".", "test_compression.out")
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_detect(self):
+        self.assertEqual(detect(io.BytesIO(gzip.compress(b"{}"))), 'gzip')
+        self.assertEqual(detect(io.BytesIO(lzma.compress(b"{}"))), 'xz')
+        f = io.BytesIO(b"{\"contacts\": []}")
+        f.seek(1)
+        self.assertIsNone(detect(f))
+        self.assertEqual(f.tell(), 1)
+        self.assertIsNone(detect(io.BytesIO(b"")))
+
+    def test_from_extension(self):
+        self.assertEqual(from_extension("book.json.gz"), 'gzip')
+        self.assertEqual(from_extension("book.NDJSON.XZ"), 'xz')
+        self.assertIsNone(from_extension("book.json"))
+
+    def test_round_trip(self):
+        for compression in ('gzip', 'xz', None):
+            with self.subTest(compression=compression):
+                with open_write(self.path, compression, level=1, encoding='utf-8') as f:
+                    f.write("Zoé\n" * 1000)
+                with open(self.path, 'rb') as f:
+                    self.assertEqual(detect(f), compression)
+                with open_read(self.path) as f:
+                    self.assertEqual(is_compressed(f), compression is not None)
+                    self.assertEqual(f.read().decode('utf-8'), "Zoé\n" * 1000)
+
+    def test_detected_whatever_the_name(self):
+        with open(self.path, 'wb') as f:
+            f.write(lzma.compress(b"line\n"))
+        with open_read(self.path) as f:
+            self.assertEqual(list(f), [b"line\n"])
+
+    def test_append_keeps_the_compression_of_the_file(self):
+        with open_write(self.path, 'gzip') as f:
+            f.write("one\n")
+        with open_write(self.path, None, append=True) as f:
+            f.write("two\n")
+        with open_read(self.path) as f:
+            self.assertEqual(f.read(), b"one\ntwo\n")
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            open_write(self.path, 'zip')
+
+    def test_stream_size(self):
+        with open_write(self.path, None) as f:
+            f.write("12345")
+        with open_read(self.path) as f:
+            self.assertEqual(stream_size(f), 5)
+        with open_write(self.path, 'gzip') as f:
+            f.write("12345")
+        with open_read(self.path) as f:
+            self.assertIsNone(stream_size(f))
+        self.assertIsNone(stream_size(io.BytesIO(b"12345")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from src.contact import Contact
+from unittest.mock import patch
+from src.contact import Contact, CompactContact
 
 class TestContact(unittest.TestCase):
 
@@ -12,6 +13,17 @@ class TestContact(unittest.TestCase):
             address="123 Main St"
         )
 
+    def test_format(self):
+        self.contact.id = 1
+        text = self.contact.format()
+        self.assertTrue(text.startswith("\n[1] - Alice Smith"))
+        self.assertIn("  Mobile Phones: 12345", text)
+        self.assertNotIn("Work Emails", text)
+        self.assertIn("  Address: 123 Main St", text)
+        with patch('builtins.print') as mock_print:
+            self.contact.display()
+        mock_print.assert_called_once_with(text)
+
     def test_initialization_defaults(self):
         c = Contact(name="Bob", surname="Brown")
         self.assertEqual(c.phone, {'home': [], 'mobile': [], 'work': [], 'other': []})
@@ -110,6 +122,20 @@ class TestContact(unittest.TestCase):
         self.assertTrue(self.contact.matches('any', ('phone', '12345'), ('name', 'Bob')))
         self.assertFalse(self.contact.matches('any', ('surname', 'Jones'), ('email', 'no@mail.com')))
 
+    def test_one_field_match_phone_prefix_suffix(self):
+        self.assertTrue(self.contact.one_field_match("phone", "123", mode="prefix"))
+        self.assertTrue(self.contact.one_field_match("phone", "890", label="home", mode="suffix"))
+        self.assertFalse(self.contact.one_field_match("phone", "890", label="mobile", mode="suffix"))
+        self.assertFalse(self.contact.one_field_match("phone", "", mode="prefix"))
+
+    def test_one_field_match_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            self.contact.one_field_match("name", "Al", mode="prefix")
+
+    def test_matches_with_mode(self):
+        self.assertTrue(self.contact.matches('all', ('name', 'Alice'), ('phone', '45', None, 'suffix')))
+        self.assertFalse(self.contact.matches('all', ('phone', '45', None, 'prefix')))
+
     def test_update_one_simple_field(self):
         self.contact.update_one("address", "456 New Ave")
         self.assertEqual(self.contact.address, "456 New Ave")
@@ -161,6 +187,68 @@ class TestContact(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.contact.matches('invalid_mode', ('name', 'Alice'))
 
+    def test_from_dict_same_as_constructor(self):
+        entry = {"name": "bob", "surname": "brown", "phone": {"home": ["123", "12a"], "work": "456"},
+                 "email": ["bob@mail.com", "bob@"], "address": "1 Road", "id": 9}
+        contact = Contact.from_dict(entry)
+        expected = Contact(name="bob", surname="brown", phone={"home": ["123", "12a"], "work": "456"},
+                           email=["bob@mail.com", "bob@"], address="1 Road")
+        self.assertEqual(contact, expected)
+        self.assertEqual(contact.phone, {"home": ["123", "error"], "work": ["456"]})
+        self.assertEqual(contact.email, {"other": ["bob@mail.com", "error"]})
+        self.assertIsNone(contact.id)
+
+    def test_from_dict_invalid_name(self):
+        with self.assertRaises(TypeError):
+            Contact.from_dict({"name": 1, "surname": "Brown"})
+
+
+class TestCompactContact(unittest.TestCase):
+
+    def setUp(self):
+        self.contact = CompactContact(
+            name="alice",
+            surname="smith",
+            phone={'mobile': ['12345'], 'home': ['67890'], 'work': []},
+            email={'personal': ['alice@example.com']},
+            address="123 Main St"
+        )
+
+    def test_initialization(self):
+        self.assertEqual(self.contact.name, "Alice")
+        self.assertEqual(self.contact.phone, {'mobile': ['12345'], 'home': ['67890']})
+        self.assertEqual(self.contact.email, {'personal': ['alice@example.com']})
+        self.assertIsNone(self.contact.id)
+        self.assertFalse(hasattr(self.contact, '__dict__'))
+
+    def test_labels_are_interned(self):
+        other = CompactContact(name="Bob", surname="Brown", phone={''.join(['mob', 'ile']): ['1']})
+        self.assertIs(other._phone[0][0], self.contact._phone[0][0])
+
+    def test_from_contact_and_equality(self):
+        contact = Contact(name="Alice", surname="Smith", phone={'mobile': ['12345'], 'home': ['67890']},
+                          email={'personal': ['alice@example.com']}, address="123 Main St")
+        contact.id = 4
+        compact = CompactContact.from_contact(contact)
+        self.assertEqual(compact.id, 4)
+        self.assertEqual(compact, contact)
+        self.assertEqual(contact, compact)
+        self.assertEqual(compact.to_contact(), contact)
+
+    def test_matches(self):
+        self.assertTrue(self.contact.matches('all', ('name', 'ALICE'), ('phone', '12345', 'mobile')))
+        self.assertFalse(self.contact.matches('all', ('phone', '12345', 'home')))
+        self.assertTrue(self.contact.matches('any', ('phone', '90', None, 'suffix')))
+
+    def test_update_one(self):
+        self.assertTrue(self.contact.update_one("phone", "55555", label="home", mode="add"))
+        self.assertEqual(self.contact.phone["home"], ["67890", "55555"])
+        self.assertTrue(self.contact.update_one("email", "a@b.com", label="work"))
+        self.assertEqual(self.contact.email["work"], ["a@b.com"])
+        self.assertFalse(self.contact.update_one("phone", "12-3"))
+        self.contact.update_one("address", "1 New St")
+        self.assertEqual(self.contact.address, "1 New St")
+
 
 if __name__ == '__main__':
     unittest.main() #argv=[''], verbosity=2, exit=False
\ No newline at end of file
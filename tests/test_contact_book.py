@@ -1,6 +1,9 @@
 import unittest
+import json
+import os
+from unittest.mock import patch
 from src.contact_book import ContactBook
-from src.contact import Contact
+from src.contact import Contact, CompactContact
 
 class TestContactBook(unittest.TestCase):
 
@@ -89,5 +92,977 @@ class TestContactBook(unittest.TestCase):
     def test_get_contact_by_id_not_found(self):
         self.assertFalse(self.book.get_contact_by_id(5))
 
+    def test_get_contact_by_id_after_remove(self):
+        self.book.remove_contact(self.c2)
+        self.assertFalse(self.book.get_contact_by_id(2))
+        self.assertIs(self.book.get_contact_by_id(3), self.c3)
+
+    def test_remove_by_id(self):
+        self.book.modified = False
+        removed = self.book.remove_by_id(2)
+        self.assertIs(removed, self.c2)
+        self.assertEqual([c.id for c in self.book.contacts], [1, 3])
+        self.assertTrue(self.book.modified)
+
+    def test_remove_by_id_not_found(self):
+        self.book.modified = False
+        self.assertFalse(self.book.remove_by_id(7))
+        self.assertEqual(self.book.count_contacts(), 3)
+        self.assertFalse(self.book.modified)
+
+    def test_load_from_json(self):
+        path = os.path.join(".", "test_load_book.json")
+        try:
+            with open(path, "w") as f:
+                json.dump({"contacts": [{"name": "dan", "surname": "grey", "phone": {"home": ["42"]}}]}, f)
+            self.book.load_from_json(path)
+            self.assertEqual(self.book.count_contacts(), 4)
+            self.assertEqual(self.book.get_contact_by_id(4).name, "Dan")
+        finally:
+            os.remove(path)
+
+    def test_load_from_json_validation_report(self):
+        path = os.path.join(".", "test_load_book.json")
+        try:
+            with open(path, "w") as f:
+                json.dump({"contacts": [{"name": "dan", "surname": "grey", "phone": ["42", "4-2"], "email": "dan@"},
+                                        {"name": "eve", "surname": "grey", "phone": "x"},
+                                        {"name": "fay", "surname": "grey", "phone": "43"}]}, f)
+            with patch('builtins.print') as mock_print:
+                self.book.load_from_json(path)
+            self.assertEqual(self.book.validation.counts, {'invalid_phone': 2, 'invalid_email': 1})
+            self.assertEqual(self.book.validation.ids, {'invalid_phone': [4, 5], 'invalid_email': [4]})
+            self.assertEqual(mock_print.call_count, 2) # loaded line and summary
+            mock_print.assert_called_with(self.book.validation.summary())
+        finally:
+            os.remove(path)
+
+    def test_load_from_json_parallel_same_as_sequential(self):
+        path = os.path.join(".", "test_load_book.json")
+        entries = [{"name": f"n{i}", "surname": "grey", "phone": {"home": [str(i) if i % 3 else "x"]},
+                    "email": [f"u{i}@mail.com"], "id": 100 + i} for i in range(25)]
+        try:
+            with open(path, "w") as f:
+                json.dump({"contacts": entries}, f)
+            sequential = ContactBook()
+            sequential.load_from_json(path)
+            for chunk_size in (4, 5000):
+                parallel = ContactBook()
+                parallel.LOAD_CHUNK_SIZE = chunk_size
+                parallel.load_from_json(path, workers=2)
+                self.assertEqual([c.id for c in parallel.contacts], list(range(1, 26)))
+                self.assertEqual(parallel.contacts, sequential.contacts)
+                self.assertEqual(parallel.validation.ids, sequential.validation.ids)
+                self.assertEqual(parallel._index.labelled, sequential._index.labelled)
+        finally:
+            os.remove(path)
+
+    def test_load_from_json_parallel_invalid_entry_rolls_back(self):
+        path = os.path.join(".", "test_load_book.json")
+        try:
+            with open(path, "w") as f:
+                json.dump({"contacts": [{"name": "Dan", "surname": "Grey"}, {"name": 1, "surname": "Grey"}]}, f)
+            self.book.load_from_json(path, workers=2)
+            self.assertEqual(self.book.count_contacts(), 3)
+            self.assertEqual(self.book.next_id, 4)
+        finally:
+            os.remove(path)
+
+    def test_load_from_json_invalid_file_rolls_back(self):
+        path = os.path.join(".", "test_load_book.json")
+        try:
+            with open(path, "w") as f:
+                f.write('{"contacts": [{"name": "Dan", "surname": "Grey"}, {"name": "Eve", ')
+            self.book.load_from_json(path)
+            self.assertEqual(self.book.count_contacts(), 3)
+            self.assertEqual(self.book.next_id, 4)
+            self.assertFalse(self.book.search_contacts('all', 'all', ('name', 'Dan')))
+        finally:
+            os.remove(path)
+
+    def test_save_to_json(self):
+        path = os.path.join(".", "test_save_book.json")
+        try:
+            for compact in (False, True):
+                self.book.save_to_json(path, compact=compact)
+                self.assertFalse(self.book.modified)
+                with open(path) as f:
+                    data = json.load(f)
+                self.assertEqual(data["contacts"][0], {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234"]},
+                                                       "email": {}, "address": "", "id": 1})
+                loaded = ContactBook()
+                loaded.load_from_json(path)
+                self.assertEqual([c.phone for c in loaded.contacts], [{"mobile": ["1234"]}, {}, {"home": ["5678"]}])
+        finally:
+            os.remove(path)
+
+    def test_ids_not_reused_after_remove(self):
+        self.book.remove_by_id(3)
+        c4 = Contact(name="Dan", surname="Grey")
+        self.book.add_contact(c4)
+        self.assertEqual(c4.id, 4)
+        self.assertIs(self.book.get_contact_by_id(4), c4)
+
+class TestContactBookJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = os.path.join(".", "test_journal_book.json")
+        self.journal = self.snapshot + ".journal"
+        book = ContactBook()
+        book.add_contact(Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"]}))
+        book.add_contact(Contact(name="Bob", surname="Brown"))
+        book.add_contact(Contact(name="Carl", surname="White"))
+        book.remove_by_id(2)  # IDs in the snapshot are 1 and 3
+        book.save_to_json(self.snapshot)
+
+    def tearDown(self):
+        for path in (self.snapshot, self.journal):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def open_book(self):
+        book = ContactBook()
+        book.load_from_json(self.snapshot, journal=self.journal)
+        return book
+
+    def edit(self, book):
+        book.add_contact(Contact(name="Dan", surname="Grey"))
+        book.update_contact(book.get_contact_by_id(3), [{'field': 'phone', 'value': '99', 'label': 'home', 'mode': 'add'}])
+        book.remove_by_id(1)
+
+    def test_keeps_snapshot_ids(self):
+        book = self.open_book()
+        self.assertEqual([c.id for c in book.contacts], [1, 3])
+        self.assertEqual(book.next_id, 4)
+
+    def test_replay(self):
+        book = self.open_book()
+        self.edit(book)
+        with open(self.journal) as f:
+            self.assertEqual([json.loads(line)["op"] for line in f], ['add', 'update', 'remove'])
+        reopened = self.open_book()
+        self.assertEqual([c.to_dict() for c in reopened.contacts], [c.to_dict() for c in book.contacts])
+        self.assertEqual(reopened.next_id, 5)
+        self.assertEqual(reopened.search_contacts('all', 'all', ('phone', '99', 'home')), [reopened.get_contact_by_id(3)])
+
+    def test_torn_record_dropped(self):
+        book = self.open_book()
+        self.edit(book)
+        with open(self.journal, 'a') as f:
+            f.write('{"op":"remove","i')
+        reopened = self.open_book()
+        self.assertEqual([c.id for c in reopened.contacts], [3, 4])
+        reopened.remove_by_id(4)
+        self.assertEqual([c.id for c in self.open_book().contacts], [3])
+
+    def test_compact_journal(self):
+        book = self.open_book()
+        self.edit(book)
+        self.assertTrue(book.compact_journal(self.snapshot))
+        self.assertEqual(os.path.getsize(self.journal), 0)
+        reopened = self.open_book()
+        self.assertEqual([c.id for c in reopened.contacts], [3, 4])
+        self.assertEqual([CompactContact.from_contact(c) for c in reopened.contacts], book.contacts)
+
+    def test_compact_without_journal(self):
+        self.assertFalse(ContactBook().compact_journal(self.snapshot))
+
+
+class TestCompactContactBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook(compact=True)
+        self.c1 = Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"]})
+        self.book.add_contact(self.c1)
+
+    def test_add_stores_compact_copy(self):
+        stored = self.book.get_contact_by_id(1)
+        self.assertIsInstance(stored, CompactContact)
+        self.assertEqual(stored, self.c1)
+        self.assertEqual(self.c1.id, 1)
+
+    def test_search_update_remove(self):
+        self.book.update_contact(self.c1, [{'field': 'phone', 'value': '999', 'label': 'home', 'mode': 'add'}])
+        matches = self.book.search_contacts('all', 'all', ('phone', '999', 'home'))
+        self.assertEqual([c.id for c in matches], [1])
+        self.book.remove_contact(matches[0])
+        self.assertEqual(self.book.count_contacts(), 0)
+
+
+class TestContactBookIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contact(Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"], "home": ["555"]},
+                                      email={"work": ["alice@work.com"]}, address="Main St"))
+        self.book.add_contact(Contact(name="Bob", surname="Smith", phone={"home": ["1234"]}, email="bob@mail.com"))
+        self.book.add_contact(Contact(name="alice", surname="Brown", phone=["999"], address="main st"))
+        self.book.add_contact(Contact(name="Carl", surname="White", phone="12-34", email="carl@mail"))
+
+    def linear(self, how, *criteria):
+        return [c for c in self.book.contacts if c.matches(how, *criteria)]
+
+    def assert_same_as_linear(self, how, *criteria):
+        self.assertEqual(self.book.search_contacts(how, 'all', *criteria), self.linear(how, *criteria))
+
+    def test_search_matches_linear(self):
+        queries = [
+            ('all', ('name', 'ALICE')),
+            ('all', ('surname', 'smith'), ('phone', '1234')),
+            ('all', ('phone', '1234', 'home')),
+            ('all', ('phone', '1234', 'work')),
+            ('all', ('phone', '1234', None)),
+            ('all', ('phone', 'error')),
+            ('all', ('email', 'error', 'other')),
+            ('all', ('email', 'alice@work.com', 'work')),
+            ('all', ('name', 'alice'), ('address', 'MAIN ST')),
+            ('all', ('address', 'Main St')),
+            ('any', ('surname', 'Brown'), ('email', 'bob@mail.com')),
+            ('any', ('name', 'Nobody'), ('address', 'main st')),
+            ('all',),
+            ('any',),
+        ]
+        for how, *criteria in queries:
+            with self.subTest(how=how, criteria=criteria):
+                self.assert_same_as_linear(how, *criteria)
+
+    def test_search_phone_prefix_suffix_matches_linear(self):
+        self.book.add_contact(Contact(name="Dora", surname="Black", phone={"work": ["5551234", "1234"], "home": ["5559876"]}))
+        queries = [
+            ('all', ('phone', '555', None, 'prefix')),
+            ('all', ('phone', '555', 'home', 'prefix')),
+            ('all', ('phone', '1234', None, 'suffix')),
+            ('all', ('phone', '34', 'work', 'suffix')),
+            ('all', ('phone', '12', None, 'prefix'), ('name', 'bob')),
+            ('any', ('phone', '99', None, 'prefix'), ('phone', '76', None, 'suffix')),
+            ('all', ('phone', 'err', None, 'prefix')),
+            ('all', ('phone', '', None, 'suffix')),
+        ]
+        for how, *criteria in queries:
+            with self.subTest(how=how, criteria=criteria):
+                self.assert_same_as_linear(how, *criteria)
+
+    def test_phone_trie_follows_updates(self):
+        bob = self.book.get_contact_by_id(2)
+        self.book.update_contact(bob, [{'field': 'phone', 'value': '4321', 'label': 'home', 'mode': 'replace'}])
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '12', None, 'prefix'))], [1])
+        self.assertEqual(self.book.search_contacts('all', 'all', ('phone', '21', 'home', 'suffix')), [bob])
+        self.book.remove_by_id(2)
+        self.assertEqual(self.book.search_contacts('all', 'all', ('phone', '21', None, 'suffix')), [])
+
+    def test_fuzzy_search_typo(self):
+        results = self.book.fuzzy_search("Smtih")
+        self.assertEqual([c.id for c, score in results], [1, 2])
+        self.assertTrue(all(0 < score < 1 for c, score in results))
+
+    def test_fuzzy_search_ranking_and_k(self):
+        results = self.book.fuzzy_search("alice", k=1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0].id, 1)
+        self.assertEqual(results[0][1], 1.0)
+
+    def test_fuzzy_search_field(self):
+        self.assertEqual(self.book.fuzzy_search("Smith", field='name'), [])
+        with self.assertRaises(ValueError):
+            self.book.fuzzy_search("Smith", field='address')
+
+    def test_fuzzy_search_follows_updates(self):
+        bob = self.book.get_contact_by_id(2)
+        self.book.update_contact(bob, [{'field': 'surname', 'value': 'Schmidt'}])
+        self.assertEqual([c.id for c, score in self.book.fuzzy_search("Smith")], [1])
+        self.book.remove_by_id(1)
+        self.assertEqual(self.book.fuzzy_search("Smith"), [])
+
+    def test_search_first_returns_lowest_id(self):
+        self.assertEqual(self.book.search_contacts('any', 'first', ('name', 'Bob'), ('surname', 'Brown'))[0].id, 2)
+
+    def test_index_follows_updates(self):
+        bob = self.book.get_contact_by_id(2)
+        self.book.update_contact(bob, [{'field': 'surname', 'value': 'Green'},
+                                       {'field': 'phone', 'value': '777', 'label': 'work', 'mode': 'add'}])
+        self.assertEqual(self.book.search_contacts('all', 'all', ('surname', 'Smith')), [self.book.get_contact_by_id(1)])
+        self.assertEqual(self.book.search_contacts('all', 'all', ('surname', 'green'), ('phone', '777', 'work')), [bob])
+
+    def test_index_follows_removal(self):
+        self.book.remove_by_id(1)
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '1234'))], [2])
+        self.assertEqual(self.book.search_contacts('all', 'all', ('name', 'Alice'), ('address', 'main st')),
+                         [self.book.get_contact_by_id(3)])
+
+    def test_cached_results(self):
+        results = self.book.search_contacts('all', 'all', ('surname', 'smith'))
+        results.append(None) # results are copies
+        self.assertEqual(self.book.search_contacts('all', 'all', ('surname', 'Smith')), results[:2])
+        self.assertEqual((self.book.cache.hits, self.book.cache.misses), (1, 1))
+
+    def test_cache_invalidated_by_changes(self):
+        criteria = ('all', 'all', ('surname', 'Smith'))
+        self.assertEqual([c.id for c in self.book.search_contacts(*criteria)], [1, 2])
+        self.book.add_contact(Contact(name="Dan", surname="Smith"))
+        self.assertEqual([c.id for c in self.book.search_contacts(*criteria)], [1, 2, 5])
+        self.book.update_contact(self.book.get_contact_by_id(1), [{'field': 'surname', 'value': 'Jones'}])
+        self.assertEqual([c.id for c in self.book.search_contacts(*criteria)], [2, 5])
+        self.book.remove_by_id(2)
+        self.assertEqual([c.id for c in self.book.search_contacts(*criteria)], [5])
+        self.assertEqual(self.book.cache.hits, 0)
+
+    def test_iter_search(self):
+        self.book.add_contacts({"name": f"n{i}", "surname": "Smith", "address": "main st" if i % 2 else ""} for i in range(10))
+        for criteria in ([('surname', 'smith')], [('address', 'main st')], [('surname', 'smith'), ('address', 'MAIN ST')], []):
+            expected = [c.id for c in self.book.search_contacts('all', 'all', *criteria)]
+            with self.subTest(criteria=criteria):
+                self.assertEqual([c.id for c in self.book.iter_search('all', *criteria)], expected)
+                self.assertEqual([c.id for c in self.book.iter_search('all', *criteria, limit=3, offset=2)], expected[2:5])
+                self.assertEqual([c.id for c in self.book.iter_search('all', *criteria, after=expected[1], limit=2)], expected[2:4])
+                self.assertEqual(list(self.book.iter_search('all', *criteria, limit=0)), [])
+
+    def test_iter_search_is_lazy(self):
+        contacts = self.book.iter_search('any', ('address', 'main st'), ('name', 'carl'))
+        self.assertEqual(next(contacts).id, 1)
+        self.book.get_contact_by_id(3).address = 'elsewhere' # not tested yet
+        self.assertEqual([c.id for c in contacts], [4])
+
+    def test_iter_search_after_removed_id(self):
+        self.book.remove_by_id(2)
+        self.assertEqual([c.id for c in self.book.iter_search('any', ('address', 'main st'), ('name', 'carl'), after=2)], [3, 4])
+
+    def test_iter_search_validates_immediately(self):
+        with self.assertRaises(ValueError):
+            self.book.iter_search('all', ('birthday', 'today'))
+        with self.assertRaises(ValueError):
+            self.book.iter_search('all', limit=-1)
+
+    def test_invalid_criteria_still_raise(self):
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('all', 'all', ('name',))
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('some', 'all', ('name', 'Alice'))
+
+
+class TestAddContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contact(Contact(name="Zoe", surname="Grey", phone="111"))
+        self.entries = [
+            {"name": "alice", "surname": "smith", "phone": {"mobile": ["1234"], "home": ["555"]},
+             "email": {"work": ["alice@work.com"]}, "address": "Main St"},
+            {"name": "Bob", "surname": "Smith", "phone": {"home": "1234"}, "email": "bob@mail.com", "id": 42},
+            Contact(name="Carl", surname="White", phone="12-34", email="carl@mail"),
+        ]
+
+    def test_add_contacts(self):
+        self.assertEqual(self.book.add_contacts(iter(self.entries)), 3)
+        self.assertEqual([c.id for c in self.book.contacts], [1, 2, 3, 4])
+        self.assertEqual(self.book.next_id, 5)
+        self.assertTrue(self.book.modified)
+        self.assertEqual(self.book.get_contact_by_id(2).name, "Alice")
+        self.assertEqual(self.book.get_contact_by_id(3).phone, {"home": ["1234"]})
+        self.assertEqual(self.book.get_contact_by_id(4).phone, {"other": ["error"]})
+
+    def test_same_index_as_add_contact(self):
+        self.book.add_contacts(self.entries)
+        reference = ContactBook()
+        reference.add_contact(Contact(name="Zoe", surname="Grey", phone="111"))
+        for entry in self.entries:
+            reference.add_contact(entry if isinstance(entry, Contact) else Contact.from_dict(entry))
+        for attribute in ('strings', 'labelled', 'values'):
+            self.assertEqual(getattr(self.book._index, attribute), getattr(reference._index, attribute))
+        self.assertEqual(self.book._index.trigrams.postings, reference._index.trigrams.postings)
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '12', None, 'prefix'))], [2, 3])
+        self.assertEqual(self.book.fuzzy_search("Smtih"), reference.fuzzy_search("Smtih"))
+
+    def test_invalid_entry_adds_nothing(self):
+        with self.assertRaises(TypeError):
+            self.book.add_contacts(self.entries + [{"name": None, "surname": "Grey"}])
+        self.assertEqual(self.book.count_contacts(), 1)
+        self.assertEqual(self.book.next_id, 2)
+
+    def test_validation_report(self):
+        with patch('builtins.print') as mock_print:
+            self.book.add_contacts(self.entries)
+        self.assertEqual(self.book.validation.ids, {'invalid_phone': [4], 'invalid_email': [4]})
+        mock_print.assert_called_once_with(self.book.validation.summary())
+        self.book.add_contacts([{"name": "Dan", "surname": "Grey"}])
+        self.assertFalse(self.book.validation)
+
+    def test_echo_every(self):
+        entries = [{"name": f"n{i}", "surname": "Grey", "phone": "x"} for i in range(10)]
+        with patch('builtins.print') as mock_print:
+            self.book.add_contacts(entries, echo=2, every=4)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertEqual(printed[:3], ["[2] N0 Grey: invalid phone stored as 'error'.", "[6] N4 Grey: invalid phone stored as 'error'.",
+                                       "Further invalid values are counted without being printed."])
+        self.assertEqual(self.book.validation.counts['invalid_phone'], 10)
+        for load in (self.book.load_from_json, self.book.load_from_ndjson, self.book.import_from_csv, self.book.import_from_vcard):
+            with self.assertRaises(ValueError):
+                load("test_echo_every.json", echo=1, every=0)
+
+    def test_not_a_contact_is_skipped(self):
+        self.assertEqual(self.book.add_contacts(["not a contact"]), 0)
+        self.assertEqual(self.book.count_contacts(), 1)
+
+    def test_compact_and_journal(self):
+        journal = os.path.join(".", "test_add_contacts.journal")
+        try:
+            book = ContactBook(compact=True)
+            book.attach_journal(journal)
+            book.add_contacts(self.entries)
+            self.assertTrue(all(isinstance(c, CompactContact) for c in book.contacts))
+            replayed = ContactBook()
+            self.assertEqual(replayed.attach_journal(journal), 3)
+            self.assertEqual(replayed.contacts, book.contacts)
+        finally:
+            if os.path.exists(journal):
+                os.remove(journal)
+
+
+
+
+
+class TestNdjson(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts([{"name": f"n{i}", "surname": "Smith", "phone": {"home": [str(i)]},
+                                 "email": "bad" if i % 7 == 0 else f"n{i}@mail.com"} for i in range(25)])
+        self.book.remove_by_id(3)
+        self.filepath = os.path.join(".", "test_contacts.ndjson")
+
+    def tearDown(self):
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def load(self, **kwargs) -> ContactBook:
+        book = ContactBook()
+        with patch('builtins.print'):
+            book.load_from_ndjson(self.filepath, **kwargs)
+        return book
+
+    def test_save_and_load(self):
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.book.save_to_ndjson(self.filepath))
+        mock_print.assert_called_once_with(f"24 contacts saved to {self.filepath}")
+        self.assertFalse(self.book.modified)
+        book = self.load()
+        self.assertEqual([c.id for c in book.contacts], [c.id for c in self.book.contacts])
+        self.assertEqual(book.contacts, self.book.contacts)
+        self.assertEqual(book.validation.ids['invalid_email'], [1, 8, 15, 22])
+        self.assertEqual(book.next_id, 26)
+
+    def test_load_into_a_book_with_contacts(self):
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(self.filepath)
+        for kwargs in ({}, {'workers': 2}, {'lazy': True}):
+            with self.subTest(**kwargs):
+                book = ContactBook()
+                book.add_contacts([{"name": "Dan", "surname": "Grey"}, {"name": "Eve", "surname": "Grey"}])
+                book.modified = False
+                with patch('builtins.print'):
+                    book.load_from_ndjson(self.filepath, **kwargs)
+                self.assertEqual(book.get_contact_by_id(2).name, "Eve")
+                self.assertEqual([c.id for c in book.contacts], list(range(1, 27)))
+                self.assertEqual(book.contacts[2:], self.book.contacts)
+                self.assertTrue(book.modified)
+
+    def test_failed_load_keeps_the_book(self):
+        with open(self.filepath, 'w') as f:
+            f.write('{"name":"Dan","surname":"Grey","id":2}\n{"name":')
+        with patch('builtins.print') as mock_print:
+            self.book.load_from_ndjson(self.filepath)
+        self.assertIn("Error loading file", mock_print.call_args.args[0])
+        self.assertEqual(self.book.get_contact_by_id(2).name, "N1")
+        self.assertEqual(self.book.count_contacts(), 24)
+        self.assertEqual(self.book.next_id, 26)
+        book = ContactBook()
+        book.add_contact(Contact(name="Eve", surname="Grey"))
+        book.remove_by_id(1)
+        with patch('builtins.print'):
+            book.load_from_ndjson(self.filepath)
+        self.assertEqual((book.count_contacts(), book.next_id), (0, 2))
+
+    def test_head(self):
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(self.filepath)
+        book = self.load(limit=5)
+        self.assertEqual([c.id for c in book.contacts], [1, 2, 4, 5, 6])
+        self.assertEqual(self.load(limit=0).count_contacts(), 0)
+
+    def test_append(self):
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(self.filepath)
+            self.book.add_contact(Contact(name="Dan", surname="Grey"))
+            self.book.add_contacts([{"name": "Eve", "surname": "Grey"}])
+            self.book.remove_by_id(1) # not saved by an append
+            with open(self.filepath, 'rb') as f:
+                size = len(f.read())
+            self.assertTrue(self.book.save_to_ndjson(self.filepath, append=True))
+            self.assertTrue(self.book.save_to_ndjson(self.filepath, append=True))
+        with open(self.filepath, 'rb') as f:
+            self.assertEqual(len(f.read()[size:].splitlines()), 2)
+        self.assertEqual([c.id for c in self.load().contacts][-3:], [25, 26, 27])
+
+    def test_append_after_incomplete_line_break(self):
+        with open(self.filepath, 'w') as f:
+            f.write('{"name":"Zoe","surname":"Grey","id":30}')
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(self.filepath, append=True) # nothing above 30
+            self.book.add_contact(Contact(name="Dan", surname="Grey"))
+            self.book.next_id = 31
+            self.book.add_contact(Contact(name="Eve", surname="Grey"))
+            self.book.save_to_ndjson(self.filepath, append=True)
+        self.assertEqual([c.name for c in self.load().contacts], ["Zoe", "Eve"])
+
+    def test_append_to_new_file(self):
+        with patch('builtins.print'):
+            self.assertTrue(self.book.save_to_ndjson(self.filepath, append=True))
+        self.assertEqual(self.load().contacts, self.book.contacts)
+
+    def test_parallel_load_same_as_sequential(self):
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(self.filepath)
+        sequential = self.load()
+        for chunk_bytes in (100, 1 << 20):
+            with self.subTest(chunk_bytes=chunk_bytes):
+                parallel = ContactBook()
+                parallel.LOAD_CHUNK_BYTES = chunk_bytes
+                with patch('builtins.print'):
+                    parallel.load_from_ndjson(self.filepath, workers=2)
+                self.assertEqual([c.id for c in parallel.contacts], [c.id for c in sequential.contacts])
+                self.assertEqual(parallel.contacts, sequential.contacts)
+                self.assertEqual(parallel.validation.ids, sequential.validation.ids)
+
+    def test_invalid_file_rolls_back(self):
+        with open(self.filepath, 'w') as f:
+            f.write('{"name":"Dan","surname":"Grey"}\n{"name":"Eve",\n')
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                with patch('builtins.print') as mock_print:
+                    self.book.load_from_ndjson(self.filepath, workers=workers)
+                self.assertEqual(self.book.count_contacts(), 24)
+                self.assertEqual(self.book.next_id, 26)
+                self.assertIn("Error loading file", mock_print.call_args.args[0])
+
+class TestCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts([
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234"], "home": ["555"]},
+             "email": {"work": ["alice@work.com"]}, "address": "1 Main St, Springfield"},
+            {"name": "Bob", "surname": "Smith", "phone": {"home": "12-34"}, "email": "bob@mail"},
+            {"name": "Carl", "surname": "White"},
+        ])
+        self.filepath = os.path.join(".", "test_contacts.csv")
+
+    def tearDown(self):
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def test_export_import(self):
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.book.export_to_csv(self.filepath, chunk_size=2))
+        mock_print.assert_called_once_with(f"Exported 3 contacts to {self.filepath}")
+        book = ContactBook()
+        book.add_contact(Contact(name="Zoe", surname="Grey"))
+        with patch('builtins.print'):
+            self.assertEqual(book.import_from_csv(self.filepath, chunk_size=2), 3)
+        self.assertEqual([c.id for c in book.contacts], [1, 2, 3, 4])
+        self.assertEqual(book.contacts[1:], self.book.contacts)
+        self.assertTrue(book.modified)
+        self.assertEqual(book.validation.ids, {'invalid_phone': [3], 'invalid_email': [3]})
+
+    def test_import_invalid_file(self):
+        with open(self.filepath, 'wb') as f:
+            f.write(b"Name,Surname,ID\nAlice,Smith,1\nBob,Smith,2\nCarl,White,\xff\n")
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(self.book.import_from_csv(self.filepath, chunk_size=1), 0)
+        self.assertEqual(self.book.count_contacts(), 3)
+        self.assertEqual(self.book.next_id, 4)
+        self.assertIn("Error importing from CSV", mock_print.call_args.args[0])
+
+    def test_import_rollback_is_journaled(self):
+        journal = os.path.join(".", "test_csv.journal")
+        try:
+            self.book.attach_journal(journal)
+            with open(self.filepath, 'wb') as f:
+                f.write(b"Name,ID\nDan,\nEve,\xff\n")
+            with patch('builtins.print'):
+                self.book.import_from_csv(self.filepath, chunk_size=1)
+            replayed = ContactBook()
+            replayed.attach_journal(journal)
+            self.assertEqual(replayed.contacts, [])
+        finally:
+            if os.path.exists(journal):
+                os.remove(journal)
+
+    def test_import_file_not_found(self):
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(self.book.import_from_csv("missing.csv"), 0)
+        mock_print.assert_called_once_with("File missing.csv not found.")
+
+
+class TestVcard(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts([
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234"], "home": ["555"]},
+             "email": {"work": ["alice@work.com"]}, "address": "1 Main St, Springfield"},
+            {"name": "Bob", "surname": "Smith", "email": {"personal": "bob@mail.com"}},
+        ])
+        self.filepath = os.path.join(".", "test_contacts.vcf")
+
+    def tearDown(self):
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def test_export_import(self):
+        for version in ('3.0', '4.0'):
+            with self.subTest(version=version):
+                with patch('builtins.print') as mock_print:
+                    self.assertTrue(self.book.export_to_vcard(self.filepath, version))
+                mock_print.assert_called_once_with(f"Exported 2 contacts to {self.filepath}")
+                book = ContactBook()
+                with patch('builtins.print'):
+                    self.assertEqual(book.import_from_vcard(self.filepath, chunk_size=1), 2)
+                self.assertEqual(book.contacts, self.book.contacts)
+
+    def test_import_invalid_file(self):
+        with open(self.filepath, 'w') as f:
+            f.write("BEGIN:VCARD\nN:Grey;Dan\nEND:VCARD\nBEGIN:VCARD\nN:Grey;Eve\n")
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(self.book.import_from_vcard(self.filepath, chunk_size=1), 0)
+        self.assertEqual(self.book.count_contacts(), 2)
+        mock_print.assert_called_once_with("Error importing from vCard: Invalid vCard: the last card has no END:VCARD.")
+
+class TestCompressedFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts([{"name": f"n{i}", "surname": "Smith", "phone": {"home": [str(i)]},
+                                 "email": f"n{i}@mail.com", "address": "Main St"} for i in range(20)])
+        self.book.remove_by_id(2)
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def path(self, name: str) -> str:
+        self.paths.append(os.path.join(".", name))
+        return self.paths[-1]
+
+    def assertCompressed(self, path: str, magic: bytes):
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(len(magic)), magic)
+
+    def test_json(self):
+        for extension, magic in (('gz', b'\x1f\x8b'), ('xz', b'\xfd7zXZ')):
+            with self.subTest(extension=extension):
+                path = self.path(f"test_contacts.json.{extension}")
+                with patch('builtins.print'):
+                    self.assertTrue(self.book.save_to_json(path, level=1))
+                    self.assertCompressed(path, magic)
+                    book = ContactBook()
+                    book.load_from_json(path, workers=2)
+                self.assertEqual(book.contacts, self.book.contacts)
+
+    def test_compression_overrides_the_extension(self):
+        path = self.path("test_contacts.json")
+        with patch('builtins.print'):
+            self.book.save_to_json(path, compression='xz')
+            self.assertCompressed(path, b'\xfd7zXZ')
+            book = ContactBook()
+            book.load_from_json(path)
+        self.assertEqual(book.contacts, self.book.contacts)
+
+    def test_ndjson_append_and_parallel_load(self):
+        path = self.path("test_contacts.ndjson.gz")
+        with patch('builtins.print'):
+            self.book.save_to_ndjson(path)
+            self.book.add_contacts([{"name": "Dan", "surname": "Grey"}])
+            self.assertTrue(self.book.save_to_ndjson(path, append=True))
+            for workers in (0, 2):
+                book = ContactBook()
+                book.load_from_ndjson(path, workers=workers)
+                self.assertEqual([c.id for c in book.contacts], [c.id for c in self.book.contacts])
+                self.assertEqual(book.contacts, self.book.contacts)
+
+    def test_csv_and_vcard(self):
+        csv_path, vcard_path = self.path("test_contacts.csv.xz"), self.path("test_contacts.vcf.gz")
+        with patch('builtins.print'):
+            self.book.export_to_csv(csv_path)
+            self.book.export_to_vcard(vcard_path)
+            self.assertCompressed(csv_path, b'\xfd7zXZ')
+            self.assertCompressed(vcard_path, b'\x1f\x8b')
+            for path, load in ((csv_path, ContactBook.import_from_csv), (vcard_path, ContactBook.import_from_vcard)):
+                book = ContactBook()
+                self.assertEqual(load(book, path), 19)
+                self.assertEqual([c.to_dict() | {"id": 0} for c in book.contacts],
+                                 [c.to_dict() | {"id": 0} for c in self.book.contacts])
+
+    def test_compact_journal(self):
+        snapshot, journal = self.path("test_snapshot.json.gz"), self.path("test_snapshot.journal")
+        with patch('builtins.print'):
+            self.book.save_to_json(snapshot)
+            book = ContactBook()
+            book.load_from_json(snapshot, journal=journal)
+            book.remove_by_id(1)
+            self.assertTrue(book.compact_journal(snapshot))
+            self.assertCompressed(snapshot, b'\x1f\x8b')
+            reopened = ContactBook()
+            reopened.load_from_json(snapshot, journal=journal)
+        self.assertEqual([c.id for c in reopened.contacts], [c.id for c in book.contacts])
+        self.assertEqual(os.path.getsize(journal), 0)
+
+    def test_truncated_file_rolls_back(self):
+        path = self.path("test_contacts.json.gz")
+        with patch('builtins.print'):
+            self.book.save_to_json(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        book = ContactBook()
+        with patch('builtins.print') as mock_print:
+            book.load_from_json(path)
+        self.assertEqual(book.count_contacts(), 0)
+        self.assertIn("Error loading file", mock_print.call_args.args[0])
+
+
+class TestLazyLoad(unittest.TestCase):
+
+    def setUp(self):
+        book = ContactBook()
+        book.add_contacts([{"name": f"n{i}", "surname": "Smith" if i % 2 else "Brown", "phone": {"home": [str(1000 + i)]},
+                            "email": "bad" if i % 5 == 0 else f"n{i}@mail.com"} for i in range(12)])
+        book.remove_by_id(4)
+        self.json_path = os.path.join(".", "test_lazy.json")
+        self.ndjson_path = os.path.join(".", "test_lazy.ndjson")
+        with patch('builtins.print'):
+            book.save_to_json(self.json_path)
+            book.save_to_ndjson(self.ndjson_path)
+        self.eager = self.load(self.json_path)
+        self.book = self.load(self.json_path, lazy=True)
+
+    def tearDown(self):
+        for path in (self.json_path, self.ndjson_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load(self, path: str, book: ContactBook = None, **kwargs) -> ContactBook:
+        book = book or ContactBook()
+        with patch('builtins.print'):
+            if path.endswith('.ndjson'):
+                book.load_from_ndjson(path, **kwargs)
+            else:
+                book.load_from_json(path, **kwargs)
+        return book
+
+    def test_records_are_hydrated_on_access(self):
+        self.assertEqual(self.book.count_contacts(), 11)
+        self.assertEqual(self.book._unhydrated, 11)
+        self.assertEqual(self.book.get_contact_by_id(5), self.eager.get_contact_by_id(5))
+        self.assertFalse(self.book.get_contact_by_id(12))
+        self.assertEqual(self.book._unhydrated, 10)
+        self.assertEqual(self.book.validation.ids['invalid_email'], [5])
+        self.assertEqual(self.book.contacts, self.eager.contacts)
+        self.assertEqual(self.book._unhydrated, 0)
+        self.assertEqual(sorted(self.book.validation.ids['invalid_email']), self.eager.validation.ids['invalid_email'])
+        self.assertEqual(self.book.next_id, self.eager.next_id)
+
+    def test_pages_hydrate_only_what_they_show(self):
+        page = list(self.book.iter_search('all', limit=3, offset=2))
+        self.assertEqual(page, self.eager.contacts[2:5])
+        self.assertEqual(self.book._unhydrated, 8)
+
+    def test_first_search_builds_the_index(self):
+        criteria = [('surname', 'Smith'), ('phone', '1003')]
+        list(self.book.iter_search('all', limit=2))
+        self.assertFalse(self.book._indexed)
+        self.assertEqual(self.book.search_contacts('all', 'all', *criteria), self.eager.search_contacts('all', 'all', *criteria))
+        self.assertTrue(self.book._indexed)
+        self.assertEqual(self.book._unhydrated, 0)
+        self.assertEqual(self.book.explain('all', *criteria), self.eager.explain('all', *criteria))
+        self.assertEqual(self.book.search_contacts('any', 'first', *criteria), self.eager.search_contacts('any', 'first', *criteria))
+        self.assertEqual(self.book.fuzzy_search("n3"), self.eager.fuzzy_search("n3"))
+
+    def test_duplicate_check_builds_the_index(self):
+        self.assertEqual(self.book.same_name(Contact(name="N3", surname="smith")), self.eager.same_name(Contact(name="N3", surname="smith")))
+        self.assertTrue(self.book._indexed)
+        self.assertEqual(self.book.same_content(self.eager.get_contact_by_id(3)), [self.eager.get_contact_by_id(3)])
+
+    def test_full_scan_builds_the_index(self):
+        self.assertEqual(self.book.contacts, self.eager.contacts)
+        self.assertEqual(self.book._unhydrated, 0)
+        self.assertTrue(self.book._indexed)
+        self.assertEqual(self.book.explain('all', ('surname', 'Smith')), self.eager.explain('all', ('surname', 'Smith')))
+
+    def test_changes_before_hydration(self):
+        for book in (self.book, self.eager):
+            removed = book.remove_by_id(2)
+            self.assertEqual((removed.id, removed.name), (2, "N1"))
+            book.update_contact(book.get_contact_by_id(3), [{'field': 'address', 'value': 'Elm St'}])
+            book.add_contact(Contact(name="Dan", surname="Grey"))
+            book.add_contacts([{"name": "Eve", "surname": "Grey"}])
+            book.merge_contacts([5, 7])
+        self.assertEqual(self.book._unhydrated, 7)
+        self.assertEqual(self.book, self.eager)
+        self.assertFalse(self.book.diff(self.eager))
+        self.assertEqual(self.book.search_contacts('all', 'all', ('surname', 'Grey')), self.eager.search_contacts('all', 'all', ('surname', 'Grey')))
+        self.book.fuzzy_search("n3")
+        self.book.remove_by_id(13)
+        self.assertEqual(self.book.search_contacts('all', 'all', ('surname', 'Grey')), self.eager.search_contacts('all', 'all', ('surname', 'Grey'))[:1])
+
+    def test_export(self):
+        with patch('builtins.print'):
+            self.book.save_to_json(self.json_path)
+        self.assertEqual(self.load(self.json_path).contacts, self.eager.contacts)
+
+    def test_ndjson(self):
+        for limit in (None, 3):
+            with self.subTest(limit=limit):
+                book = self.load(self.ndjson_path, lazy=True, limit=limit)
+                eager = self.load(self.ndjson_path, limit=limit)
+                self.assertEqual(book._unhydrated, eager.count_contacts())
+                self.assertEqual([c.id for c in book.contacts], [c.id for c in eager.contacts])
+                self.assertEqual(book.contacts, eager.contacts)
+                self.assertEqual(book.validation.ids, eager.validation.ids)
+
+    def test_compact(self):
+        book = self.load(self.ndjson_path, ContactBook(compact=True), lazy=True)
+        self.assertIsInstance(book.get_contact_by_id(1), CompactContact)
+        self.assertEqual(book.contacts, self.eager.contacts)
+
+    def test_journal(self):
+        journal = os.path.join(".", "test_lazy.journal")
+        try:
+            with open(journal, 'w') as f:
+                f.write('{"op":"remove","id":1}\n{"op":"update","contact":{"name":"Zoe","surname":"Grey","phone":{},"email":{},"address":"","id":3}}\n')
+            book = self.load(self.json_path, journal=journal, lazy=True)
+            self.assertEqual(book._unhydrated, 9)
+            self.assertEqual([c.id for c in book.contacts], [2, 3, 5, 6, 7, 8, 9, 10, 11, 12])
+            self.assertEqual(book.get_contact_by_id(3).name, "Zoe")
+        finally:
+            if os.path.exists(journal):
+                os.remove(journal)
+
+    def test_invalid_file_rolls_back(self):
+        with open(self.json_path, 'w') as f:
+            f.write('{"contacts": [{"name": "Dan"}, {"name": ')
+        with patch('builtins.print') as mock_print:
+            self.eager.load_from_json(self.json_path, lazy=True)
+        self.assertIn("Error loading file", mock_print.call_args.args[0])
+        self.assertEqual(self.eager.count_contacts(), 11)
+        self.assertEqual(self.eager.search_contacts('all', 'all', ('name', 'Dan')), [])
+        self.assertEqual(len(self.eager.search_contacts('all', 'all', ('surname', 'Smith'))), 5)
+
+    def test_entry_of_wrong_type_fails_the_load(self):
+        with open(self.json_path, 'w') as f:
+            f.write('{"contacts":[{"name":"a","surname":"b"},{"name":1,"surname":"c"}]}')
+        for lazy in (False, True):
+            book = ContactBook()
+            with patch('builtins.print') as mock_print:
+                book.load_from_json(self.json_path, lazy=lazy)
+            self.assertIn("Error loading file", mock_print.call_args.args[0])
+            self.assertEqual(book.count_contacts(), 0)
+
+    def test_unreadable_record_is_dropped(self):
+        with open(self.ndjson_path, 'w') as f:
+            f.write('{"name":"a","surname":"b","id":1}\n{"name":1,"surname":"c","id":2}\n{"name":\n{"name":"d","surname":"e","id":4}\n')
+        book = self.load(self.ndjson_path, lazy=True)
+        self.assertEqual(book.count_contacts(), 4)
+        book.add_contact(Contact(name="f", surname="g"))
+        with patch('builtins.print') as mock_print:
+            self.assertEqual([c.name for c in book.contacts], ["A", "D", "F"])
+        self.assertEqual(mock_print.call_count, 2)
+        self.assertEqual(sorted(book.validation.dropped), [2, 3])
+        self.assertEqual(book.count_contacts(), 3)
+        self.assertTrue(book._indexed)
+        with patch('builtins.print'):
+            self.assertTrue(book.save_to_json(self.json_path))
+        self.assertEqual(self.load(self.json_path).count_contacts(), 3)
+
+    def test_unreadable_record_on_access(self):
+        with open(self.ndjson_path, 'w') as f:
+            f.write('{"name":"a","surname":"b","id":1}\n{"name":"b","surname":"c","phone":{"home":[{}]},"email":[1],"id":2}\n')
+        book = self.load(self.ndjson_path, lazy=True)
+        with patch('builtins.print'):
+            self.assertFalse(book.get_contact_by_id(2))
+            self.assertEqual(list(book.iter_search('all')), [book.get_contact_by_id(1)])
+            self.assertFalse(book.remove_by_id(2))
+        self.assertEqual(book.validation.dropped, [2])
+        self.assertIn("1 unreadable records", book.validation.summary())
+
+    def test_unsupported_storage(self):
+        from src.columnar_book import ColumnarContactBook
+        with self.assertRaises(ValueError):
+            ColumnarContactBook().load_from_json(self.json_path, lazy=True)
+
+
+class TestDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts([
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234"]}, "email": {"work": ["alice@work.com"]}},
+            {"name": "Bob", "surname": "Brown", "phone": {"home": ["555"]}},
+            {"name": "alice", "surname": "SMITH", "phone": {"home": ["777"]}, "address": "Main St"},
+            {"name": "Carl", "surname": "White", "phone": {"home": ["777"]}, "email": {"other": ["Bob@Mail.com"]}},
+            {"name": "Dan", "surname": "Grey", "email": {"other": ["bob@mail.com"]}},
+            {"name": "Eve", "surname": "Black", "phone": "12-34"},
+            {"name": "Fay", "surname": "Black", "phone": "56-78"},
+        ])
+
+    def test_same_content(self):
+        copy = Contact(name="alice", surname="smith", phone={"mobile": ["1234"]}, email={"work": ["alice@work.com"]})
+        self.assertEqual([c.id for c in self.book.same_content(copy)], [1])
+        copy.address = "Elsewhere"
+        self.assertEqual(self.book.same_content(copy), [])
+
+    def test_same_name(self):
+        self.assertEqual([c.id for c in self.book.same_name(Contact(name="ALICE", surname="smith"))], [1, 3])
+        self.assertEqual(self.book.same_name(Contact(name="Alice", surname="Brown")), [])
+
+    def test_indexes_follow_changes(self):
+        alice = self.book.get_contact_by_id(1)
+        self.book.update_contact(alice, [{'field': 'surname', 'value': 'Jones'}])
+        self.assertEqual([c.id for c in self.book.same_name(Contact(name="Alice", surname="Smith"))], [3])
+        self.assertEqual([c.id for c in self.book.same_content(alice)], [1])
+        self.book.remove_by_id(1)
+        self.assertEqual(self.book.same_content(alice), [])
+
+    def test_find_duplicates(self):
+        # 1 and 3 share a name, 3 and 4 a phone number, 4 and 5 an email ignoring case; 'error' phones are not keys
+        self.assertEqual(self.book.find_duplicates(), [[1, 3, 4, 5]])
+        self.assertEqual(self.book.find_duplicates(keys=('name',)), [[1, 3]])
+        self.assertEqual(self.book.find_duplicates(keys=('phone', 'email')), [[3, 4, 5]])
+        with self.assertRaises(ValueError):
+            self.book.find_duplicates(keys=('address',))
+
+    def test_empty_names_are_not_duplicates(self):
+        book = ContactBook()
+        book.add_contacts([{"name": "", "surname": "", "phone": "1"}, {"name": "", "surname": "", "email": "a@b.com"},
+                           {"name": "", "surname": "", "phone": "2"}, {"name": "", "surname": "", "phone": "2"}])
+        self.assertEqual(book.find_duplicates(), [[3, 4]])
+
+    def test_merge_contacts(self):
+        merged = self.book.merge_contacts([3, 1])
+        self.assertEqual(merged.id, 1)
+        self.assertEqual(merged.phone, {"mobile": ["1234"], "home": ["777"]})
+        self.assertEqual(merged.address, "Main St")
+        self.assertFalse(self.book.get_contact_by_id(3))
+        self.assertEqual(self.book.get_contact_by_id(1), merged)
+        self.assertEqual([c.id for c in self.book.search_contacts('all', 'all', ('phone', '777'))], [1, 4])
+        self.assertEqual(self.book.find_duplicates(keys=('name',)), [])
+
+    def test_merge_missing_contact(self):
+        with patch('builtins.print') as mock_print:
+            self.assertFalse(self.book.merge_contacts([1, 99]))
+        mock_print.assert_called_once_with("Contact not found in the book.")
+        self.assertEqual(self.book.count_contacts(), 7)
+
 if __name__ == '__main__':
     unittest.main()
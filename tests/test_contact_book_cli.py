@@ -95,6 +95,85 @@ class TestContactBookCLI(unittest.TestCase):
         self.cli.find_contact_menu()
         self.cli.book.search_contacts.assert_called_once_with('any', 'all', ('surname', 'Smith', None), ('name', 'Bob', None))
 
+    @patch('builtins.input', side_effect=[
+        'all',     # search_mode
+        'all',     # display mode
+        'phone',   # field
+        '',        # label
+        '12',      # value
+        'pre',     # invalid match mode
+        'prefix',  # match mode
+        'n'        # end input
+    ])
+    @patch('builtins.print')
+    def test_find_contact_menu_invalid_match(self, mock_print, mock_input):
+        self.cli.book.search_contacts = MagicMock(return_value=[])
+        self.cli.find_contact_menu()
+        mock_print.assert_any_call("Invalid match mode.")
+        self.cli.book.search_contacts.assert_called_once_with('all', 'all', ('phone', '12', None, 'prefix'))
+
+    @patch('builtins.input', side_effect=[
+        'all',     # search_mode
+        'page',    # display mode
+        'surname', # field
+        'Smith',   # value
+        'n',       # end input
+        'q'        # stop after the first page
+    ])
+    @patch('builtins.print')
+    def test_find_contact_menu_page(self, mock_print, mock_input):
+        self.cli.PAGE_SIZE = 2
+        self.cli.book.add_contacts({'name': f'n{i}', 'surname': 'Smith'} for i in range(5))
+        matches = self.cli.find_contact_menu()
+        self.assertEqual([c.id for c in matches], [1, 2])
+
+    @patch('builtins.input', side_effect=['', ''])
+    @patch('builtins.print')
+    def test_display_contacts_menu_pages(self, mock_print, mock_input):
+        self.cli.PAGE_SIZE = 2
+        self.cli.book.add_contacts({'name': f'n{i}', 'surname': 'Smith'} for i in range(4))
+        self.cli.display_contacts_menu()
+        mock_print.assert_any_call("\nThere are 4 contacts.\n")
+        mock_print.assert_any_call("No more contacts.")
+        self.assertEqual(mock_input.call_count, 2) # a full last page cannot tell it is the last
+
+    @patch('builtins.input', side_effect=[
+        'alice', 'smith', '',  # name, surname, address
+        'y', 'mobile', '1234', # a phone number
+        'n', 'n',              # no more numbers, no email
+        'n'                    # do not add the duplicate
+    ])
+    @patch('builtins.print')
+    def test_add_contact_menu_duplicate(self, mock_print, mock_input):
+        self.cli.book.add_contact(Contact(name='Alice', surname='Smith', phone={'mobile': ['1234']}))
+        self.cli.add_contact_menu()
+        self.assertEqual(self.cli.book.count_contacts(), 1)
+        self.assertIn("This contact already exists", mock_input.call_args.args[0])
+
+    @patch('builtins.input', side_effect=[
+        'Alice', 'Smith', 'Main St', 'n', 'n',
+        'y'                    # add it although the name exists
+    ])
+    @patch('builtins.print')
+    def test_add_contact_menu_same_name(self, mock_print, mock_input):
+        self.cli.book.add_contact(Contact(name='Alice', surname='Smith', phone={'mobile': ['1234']}))
+        self.cli.add_contact_menu()
+        self.assertEqual(self.cli.book.count_contacts(), 2)
+        self.assertIn("A contact with this name already exists", mock_input.call_args.args[0])
+
+    @patch('builtins.input', side_effect=['y', 'n'])
+    @patch('builtins.print')
+    def test_merge_duplicates_menu(self, mock_print, mock_input):
+        self.cli.book.add_contacts([{'name': 'Alice', 'surname': 'Smith', 'phone': '1234'},
+                                    {'name': 'Bob', 'surname': 'Brown', 'phone': '555'},
+                                    {'name': 'alice', 'surname': 'smith', 'email': 'alice@mail.com'},
+                                    {'name': 'Carl', 'surname': 'White', 'phone': '555'}])
+        self.cli.merge_duplicates_menu()
+        mock_print.assert_any_call("Contacts merged into ID: 1")
+        self.assertEqual([c.id for c in self.cli.book.contacts], [1, 2, 4])
+        self.assertEqual(self.cli.book.get_contact_by_id(1).email, {'other': ['alice@mail.com']})
+        self.assertFalse(self.cli.saved)
+
     @patch("builtins.input", side_effect=[
         "test_contacts",  # filename
         ".",              # directory
@@ -231,6 +310,20 @@ class TestContactBookCLI(unittest.TestCase):
         self.assertEqual(len(self.cli.book.contacts),1)
         mock_print.assert_any_call("Goodbye!")
 
+    @patch('builtins.input', side_effect=[
+        '1',              # choose load
+        'test_contacts.json',  # path
+        '6',
+        '3'
+    ])
+    @patch('builtins.print')
+    def test_load_large_file_lazily(self, mock_print, mock_input):
+        self.cli.PROGRESS_MIN_SIZE = 0
+        self.cli.run()
+        self.assertEqual(self.cli.book._unhydrated, 1)
+        self.assertEqual(len(self.cli.book.contacts),1)
+        self.assertEqual(self.cli.book._unhydrated, 0)
+
     @patch('builtins.input', side_effect=[
         'n'  # abort
     ])
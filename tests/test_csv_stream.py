@@ -0,0 +1,56 @@
+import unittest
+import io
+from src.csv_stream import format_labels, parse_labels, write_csv_contacts, iter_csv_contacts
+
+class TestCsvStream(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234", "5678"], "home": [], "work": ["555"]},
+             "email": {"work": ["alice@work.com"]}, "address": "1 Main St, Springfield", "id": 1},
+            {"name": "Bob", "surname": "O\"Brien", "phone": {}, "email": {}, "address": "line one\nline two", "id": 7},
+        ]
+
+    def test_labels(self):
+        self.assertEqual(format_labels({"mobile": ["1234", "5678"], "home": [], "work": ["555"]}), "mobile:1234,5678; work:555")
+        self.assertEqual(parse_labels("mobile:1234,5678; work:555"), {"mobile": ["1234", "5678"], "work": ["555"]})
+        self.assertEqual(parse_labels(" home : 1 , 2 ;no label; home:3"), {"home": ["1", "2", "3"]})
+        self.assertEqual(parse_labels(""), {})
+
+    def test_round_trip(self):
+        text = io.StringIO(newline='')
+        self.assertEqual(write_csv_contacts(text, iter(self.records), chunk_size=1), 2)
+        self.assertTrue(text.getvalue().startswith("ID,Name,Surname,Address,Phones,Emails\r\n"))
+        entries = list(iter_csv_contacts(io.BytesIO(text.getvalue().encode('utf-8'))))
+        self.assertEqual(entries[0], {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234", "5678"], "work": ["555"]},
+                                      "email": {"work": ["alice@work.com"]}, "address": "1 Main St, Springfield", "id": 1})
+        self.assertEqual(entries[1]["surname"], "O\"Brien")
+        self.assertEqual(entries[1]["address"], "line one\nline two")
+
+    def test_header_columns(self):
+        data = "\ufeffsurname,NAME,phone,extra\nSmith,alice,other:1234,x\nBrown,bob\n".encode('utf-8')
+        entries = list(iter_csv_contacts(io.BytesIO(data)))
+        self.assertEqual(entries[0], {"name": "alice", "surname": "Smith", "phone": {"other": ["1234"]}, "email": {},
+                                      "address": "", "id": None})
+        self.assertEqual(entries[1]["phone"], {})
+
+    def test_id_that_is_not_a_number(self):
+        entries = list(iter_csv_contacts(io.BytesIO(b"ID,Name\nA-17,alice\n 42 ,bob\n-3,carl\n")))
+        self.assertEqual([entry["id"] for entry in entries], [None, 42, None])
+
+    def test_no_name_column(self):
+        with self.assertRaises(ValueError):
+            list(iter_csv_contacts(io.BytesIO(b"ID,Surname\n1,Smith\n")))
+
+    def test_empty_file(self):
+        self.assertEqual(list(iter_csv_contacts(io.BytesIO(b""))), [])
+
+    def test_progress(self):
+        data = ("Name\n" + "alice\n" * 3).encode('utf-8')
+        calls = []
+        list(iter_csv_contacts(io.BytesIO(data), progress=lambda read, total: calls.append(read)))
+        self.assertEqual(calls[-1], len(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
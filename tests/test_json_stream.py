@@ -0,0 +1,149 @@
+import unittest
+import io
+import json
+from src.json_stream import (iter_json_contacts, iter_ndjson_contacts, iter_ndjson_lines, last_ndjson_record, print_progress, split_ndjson,
+                              write_json_contacts, write_ndjson_contacts)
+from unittest.mock import patch
+
+class TestIterJsonContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.contacts = [
+            {"name": "Alice", "surname": "Smith", "phone": {"mobile": ["1234567890"]}, "email": {}, "address": "1 Main St"},
+            {"name": "Bob", "surname": "Brown", "phone": {}, "email": {"work": ["bob@company.com"]}, "address": "été \"2\""},
+            {"name": "Carl", "surname": "White"},
+        ]
+
+    def parse(self, document, chunk_size=7, progress=None):
+        return list(iter_json_contacts(io.BytesIO(document.encode('utf-8')), chunk_size=chunk_size, progress=progress))
+
+    def test_small_chunks(self):
+        document = json.dumps({"version": 12345, "contacts": self.contacts, "other": [1, {"a": 2}]}, indent=4)
+        for chunk_size in (1, 3, 7, 1 << 16):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(document, chunk_size), self.contacts)
+
+    def test_compact_document(self):
+        self.assertEqual(self.parse(json.dumps({"contacts": self.contacts}, separators=(',', ':'))), self.contacts)
+
+    def test_empty(self):
+        self.assertEqual(self.parse('{}'), [])
+        self.assertEqual(self.parse('{"contacts": [ ]}'), [])
+        self.assertEqual(self.parse('{"name": "book"}'), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.parse('{"contacts": [{"name": "Alice"}')
+        with self.assertRaises(ValueError):
+            self.parse('[{"name": "Alice"}]')
+        with self.assertRaises(ValueError):
+            self.parse('{"contacts": [{"name": "Alice"} {"name": "Bob"}]}')
+
+    def test_progress(self):
+        document = json.dumps({"contacts": self.contacts})
+        calls = []
+        self.parse(document, chunk_size=16, progress=lambda done, total: calls.append(done))
+        self.assertEqual(calls[-1], len(document.encode('utf-8')))
+
+    @patch('builtins.print')
+    def test_print_progress(self, mock_print):
+        progress = print_progress(step=25)
+        for done in (10, 30, 40, 100):
+            progress(done, 100)
+        self.assertEqual([c.args[0] for c in mock_print.call_args_list], ["Loading... 0%", "Loading... 25%", "Loading... 100%"])
+
+    @patch('builtins.print')
+    def test_print_progress_unknown_size(self, mock_print):
+        progress = print_progress(step=10)
+        for done in (1 << 20, 12 << 20, 15 << 20, 25 << 20):
+            progress(done, None)
+        self.assertEqual([c.args[0] for c in mock_print.call_args_list], ["Loading... 0 MB", "Loading... 10 MB", "Loading... 20 MB"])
+
+
+class TestWriteJsonContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            {"name": "Alice", "phone": {"home": [], "mobile": ["1234"]}, "email": {"personal": []}},
+            {"name": "Bob", "phone": {}, "email": {"work": ["bob@company.com"]}},
+            {"name": "Carl", "phone": {"other": ["5"]}, "email": {}},
+        ]
+        self.expected = [
+            {"name": "Alice", "phone": {"mobile": ["1234"]}, "email": {}},
+            {"name": "Bob", "phone": {}, "email": {"work": ["bob@company.com"]}},
+            {"name": "Carl", "phone": {"other": ["5"]}, "email": {}},
+        ]
+
+    def write(self, records, **kwargs):
+        f = io.StringIO()
+        count = write_json_contacts(f, records, **kwargs)
+        return count, f.getvalue()
+
+    def test_same_layout_as_json_dump(self):
+        for n in range(4):
+            with self.subTest(n=n):
+                count, text = self.write(self.records[:n], chunk_size=2)
+                self.assertEqual(count, n)
+                self.assertEqual(text, json.dumps({"contacts": self.expected[:n]}, indent=4))
+
+    def test_compact(self):
+        count, text = self.write(self.records, compact=True, chunk_size=1)
+        self.assertEqual(text, json.dumps({"contacts": self.expected}, separators=(',', ':')))
+        self.assertEqual(list(iter_json_contacts(io.BytesIO(text.encode()))), self.expected)
+
+
+
+class TestNdjson(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [{"name": f"n{i}", "phone": {"home": [], "mobile": [str(i) * i]}, "id": i} for i in range(1, 30)]
+        f = io.StringIO()
+        self.count = write_ndjson_contacts(f, self.records, chunk_size=4)
+        self.data = f.getvalue().encode('utf-8')
+
+    def test_write(self):
+        self.assertEqual(self.count, 29)
+        lines = self.data.decode().splitlines()
+        self.assertEqual(len(lines), 29)
+        self.assertEqual(json.loads(lines[0]), {"name": "n1", "phone": {"mobile": ["1"]}, "id": 1})
+        self.assertTrue(self.data.endswith(b'\n'))
+
+    def test_iter(self):
+        data = b'\n' + self.data + b'  \n'
+        self.assertEqual(list(iter_ndjson_contacts(io.BytesIO(data))), [json.loads(line) for line in self.data.splitlines()])
+        calls = []
+        list(iter_ndjson_contacts(io.BytesIO(data), progress=lambda read, total: calls.append(read)))
+        self.assertEqual(calls[-1], len(data))
+
+    def test_iter_lines(self):
+        data = (b'{"name":"a","phone":{"id":["12"]},"id":7}\n\n{"id": 12, "name": "b"}\n'
+                b'{"name":"\\"id\\":3","email":{}}\n{"name":"id","surname":"x"}')
+        lines = list(iter_ndjson_lines(io.BytesIO(data)))
+        self.assertEqual([id for id, line in lines], [7, 12, None, None])
+        self.assertEqual([json.loads(line)["name"] for id, line in lines], ["a", "b", '"id":3', "id"])
+        self.assertEqual([id for id, line in iter_ndjson_lines(io.BytesIO(self.data))], list(range(1, 30)))
+
+    def test_split(self):
+        for parts in (1, 2, 3, 7, 100):
+            with self.subTest(parts=parts):
+                ranges = split_ndjson(io.BytesIO(self.data), parts)
+                self.assertLessEqual(len(ranges), parts)
+                self.assertEqual((ranges[0][0], ranges[-1][1]), (0, len(self.data)))
+                self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+                self.assertTrue(all(self.data[start - 1:start] == b'\n' for start, stop in ranges[1:]))
+                ids = [r["id"] for start, stop in ranges for r in iter_ndjson_contacts(io.BytesIO(self.data), start, stop)]
+                self.assertEqual(ids, list(range(1, 30)))
+
+    def test_last_record(self):
+        self.assertEqual(last_ndjson_record(io.BytesIO(self.data))["id"], 29)
+        self.assertEqual(last_ndjson_record(io.BytesIO(self.data.rstrip())), {"name": "n29", "phone": {"mobile": ["29" * 29]}, "id": 29})
+        self.assertIsNone(last_ndjson_record(io.BytesIO(b'')))
+        self.assertIsNone(last_ndjson_record(io.BytesIO(b'\n \n')))
+        big = json.dumps({"name": "x" * 10000, "id": 7}).encode()
+        self.assertEqual(last_ndjson_record(io.BytesIO(b'{"id": 1}\n' + big + b'\n'))["id"], 7)
+        self.assertEqual(last_ndjson_record(io.BytesIO(big))["id"], 7)
+        with self.assertRaises(ValueError):
+            last_ndjson_record(io.BytesIO(self.data + b'{"name": "cut'))
+
+if __name__ == '__main__':
+    unittest.main()
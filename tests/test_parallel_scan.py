@@ -0,0 +1,46 @@
+import unittest
+import os
+from src.contact_book import ContactBook
+from src.contact import Contact
+from src import parallel_scan
+
+class TestParallelScan(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contacts({"name": f"n{i}", "surname": "Smith" if i % 3 else "Brown",
+                                "phone": {"home": [str(1000 + i)]}, "address": f"{i % 7} Main St"} for i in range(60))
+
+    def assert_same_as_linear(self, how, show, *criteria):
+        self.assertEqual(self.book.search_contacts(how, show, *criteria, workers=2),
+                         self.book.search_contacts(how, show, *criteria))
+
+    def test_same_results_as_linear_scan(self):
+        self.assert_same_as_linear('all', 'all', ('address', '3 main st'))
+        self.assert_same_as_linear('any', 'all', ('address', '3 Main St'), ('address', '5 Main St'), ('name', 'N10'))
+        self.assert_same_as_linear('all', 'all', ('address', '3 Main St'), ('surname', 'brown'))
+        self.assert_same_as_linear('all', 'all', ('address', 'nowhere'))
+
+    def test_first(self):
+        self.assert_same_as_linear('all', 'first', ('address', '6 Main St'))
+        self.assert_same_as_linear('any', 'first', ('address', '0 Main St'), ('id', 3))
+        self.assertEqual(self.book.search_contacts('all', 'first', ('address', 'nowhere'), workers=2), [])
+
+    def test_snapshot_reused_until_the_book_changes(self):
+        self.book.search_contacts('all', 'all', ('address', '3 Main St'), workers=2)
+        path = parallel_scan.snapshot_path(self.book)
+        self.assertEqual(parallel_scan.snapshot_path(self.book), path)
+        self.book.add_contact(Contact(name="Dan", surname="Grey", address="3 Main St"))
+        self.assertEqual(self.book.search_contacts('all', 'all', ('address', '3 Main St'), workers=2)[-1].name, "Dan")
+        self.assertFalse(os.path.exists(path))
+        path = parallel_scan.snapshot_path(self.book)
+        del self.book
+        self.assertFalse(os.path.exists(path))
+
+    def test_invalid_criteria_raise(self):
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('all', 'all', ('birthday', 'today'), workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
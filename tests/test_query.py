@@ -0,0 +1,118 @@
+import unittest
+from itertools import combinations
+from src.contact import Contact, CompactContact
+from src.contact_book import ContactBook
+from src.query import Query, Term, QueryCache
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.contacts = [
+            Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"], "home": ["555"]},
+                    email={"work": ["alice@work.com"]}, address="Main St"),
+            Contact(name="Bob", surname="Smith", phone={"home": ["1234"]}, email="bob@mail.com"),
+            Contact(name="alice", surname="Brown", phone=["999", "12-3"], address="main st"),
+            CompactContact(name="Carl", surname="White", phone={"work": "12399"}, email="carl@mail"),
+        ]
+        self.criteria = [
+            ('name', 'ALICE'), ('surname', 'smith'), ('address', 'main st'), ('address', ''),
+            ('phone', '1234'), ('phone', '1234', 'home'), ('phone', 'error'), ('email', 'bob@mail.com', 'other'),
+            ('phone', '12', None, 'prefix'), ('phone', '99', 'work', 'suffix'), ('phone', '1-2', None, 'prefix'),
+            ('phone', 123, None, 'prefix'), ('phone', 1234), ('id', 1), ('email', 'error', ''),
+        ]
+
+    def test_predicate_same_as_matches(self):
+        for how in ('all', 'any'):
+            for n in (0, 1, 2):
+                for criteria in combinations(self.criteria, n):
+                    predicate = Query(how, criteria).predicate
+                    for contact in self.contacts:
+                        with self.subTest(how=how, criteria=criteria, contact=contact.name):
+                            self.assertEqual(predicate(contact), contact.matches(how, *criteria))
+
+    def test_invalid_criteria(self):
+        with self.assertRaises(ValueError):
+            Query('all', [('name',)])
+        with self.assertRaises(ValueError):
+            Query('some', [('name', 'Alice')])
+        with self.assertRaises(ValueError):
+            Query('all', [('birthday', 'today')])
+        with self.assertRaises(ValueError):
+            Query('all', [('email', 'a@b.com', None, 'prefix')])
+
+    def test_all_terms_ordered_by_selectivity(self):
+        book = ContactBook()
+        for contact in self.contacts:
+            book.add_contact(contact)
+        query = Query('all', [('address', 'main st'), ('phone', '1234'), ('name', 'alice')], book._index, 4)
+        self.assertEqual([t.field for t in query.terms], ['name', 'phone', 'address'])
+        self.assertTrue(query.uses_index)
+        self.assertEqual(query.candidates(), [1])
+        self.assertTrue(query.residual(book.get_contact_by_id(1)))
+
+        query = Query('all', [('address', 'main st'), ('phone', '12', None, 'prefix'), ('surname', 'x'), ('id', 2)])
+        self.assertEqual([t.kind for t in query.terms], ['never', 'string', 'string', 'affix'])
+        self.assertFalse(query.uses_index)
+
+    def test_any_needs_every_term_in_the_index(self):
+        book = ContactBook()
+        for contact in self.contacts:
+            book.add_contact(contact)
+        self.assertTrue(Query('any', [('name', 'Bob'), ('phone', '999')], book._index).uses_index)
+        query = Query('any', [('name', 'Bob'), ('address', 'main st')], book._index)
+        self.assertFalse(query.uses_index)
+        self.assertIsNone(query.residual)
+
+    def test_explain(self):
+        book = ContactBook()
+        for contact in self.contacts:
+            book.add_contact(contact)
+        self.assertEqual(book.explain('all', ('address', 'Main St'), ('surname', 'Smith')),
+                         "all of 2 criteria: intersect the index postings, smallest first, then test the rest\n"
+                         "  1. index   (2 contacts)     surname = 'Smith'\n"
+                         "  2. test    (string)         address = 'Main St'")
+        self.assertEqual(book.explain('any', ('address', 'Main St'), ('phone', '12', 'home', 'prefix')).splitlines()[0],
+                         "any of 2 criteria: scan 4 contacts, testing in this order")
+        self.assertEqual(str(Term('phone', '12', 'home', 'prefix')), "phone prefix '12' [home]")
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def test_key_normalization(self):
+        key = QueryCache.key('all', 'all', [('name', 'ALICE'), ('phone', '12', None, 'prefix')])
+        self.assertEqual(QueryCache.key('all', 'all', [('phone', 12, '', 'prefix'), ('name', 'alice', None, 'exact'),
+                                                       ('name', 'Alice')]), key)
+        self.assertNotEqual(QueryCache.key('any', 'all', [('name', 'alice'), ('phone', '12', None, 'prefix')]), key)
+        self.assertNotEqual(QueryCache.key('all', 'first', [('name', 'alice'), ('phone', '12', None, 'prefix')]), key)
+        self.assertNotEqual(QueryCache.key('all', 'all', [('email', 'A@b.com')]), QueryCache.key('all', 'all', [('email', 'a@b.com')]))
+        self.assertIsNone(QueryCache.key('all', 'all', [('name',)]))
+        self.assertIsNone(QueryCache.key('all', 'all', [('phone', ['1234'])]))
+
+    def test_lru_and_counters(self):
+        cache = QueryCache(maxsize=2)
+        for i in range(3):
+            cache.put(('all', 'all', i), 0, [i])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(('all', 'all', 0), 0))
+        self.assertEqual(cache.get(('all', 'all', 1), 0), (1,))
+        cache.put(('all', 'all', 3), 0, [3])
+        self.assertEqual(cache.get(('all', 'all', 1), 0), (1,))
+        self.assertIsNone(cache.get(('all', 'all', 2), 0))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_stale_entries_are_dropped(self):
+        cache = QueryCache()
+        cache.put('key', 1, [1, 2])
+        self.assertIsNone(cache.get('key', 2))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.misses, 1)
+
+    def test_disabled(self):
+        cache = QueryCache(0)
+        cache.put('key', 0, [1])
+        self.assertIsNone(cache.get('key', 0))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
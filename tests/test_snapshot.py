@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch
+import os
+from src.contact_book import ContactBook
+from src.contact import Contact, CompactContact
+from src.snapshot import SnapshotContactBook, write_snapshot
+
+class TestSnapshotContactBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = ContactBook()
+        self.book.add_contact(Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"], "home": ["555"]},
+                                      email={"work": ["alice@work.com"]}, address="Main St"))
+        self.book.add_contact(Contact(name="Bob", surname="Smith", phone={"home": ["1234"]}, email="bob@mail.com"))
+        self.book.add_contact(Contact(name="Zoé", surname="Brown", phone=["999"], address="main st"))
+        self.book.add_contact(Contact(name="Carl", surname="White"))
+        self.book.remove_by_id(4)
+        self.filepath = os.path.join(".", "test_snapshot.cbs")
+        self.assertEqual(write_snapshot(self.book, self.filepath), 3)
+        self.snapshot = SnapshotContactBook(self.filepath)
+
+    def tearDown(self):
+        self.snapshot.close()
+        os.remove(self.filepath)
+
+    def test_open(self):
+        self.assertEqual(self.snapshot.count_contacts(), 3)
+        self.assertEqual(self.snapshot.next_id, 4)
+        self.assertEqual([CompactContact.from_contact(c) for c in self.snapshot.contacts], self.book.contacts)
+
+    def test_get_contact_by_id(self):
+        self.assertEqual(self.snapshot.get_contact_by_id(3).name, "Zoé")
+        self.assertEqual(self.snapshot.get_contact_by_id(1).phone, {"mobile": ["1234"], "home": ["555"]})
+        self.assertFalse(self.snapshot.get_contact_by_id(4))
+        self.assertFalse(self.snapshot.get_contact_by_id(0))
+
+    def test_search_same_as_contact_book(self):
+        queries = [
+            ('all', 'all', ('name', 'ZOÉ')),
+            ('all', 'all', ('surname', 'smith'), ('phone', '1234')),
+            ('all', 'all', ('phone', '1234', 'home')),
+            ('all', 'all', ('email', 'bob@mail.com', 'work')),
+            ('all', 'all', ('name', 'zoé'), ('address', 'MAIN ST')),
+            ('all', 'first', ('surname', 'smith')),
+            ('any', 'all', ('surname', 'Brown'), ('email', 'bob@mail.com')),
+            ('any', 'all', ('phone', '55', None, 'prefix'), ('phone', '99', None, 'suffix')),
+            ('all', 'all', ('name', 'Nobody')),
+            ('all', 'all'),
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual([c.id for c in self.snapshot.search_contacts(*query)],
+                                 [c.id for c in self.book.search_contacts(*query)])
+
+    def test_iter_search_same_as_contact_book(self):
+        for criteria in ([('surname', 'smith')], [('phone', '1234')], [('address', 'main st')], []):
+            with self.subTest(criteria=criteria):
+                for kwargs in ({}, {'after': 1}, {'after': 2, 'limit': 1}, {'offset': 1}):
+                    self.assertEqual([c.id for c in self.snapshot.iter_search('all', *criteria, **kwargs)],
+                                     [c.id for c in self.book.iter_search('all', *criteria, **kwargs)])
+
+    def test_duplicates_same_as_contact_book(self):
+        for contact in (Contact(name="zoé", surname="BROWN"), self.book.get_contact_by_id(1)):
+            with self.subTest(contact=contact):
+                self.assertEqual([c.id for c in self.snapshot.same_name(contact)], [c.id for c in self.book.same_name(contact)])
+                self.assertEqual([c.id for c in self.snapshot.same_content(contact)], [c.id for c in self.book.same_content(contact)])
+        self.assertEqual(self.snapshot.find_duplicates(), self.book.find_duplicates())
+
+    def test_explain(self):
+        self.assertEqual(self.snapshot.explain('all', ('surname', 'Smith'), ('phone', '1234', 'home')),
+                         "all of 2 criteria: intersect the snapshot indexes\n"
+                         "  1. index   (2 contacts)     surname = 'Smith'\n"
+                         "  2. index   (1 contacts)     phone = '1234' [home]")
+        self.assertEqual(self.snapshot.explain('any', ('surname', 'Smith'), ('address', 'Main St')).splitlines()[0],
+                         "any of 2 criteria: scan 3 contacts, testing in this order")
+
+    def test_fuzzy_search(self):
+        self.assertEqual([c.id for c, score in self.snapshot.fuzzy_search("Smtih")], [1, 2])
+
+    def test_read_only(self):
+        self.assertFalse(self.snapshot.add_contact(Contact(name="Dan", surname="Grey")))
+        self.assertFalse(self.snapshot.remove_by_id(1))
+        self.assertFalse(self.snapshot.merge_contacts([1, 2]))
+        self.assertEqual(self.snapshot.count_contacts(), 3)
+
+    def test_not_a_snapshot(self):
+        path = os.path.join(".", "test_not_snapshot.cbs")
+        try:
+            with open(path, 'wb') as f:
+                f.write(b'{"contacts": []}' + b' ' * 100)
+            with self.assertRaises(ValueError):
+                SnapshotContactBook(path)
+        finally:
+            os.remove(path)
+
+    def test_empty_book(self):
+        path = os.path.join(".", "test_empty_snapshot.cbs")
+        try:
+            write_snapshot(ContactBook(), path)
+            with SnapshotContactBook(path) as snapshot:
+                self.assertEqual(snapshot.count_contacts(), 0)
+                self.assertEqual(snapshot.search_contacts('all', 'all', ('name', 'Alice')), [])
+        finally:
+            os.remove(path)
+
+    def test_records_sorted_by_id(self):
+        ndjson, path = os.path.join(".", "test_unsorted.ndjson"), os.path.join(".", "test_unsorted.cbs")
+        try:
+            with open(ndjson, 'w') as f:
+                f.write('{"name":"c","surname":"x","id":3}\n{"name":"a","surname":"x","id":1}\n{"name":"b","surname":"y","id":2}\n')
+            book = ContactBook()
+            with patch('builtins.print'):
+                book.load_from_ndjson(ndjson)
+            write_snapshot(book, path)
+            with SnapshotContactBook(path) as snapshot:
+                self.assertEqual([snapshot.get_contact_by_id(id).name for id in (1, 2, 3)], ["A", "B", "C"])
+                self.assertEqual(snapshot.next_id, 4)
+                self.assertEqual([c.id for c in snapshot.search_contacts('all', 'all', ('surname', 'x'))], [1, 3])
+        finally:
+            for file_path in (ndjson, path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+import os
+from src.contact_book import ContactBook
+from src.sqlite_book import SqliteContactBook
+from src.contact import Contact, CompactContact
+
+class TestSqliteContactBook(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = os.path.join(".", "test_book.db")
+        self.book = SqliteContactBook(self.db_path)
+        self.reference = ContactBook()
+        for book in (self.book, self.reference):
+            book.add_contact(Contact(name="Alice", surname="Smith", phone={"mobile": ["1234"], "home": ["555"]},
+                                     email={"work": ["alice@work.com"]}, address="Main St"))
+            book.add_contact(Contact(name="Bob", surname="Smith", phone={"home": ["1234"]}, email="bob@mail.com"))
+            book.add_contact(Contact(name="alice", surname="Brown", phone=["999", "12-3"], address="main st"))
+
+    def tearDown(self):
+        self.book.close()
+        for path in (self.db_path, "test_book.json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_add_and_get(self):
+        self.assertEqual(self.book.count_contacts(), 3)
+        self.assertEqual(self.book.next_id, 4)
+        self.assertEqual(self.book.get_contact_by_id(3).phone, {"other": ["999", "error"]})
+        self.assertFalse(self.book.get_contact_by_id(9))
+
+    def test_search_same_as_contact_book(self):
+        queries = [
+            ('all', 'all', ('name', 'ALICE')),
+            ('all', 'all', ('surname', 'smith'), ('phone', '1234')),
+            ('all', 'all', ('phone', '1234', 'home')),
+            ('all', 'all', ('phone', 'error')),
+            ('all', 'all', ('name', 'alice'), ('address', 'MAIN ST')),
+            ('all', 'first', ('name', 'alice')),
+            ('any', 'all', ('surname', 'Brown'), ('email', 'bob@mail.com')),
+            ('any', 'all', ('phone', '55', None, 'prefix'), ('phone', '99', None, 'suffix')),
+            ('all', 'all', ('phone', '12', 'home', 'prefix')),
+            ('all', 'all', ('id', '1')),
+            ('all', 'all'),
+            ('any', 'all'),
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                results = self.book.search_contacts(*query)
+                expected = self.reference.search_contacts(*query)
+                self.assertEqual([c.id for c in results], [c.id for c in expected])
+                self.assertEqual([CompactContact.from_contact(c) for c in results], expected)
+
+    def test_iter_search_same_as_contact_book(self):
+        for criteria in ([('surname', 'smith')], [('name', 'alice'), ('address', 'main st')], []):
+            with self.subTest(criteria=criteria):
+                self.assertEqual([c.id for c in self.book.iter_search('any', *criteria, offset=1)],
+                                 [c.id for c in self.reference.iter_search('any', *criteria, offset=1)])
+                self.assertEqual([c.id for c in self.book.iter_search('all', *criteria, after=1, limit=1)],
+                                 [c.id for c in self.reference.iter_search('all', *criteria, after=1, limit=1)])
+
+    def test_duplicates_same_as_contact_book(self):
+        for contact in (Contact(name="ALICE", surname="smith"), self.reference.get_contact_by_id(2)):
+            with self.subTest(contact=contact):
+                self.assertEqual([c.id for c in self.book.same_name(contact)], [c.id for c in self.reference.same_name(contact)])
+                self.assertEqual([c.id for c in self.book.same_content(contact)], [c.id for c in self.reference.same_content(contact)])
+        self.assertEqual(self.book.find_duplicates(), self.reference.find_duplicates())
+        self.assertEqual(CompactContact.from_contact(self.book.merge_contacts([1, 2])), self.reference.merge_contacts([1, 2]))
+        self.assertEqual([CompactContact.from_contact(c) for c in self.book.contacts], self.reference.contacts)
+
+    def test_export_import_csv(self):
+        path = os.path.join(".", "test_book.csv")
+        try:
+            with patch('builtins.print'):
+                self.reference.export_to_csv(path)
+                self.assertEqual(self.book.import_from_csv(path, chunk_size=2), 3)
+            self.assertFalse(self.book._db.in_transaction)
+            self.assertEqual([CompactContact.from_contact(c) for c in self.book.contacts[3:]], self.reference.contacts)
+        finally:
+            os.remove(path)
+
+    def test_explain(self):
+        plan = self.book.explain('all', ('surname', 'Smith'), ('phone', '12', None, 'prefix')).splitlines()
+        self.assertEqual(plan[0], "SELECT id FROM contacts WHERE (surname_key = ?) AND "
+                                  "(id IN (SELECT contact_id FROM phones WHERE value >= ? AND value < ?)) ORDER BY id ['smith', '12', '12:']")
+        self.assertTrue(any("contacts_surname" in line for line in plan[1:]))
+        with self.assertRaises(ValueError):
+            self.book.explain('all', ('birthday', 'today'))
+
+    def test_search_invalid(self):
+        self.assertFalse(self.book.search_contacts('all', 'invalid_input', ('name', 'Alice')))
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('all', 'all', ('birthday', 'today'))
+        with self.assertRaises(ValueError):
+            self.book.search_contacts('all', 'all', ('name', 'Al', None, 'prefix'))
+
+    def test_update_and_remove_are_durable(self):
+        bob = self.book.search_contacts('all', 'first', ('name', 'Bob'))[0]
+        self.book.update_contact(bob, [{'field': 'phone', 'value': '777', 'label': 'work', 'mode': 'add'}])
+        self.book.remove_contact(self.book.get_contact_by_id(1))
+        self.book.close()
+        self.book = SqliteContactBook(self.db_path)
+        self.assertEqual([c.id for c in self.book.contacts], [2, 3])
+        self.assertEqual(self.book.get_contact_by_id(2).phone, {"home": ["1234"], "work": ["777"]})
+        self.assertEqual(self.book.next_id, 4)
+        self.book.add_contact(Contact(name="Dan", surname="Grey"))
+        self.assertEqual(self.book.get_contact_by_id(4).name, "Dan")
+
+    def test_add_contacts(self):
+        entries = [{"name": "dan", "surname": "grey", "phone": "4321"}, Contact(name="Eve", surname="Smith")]
+        self.assertEqual(self.book.add_contacts(entries), 2)
+        self.reference.add_contacts(entries)
+        self.assertEqual([c.id for c in self.book.search_contacts('any', 'all', ('surname', 'smith'), ('phone', '4321'))],
+                         [1, 2, 4, 5])
+        self.assertEqual(self.book.next_id, 6)
+
+    def test_fuzzy_search(self):
+        self.assertEqual([c.id for c, score in self.book.fuzzy_search("Smtih")],
+                         [c.id for c, score in self.reference.fuzzy_search("Smtih")])
+
+    def test_migration_from_json(self):
+        self.reference.save_to_json("test_book.json")
+        migrated = SqliteContactBook.from_json("test_book.json", ":memory:")
+        self.assertEqual(migrated.count_contacts(), 3)
+        self.assertEqual([CompactContact.from_contact(c) for c in migrated.contacts], self.reference.contacts)
+        migrated.close()
+
+    def test_invalid_json_rolls_back(self):
+        with open("test_book.json", "w") as f:
+            f.write('{"contacts": [{"name": "Dan", "surname": "Grey"}, {"name": ')
+        self.book.load_from_json("test_book.json")
+        self.assertEqual(self.book.count_contacts(), 3)
+        self.assertEqual(self.book.next_id, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch
+from src.contact import Contact
+from src.validation import ValidationReport, contact_errors, print_contact_errors, INVALID_PHONE, INVALID_EMAIL, MESSAGES
+
+class TestValidationReport(unittest.TestCase):
+
+    def setUp(self):
+        self.valid = Contact(name="Alice", surname="Smith", phone="1234", email="alice@mail.com")
+        self.invalid = Contact(name="Bob", surname="Brown", phone=["12-3", "45a", "678"], email="bob@")
+        self.valid.id, self.invalid.id = 1, 2
+
+    def test_contact_errors(self):
+        self.assertEqual(contact_errors(self.valid), {})
+        self.assertEqual(contact_errors(self.invalid), {INVALID_PHONE: 2, INVALID_EMAIL: 1})
+
+    @patch('builtins.print')
+    def test_no_output_while_checking(self, mock_print):
+        report = ValidationReport()
+        for contact in (self.valid, self.invalid, self.invalid):
+            report.check(contact)
+        mock_print.assert_not_called()
+        self.assertEqual(report.counts, {INVALID_PHONE: 4, INVALID_EMAIL: 2})
+        self.assertEqual(report.ids, {INVALID_PHONE: [2, 2], INVALID_EMAIL: [2, 2]})
+        self.assertEqual(len(report), 6)
+
+    def test_empty_report(self):
+        report = ValidationReport()
+        report.check(self.valid)
+        self.assertFalse(report)
+        self.assertEqual(report.summary(), "")
+
+    def test_summary(self):
+        report = ValidationReport()
+        report.check(self.invalid)
+        self.assertEqual(report.summary().splitlines()[:2],
+                         ["2 invalid phone numbers in 1 contacts have been stored as 'error'.",
+                          "1 invalid emails in 1 contacts have been stored as 'error'."])
+
+    @patch('builtins.print')
+    def test_echo_is_limited_and_sampled(self, mock_print):
+        report = ValidationReport(echo=2, every=3)
+        for id in range(1, 11):
+            contact = Contact(name="Bob", surname="Brown", phone="x")
+            contact.id = id
+            report.check(contact)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertEqual(printed, ["[1] Bob Brown: invalid phone stored as 'error'.",
+                                   "[4] Bob Brown: invalid phone stored as 'error'.",
+                                   "Further invalid values are counted without being printed."])
+        self.assertEqual(report.counts[INVALID_PHONE], 10)
+
+    def test_merge(self):
+        report, other = ValidationReport(), ValidationReport()
+        report.check(self.invalid)
+        other.check(self.invalid)
+        report.merge(other)
+        self.assertEqual(report.counts, {INVALID_PHONE: 4, INVALID_EMAIL: 2})
+
+    @patch('builtins.print')
+    def test_dropped_records(self, mock_print):
+        report, other = ValidationReport(), ValidationReport()
+        other.drop(7, TypeError("Invalid type for email."))
+        mock_print.assert_called_once_with("[7] could not be read and was removed from the book: Invalid type for email.")
+        report.merge(other)
+        self.assertEqual((len(report), report.dropped), (1, [7]))
+        self.assertEqual(report.summary(), "1 unreadable records have been removed from the book.")
+
+    def test_invalid_every(self):
+        with self.assertRaises(ValueError):
+            ValidationReport(every=0)
+
+    @patch('builtins.print')
+    def test_print_contact_errors(self, mock_print):
+        print_contact_errors(self.valid)
+        mock_print.assert_not_called()
+        print_contact_errors(self.invalid)
+        mock_print.assert_any_call(MESSAGES[INVALID_PHONE])
+        mock_print.assert_any_call(MESSAGES[INVALID_EMAIL])
+
+
+if __name__ == '__main__':
+    unittest.main()
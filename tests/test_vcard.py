@@ -0,0 +1,89 @@
+import unittest
+import io
+from src.vcard import escape, unescape, split_escaped, iter_vcard_contacts, write_vcard_contacts
+
+class TestVcard(unittest.TestCase):
+
+    def read(self, text: str) -> list[dict]:
+        return list(iter_vcard_contacts(io.BytesIO(text.encode('utf-8'))))
+
+    def write(self, records, version='3.0') -> str:
+        f = io.StringIO(newline='')
+        self.assertEqual(write_vcard_contacts(f, records, version, chunk_size=1), len(records))
+        return f.getvalue()
+
+    def test_escape(self):
+        value = "1 Main St, Apt; 2\\3\nBack"
+        self.assertEqual(escape(value), "1 Main St\\, Apt\\; 2\\\\3\\nBack")
+        self.assertEqual(unescape(escape(value)), value)
+        self.assertEqual(split_escaped("Smith\\;Jones;Alice;;", ';'), ["Smith;Jones", "Alice", "", ""])
+
+    def test_read_3_0(self):
+        entries = self.read(
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Smith;Alice;;Dr.;\r\nFN:Dr. Alice Smith\r\n"
+            "TEL;TYPE=CELL,VOICE:+1 (555) 123-4567\r\nTEL;TYPE=HOME;TYPE=PREF:555 1234\r\nitem1.TEL:999\r\n"
+            "EMAIL;TYPE=INTERNET,HOME:alice@example.com\r\nEMAIL;TYPE=WORK:alice@work\r\n .com\r\n"
+            "ADR;TYPE=HOME:;;1 Main St\\, Apt 2;Springfield;IL;62701;\r\nNOTE:ignored\r\n\tcontinued\r\nEND:VCARD\r\n")
+        self.assertEqual(entries, [{
+            "name": "Alice", "surname": "Smith",
+            "phone": {"mobile": ["0015551234567"], "home": ["5551234"], "other": ["999"]},
+            "email": {"personal": ["alice@example.com"], "work": ["alice@work.com"]},
+            "address": "1 Main St, Apt 2, Springfield, IL, 62701"}])
+
+    def test_read_4_0(self):
+        entries = self.read(
+            "BEGIN:VCARD\nVERSION:4.0\nFN:Bob Brown\nTEL;VALUE=uri;TYPE=\"work,voice\":tel:+44-20-1234;ext=5\n"
+            "EMAIL:bob@mail.com\nEND:VCARD\n")
+        self.assertEqual(entries, [{"name": "Bob", "surname": "Brown", "phone": {"work": ["0044201234"]},
+                                    "email": {"other": ["bob@mail.com"]}, "address": ""}])
+
+    def test_read_2_1_bare_types(self):
+        entries = self.read("BEGIN:VCARD\nVERSION:2.1\nN:Grey;Dan\nTEL;WORK;CELL:123\nLABEL;HOME:Elm St\nEND:VCARD\n")
+        self.assertEqual(entries[0]["phone"], {"mobile": ["123"]})
+        self.assertEqual(entries[0]["address"], "Elm St")
+
+    def test_text_outside_cards_is_skipped(self):
+        self.assertEqual(len(self.read("junk\n\nBEGIN:VCARD\nN:A;B\nEND:VCARD\n\nBEGIN:VCARD\nN:C;D\nEND:VCARD")), 2)
+        self.assertEqual(self.read(""), [])
+
+    def test_unclosed_card(self):
+        with self.assertRaises(ValueError):
+            self.read("BEGIN:VCARD\nN:Smith;Alice\n")
+
+    def test_write_and_read_back(self):
+        records = [
+            {"name": "Zoé", "surname": "Brown", "phone": {"mobile": ["1234"], "home": [], "work": ["555", "error"], "fax": ["77"]},
+             "email": {"personal": ["zoe@mail.com"], "other": ["z@b.org"]}, "address": "1 Main St, Apt; 2", "id": 1},
+            {"name": "Carl", "surname": "", "phone": {}, "email": {}, "address": "", "id": 2},
+        ]
+        expected = [
+            {"name": "Zoé", "surname": "Brown", "phone": {"mobile": ["1234"], "work": ["555"], "other": ["77"]},
+             "email": {"personal": ["zoe@mail.com"], "other": ["z@b.org"]}, "address": "1 Main St, Apt; 2"},
+            {"name": "Carl", "surname": "", "phone": {}, "email": {}, "address": ""},
+        ]
+        for version in ('3.0', '4.0'):
+            with self.subTest(version=version):
+                text = self.write(records, version)
+                self.assertIn(f"VERSION:{version}\r\n", text)
+                self.assertIn("TEL;TYPE=fax" if version == '3.0' else "TEL;VALUE=uri;TYPE=fax:tel:77", text)
+                self.assertEqual(self.read(text), expected)
+
+    def test_folding(self):
+        address = "é" * 100
+        text = self.write([{"name": "Alice", "surname": "Smith", "phone": {}, "email": {}, "address": address, "id": 1}])
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in text.split("\r\n")))
+        self.assertEqual(self.read(text)[0]["address"], address)
+
+    def test_invalid_version(self):
+        with self.assertRaises(ValueError):
+            self.write([], version='2.1')
+
+    def test_progress(self):
+        data = "BEGIN:VCARD\nN:A;B\nEND:VCARD\n".encode('utf-8')
+        calls = []
+        list(iter_vcard_contacts(io.BytesIO(data), progress=lambda read, total: calls.append(read)))
+        self.assertEqual(calls[-1], len(data))
+
+
+if __name__ == '__main__':
+    unittest.main()